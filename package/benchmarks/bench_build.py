@@ -0,0 +1,35 @@
+# Topology build time for applications with many Insert sinks.
+#
+# Run with:
+#   python -m pytest benchmarks/bench_build.py --benchmark-json=bench_build.json
+
+import pytest
+pytest.importorskip('pytest_benchmark')
+
+import streamsx.eventstore as es
+from streamsx.topology.topology import Topology
+from streamsx.topology.schema import StreamSchema
+
+_SCHEMA = StreamSchema('tuple<int64 id, timestamp ts, rstring device, float64 reading>').as_tuple()
+
+
+def _build(sinks, **options):
+    topo = Topology('BenchBuild')
+    s = topo.source([1]).map(lambda x : (x, None, 'D'+str(x), 0.5), schema=_SCHEMA)
+    for i in range(sinks):
+        s.for_each(es.Insert(config='eventstore', table='TABLE_'+str(i), primary_key='id', partitioning_key='id', **options))
+    return topo.graph.generateSPLGraph()
+
+
+@pytest.mark.parametrize('sinks', [1, 10, 100])
+def test_build_insert(benchmark, sinks):
+    benchmark.extra_info['sinks'] = sinks
+    graph = benchmark(_build, sinks)
+    assert len(graph['operators']) >= sinks
+
+
+@pytest.mark.parametrize('sinks', [1, 10, 100])
+def test_build_insert_batch_timeout(benchmark, sinks):
+    benchmark.extra_info['sinks'] = sinks
+    graph = benchmark(_build, sinks, batch_size=1000, batch_timeout=1.0)
+    assert len(graph['operators']) >= sinks
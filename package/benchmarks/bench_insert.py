@@ -0,0 +1,70 @@
+# Throughput of the map and insert path against the in-process stand-in.
+#
+# The rows are converted with the map function of the documented sample and passed to the
+# LocalEventStore as the Streams runtime does for a fused map and sink, without Streams runtime overhead.
+#
+# Run with:
+#   python -m pytest benchmarks/bench_insert.py --benchmark-json=bench_insert.json
+#
+# The throughput in rows per second and the memory of a batch are stored in the "extra_info" of each result.
+
+import gc
+import tracemalloc
+import pytest
+pytest.importorskip('pytest_benchmark')
+
+import streamsx.eventstore as es
+from streamsx.topology.schema import StreamSchema
+
+_ROWS = 100000
+_SCHEMA = StreamSchema('tuple<int64 id, timestamp ts, rstring device, float64 reading>')
+# simulated duration of a batch insert with 10 microseconds per row
+_LATENCY_PER_ROW = 0.00001
+
+
+def _to_row(x):
+    return (x, None, 'device-'+str(x % 1000), x * 0.5)
+
+def _insert(rows, batch_size, max_num_active_batches):
+    with es.LocalEventStore(batch_size=batch_size, max_num_active_batches=max_num_active_batches, batch_latency=lambda n: n * _LATENCY_PER_ROW) as store:
+        for x in range(rows):
+            store(_to_row(x))
+    return store.stats()
+
+
+@pytest.mark.parametrize('max_num_active_batches', [1, 2, 4])
+@pytest.mark.parametrize('batch_size', [100, 1000, 10000])
+def test_insert_throughput(benchmark, batch_size, max_num_active_batches):
+    stats = benchmark.pedantic(_insert, args=(_ROWS, batch_size, max_num_active_batches), rounds=3, iterations=1)
+    assert stats['rowsInserted'] == _ROWS
+    benchmark.extra_info['rows'] = _ROWS
+    benchmark.extra_info['batch_size'] = batch_size
+    benchmark.extra_info['max_num_active_batches'] = max_num_active_batches
+    benchmark.extra_info['rows_per_sec'] = _ROWS / benchmark.stats.stats.mean
+    benchmark.extra_info['max_active_batches'] = stats['maxActiveBatches']
+    benchmark.extra_info['batch_latency'] = stats['batchLatency']
+
+
+def _batch_memory(batch_size):
+    # memory of the rows held by a filling batch, the batch is not inserted
+    store = es.LocalEventStore(batch_size=batch_size + 1)
+    store._start()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for x in range(batch_size):
+        store(_to_row(x))
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    store._executor.shutdown()
+    return memory
+
+
+@pytest.mark.parametrize('batch_size', [100, 1000, 10000])
+def test_batch_memory(benchmark, batch_size):
+    memory = benchmark.pedantic(_batch_memory, args=(batch_size,), rounds=3, iterations=1)
+    samples = [_to_row(x) for x in range(100)]
+    benchmark.extra_info['batch_size'] = batch_size
+    benchmark.extra_info['bytes_per_batch'] = memory
+    benchmark.extra_info['bytes_per_row'] = memory / batch_size
+    benchmark.extra_info['estimated_row_width'] = es.recommend_batching(_SCHEMA, samples=samples)['row_width']
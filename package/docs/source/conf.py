@@ -66,9 +66,9 @@ author = 'IBMStreams'
 # built documents.
 #
 # The short X.Y version.
-version = '2.8'
+version = '2.9'
 # The full version, including alpha/beta/rc tags.
-release = '2.8.1'
+release = '2.9.0'
 
 # The language for content autogenerated by Sphinx. Refer to documentation
 # for a list of supported languages.
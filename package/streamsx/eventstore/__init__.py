@@ -39,9 +39,35 @@ a table in a Db2 Event Store database::
     submit (ContextTypes.DISTRIBUTED, topo)
     # The Streams job is kept running.
 
+Python processing
++++++++++++++++++
+
+Some options of :py:class:`~Insert`, for example ``batch_timeout``, ``dedup``, ``metrics``, ``adaptive_batching`` or ``backend='local'``, the :py:class:`~InsertWithRetry` composite and :py:func:`~insert_dataframe` add Python processing in front of or instead of the Event Store operators.
+The ``streamsx.eventstore`` package must be installed in the Python environment of the Streams instance running these applications.
+
 """
 
-__version__='2.8.1'
+__version__='2.9.0'
+
+__all__ = ['AggregatingInsert', 'BatchSummarySchema', 'Insert', 'InsertWithRetry', 'LocalEventStore', 'RoutedInsert', 'SQLStatement', 'configure_connection', 'configure_connections', 'download_toolkit', 'insert', 'insert_dataframe', 'insert_metrics', 'recommend_batching', 'recommend_heap_size', 'run_statement', 'scan', 'to_table_schema']
+from streamsx.eventstore._eventstore import insert,configure_connection,configure_connections,download_toolkit,Insert,InsertWithRetry,RoutedInsert,AggregatingInsert
+from streamsx.eventstore._sizing import recommend_batching, recommend_heap_size
+from streamsx.eventstore._local import LocalEventStore
+from streamsx.eventstore._acks import BatchSummarySchema
+from streamsx.eventstore._metrics import insert_metrics
+from streamsx.eventstore._convert import to_table_schema
+from streamsx.eventstore._frames import insert_dataframe
+
+# SQLStatement, run_statement and scan load the streamsx.database package on first use
+_LAZY = {'SQLStatement': 'streamsx.eventstore._statement', 'run_statement': 'streamsx.eventstore._statement', 'scan': 'streamsx.eventstore._statement'}
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
 
-__all__ = ['Insert', 'SQLStatement', 'configure_connection', 'download_toolkit', 'insert', 'run_statement']
-from streamsx.eventstore._eventstore import insert,configure_connection,download_toolkit,run_statement,SQLStatement,Insert
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,194 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import collections
+import time
+import streamsx.ec
+from streamsx.topology.schema import StreamSchema
+import streamsx.eventstore._batching as _batching
+import streamsx.eventstore._adaptive as _adaptive
+
+#: Schema of the batch acknowledgements: number of rows and failed rows of the batch,
+#: key values of the first and last row and latency of the batch in seconds,
+#: from the arrival of the first row of the batch until the batch insert completed.
+BatchSummarySchema = StreamSchema('tuple<int64 rows, int64 failedRows, rstring firstKey, rstring lastKey, float64 latency>')
+
+# period in seconds of the ticks completing the summary of a batch
+# whose last result arrived before the size of the batch was recorded
+_TICK_PERIOD = 0.1
+
+_SUMMARY = 0
+_FAILED = 1
+
+
+class _Pending(object):
+    """Rows passed to the sink and not yet acknowledged.
+
+    ``times`` holds the arrival times of the rows, ``cuts`` the number and size of each batch
+    the sink inserted on a window punctuation before it was full, ``submitted`` counts all rows passed to the sink.
+    """
+    def __init__(self):
+        self.times = collections.deque()
+        self.cuts = collections.deque()
+        self.submitted = 0
+
+# rows not yet acknowledged, shared by the operators of an insert
+# fused into the same PE, key is the insert id and channel
+_pending = _batching._Registry(_Pending)
+
+
+class _Submitted(object):
+    """Sink callable with punctuations recording the arrival time of each row passed to the sink and the batches cut by window punctuations.
+
+    It consumes the stream of the sink, so that it counts the rows of the current batch as the sink does:
+    a batch is complete with ``batch_size`` rows or on a window punctuation.
+    """
+    def __init__(self, insert_id, batch_size):
+        self.insert_id = insert_id
+        self.batch_size = batch_size
+        self._pending = None
+
+    def __enter__(self):
+        self._shared_key = (self.insert_id, _batching._channel(self))
+        self._pending = _pending.acquire(self._shared_key)
+        self._count = 0
+        self._batch = 0
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pending is not None:
+            _pending.release(self._shared_key)
+            self._pending = None
+
+    def __call__(self, tuple_):
+        if self._pending is None:
+            self.__enter__()
+        self._pending.times.append(time.monotonic())
+        self._pending.submitted += 1
+        self._count += 1
+        if self._count >= self.batch_size:
+            self._count = 0
+            self._batch += 1
+
+    def on_punct(self):
+        if self._pending is None:
+            self.__enter__()
+        if self._count:
+            # the sink inserts the partially filled batch
+            self._pending.cuts.append((self._batch, self._count))
+            self._count = 0
+            self._batch += 1
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pending'] = None
+        return state
+
+
+class _BatchAcknowledgement(object):
+    """Summarizes the per row results of the sink into one summary per batch and the failed rows.
+
+    A batch has ``batch_size`` rows, unless the sink inserted it on a window punctuation as recorded by :py:class:`_Submitted`.
+    As the results of a batch may arrive before its size is recorded, the summary is also completed on heartbeat ticks.
+    The results carry no batch id, they are assigned to the batches in their order, which requires that the batches are inserted in order, one at a time.
+    The rows are recorded by :py:class:`_Submitted` in the same PE, results without recorded rows on a tick raise a ``RuntimeError``.
+    With an ``adaptive`` controller each summary is fed back to the controller shared with the adaptive flush of the insert.
+    """
+    def __init__(self, insert_id, names, key_names, batch_size, adaptive=None):
+        self.insert_id = insert_id
+        self.names = names
+        self.key_names = key_names
+        self.batch_size = batch_size
+        self.adaptive = adaptive
+        self._pending = None
+        self._controller = None
+        self._reset()
+
+    def __enter__(self):
+        self._shared_key = (self.insert_id, _batching._channel(self))
+        self._pending = _pending.acquire(self._shared_key)
+        self._batch = 0
+        self._received = 0
+        if self.adaptive is not None:
+            self._controller = _adaptive._shared(self.insert_id, self._shared_key[1], self.adaptive)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pending is not None:
+            _pending.release(self._shared_key)
+            self._pending = None
+        if self._controller is not None:
+            _adaptive._controllers.release(self._shared_key)
+            self._controller = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pending'] = None
+        state['_controller'] = None
+        return state
+
+    def _reset(self):
+        self._rows = 0
+        self._failed = 0
+        self._first_key = None
+        self._last_key = None
+        self._first_submitted = None
+        self._last = None
+
+    def _key(self, row):
+        if not self.key_names:
+            return ''
+        return ','.join(str(row.get(name)) for name in self.key_names)
+
+    def _summary(self):
+        summary = {'rows': self._rows, 'failedRows': self._failed, 'firstKey': self._first_key, 'lastKey': self._last_key, 'latency': self._last - self._first_submitted}
+        if self._controller is not None:
+            self._controller.update(self._rows, self._failed, summary['latency'])
+        self._batch += 1
+        self._reset()
+        return (_SUMMARY, summary)
+
+    def __call__(self, tuple_):
+        if self._pending is None:
+            self.__enter__()
+        now = time.monotonic()
+        out = []
+        if not _batching._is_row(tuple_):
+            if self._received and not self._pending.submitted:
+                raise RuntimeError("Results of the insert " + self.insert_id + " received, but no rows were recorded in this PE. The stages of the insert must be fused with the sink, remove placements separating them.")
+            if self._rows and self._rows >= self._batch_end():
+                out.append(self._summary())
+            return out
+        row = tuple_ if isinstance(tuple_, dict) else dict(zip(self.names, tuple_))
+        self._received += 1
+        try:
+            submitted = self._pending.times.popleft()
+        except IndexError:
+            submitted = now
+        if self._rows == 0:
+            self._first_submitted = submitted
+            self._first_key = self._key(row)
+        self._rows += 1
+        self._last_key = self._key(row)
+        self._last = now
+        if not row.get('_Inserted_', True):
+            self._failed += 1
+            out.append((_FAILED, row))
+        if self._rows >= self._batch_end():
+            out.append(self._summary())
+        return out
+
+    def _batch_end(self):
+        cuts = self._pending.cuts
+        while cuts and cuts[0][0] < self._batch:
+            cuts.popleft()
+        if cuts and cuts[0][0] == self._batch:
+            # size of the batch inserted on a window punctuation
+            return cuts[0][1]
+        return self.batch_size
+
+
+def _route(item):
+    return item[0]
+
+def _payload(item):
+    return item[1]
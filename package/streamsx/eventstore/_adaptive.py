@@ -0,0 +1,104 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import copy
+import time
+import streamsx.ec
+import streamsx.eventstore._batching as _batching
+
+_DEFAULT_MIN_BATCH = 100
+_DEFAULT_MAX_BATCH = 10000
+_DEFAULT_TARGET_LATENCY_MS = 1000
+
+# the setpoint is multiplied with this factor when a batch is late or failed
+_DECREASE = 0.5
+
+# controllers shared by the flush and the feedback stage of an insert fused
+# into the same PE, key is the insert id and channel
+_controllers = _batching._Registry(copy.deepcopy)
+
+
+class _Controller(object):
+    """Additive increase, multiplicative decrease controller of the batch size.
+
+    The setpoint grows by ``step`` rows for each batch inserted within the target latency
+    and is halved for each batch that took longer or had failed rows, within ``[min_batch, max_batch]``.
+    """
+    def __init__(self, min_batch, max_batch, target_latency, initial=None):
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.step = max(1, min_batch // 2)
+        self.setpoint = min_batch if initial is None else min(max(initial, min_batch), max_batch)
+
+    def update(self, rows, failed, latency):
+        if failed or latency > self.target_latency:
+            self.setpoint = max(self.min_batch, int(self.setpoint * _DECREASE))
+        elif rows >= self.setpoint:
+            # only full batches prove that a larger batch is within the target
+            self.setpoint = min(self.max_batch, self.setpoint + self.step)
+        return self.setpoint
+
+
+def _shared(insert_id, channel, controller):
+    return _controllers.acquire((insert_id, channel), controller)
+
+
+class _AdaptiveFlush(object):
+    """Punctor callable requesting a window punctuation when the current batch has reached the setpoint of the controller.
+
+    The sink is invoked with the maximum batch size, so that it inserts smaller batches only on a punctuation.
+    With a ``timeout`` the rows are merged with heartbeat ticks and a punctuation is also requested when the oldest row
+    of the current batch is older than ``timeout`` seconds, so that all batches of the sink are cut by this stage and counted.
+    """
+    def __init__(self, insert_id, controller, timeout=None):
+        self.insert_id = insert_id
+        self.controller = controller
+        self.timeout = timeout
+        self._shared = None
+
+    def __enter__(self):
+        self._shared_key = (self.insert_id, _batching._channel(self))
+        self._shared = _shared(self.insert_id, self._shared_key[1], self.controller)
+        self._count = 0
+        self._deadline = None
+        self._setpoint = None
+        self._metric = None
+        if streamsx.ec.is_active():
+            self._metric = streamsx.ec.CustomMetric(self, name='batchSizeSetpoint', description='Current batch size of the adaptive batching', kind='Gauge')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._shared is not None:
+            _controllers.release(self._shared_key)
+            self._shared = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shared'] = None
+        state.pop('_metric', None)
+        return state
+
+    def __call__(self, tuple_):
+        if self._shared is None:
+            self.__enter__()
+        now = time.monotonic()
+        setpoint = self._shared.setpoint
+        if setpoint != self._setpoint:
+            self._setpoint = setpoint
+            if self._metric is not None:
+                self._metric.value = setpoint
+        if _batching._is_row(tuple_):
+            self._count += 1
+            if self._count >= setpoint:
+                self._count = 0
+                self._deadline = None
+                # the sink inserts a batch of the maximum size itself
+                return setpoint < self._shared.max_batch
+            if self._count == 1 and self.timeout is not None:
+                self._deadline = now + self.timeout
+        if self._deadline is not None and now >= self._deadline:
+            self._count = 0
+            self._deadline = None
+            return True
+        return False
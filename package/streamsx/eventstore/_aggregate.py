@@ -0,0 +1,154 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import array
+import logging
+import math
+import time
+import streamsx.spl.types
+import streamsx.eventstore._batching as _batching
+
+_FUNCTIONS = ('count', 'sum', 'min', 'max', 'mean')
+_INTEGER_TYPES = ('int8', 'int16', 'int32', 'int64', 'uint8', 'uint16', 'uint32', 'uint64')
+_FLOAT_TYPES = ('float32', 'float64')
+# value range of the integer types
+_INTEGER_RANGES = {t: (-2 ** (int(t[3:]) - 1), 2 ** (int(t[3:]) - 1) - 1) if t[0] == 'i' else (0, 2 ** int(t[4:]) - 1) for t in _INTEGER_TYPES}
+
+_logger = logging.getLogger('streamsx.eventstore')
+
+
+def _aggregation_type(function, input_type):
+    if function == 'count':
+        return 'int64'
+    if input_type not in _INTEGER_TYPES + _FLOAT_TYPES:
+        raise ValueError("Numeric attribute required for " + function + ", got " + str(input_type))
+    if function == 'mean':
+        return 'float64'
+    if function == 'sum':
+        if input_type in _FLOAT_TYPES:
+            return 'float64'
+        return 'uint64' if input_type.startswith('u') else 'int64'
+    return input_type
+
+
+def _accumulator(function, spl_type):
+    # sums are Python ints, exact and without overflow, min and max fit into an array of the 64 bit type
+    if spl_type not in _INTEGER_TYPES:
+        return array.array('d')
+    if function == 'sum':
+        return []
+    return array.array('Q' if spl_type == 'uint64' else 'q')
+
+
+class _TumblingAggregate(object):
+    """Aggregates the tuples per key in tumbling processing time windows.
+
+    The keys are mapped to slots, the accumulators of each aggregation are arrays indexed by the slot,
+    so that the state per key is a few numbers instead of a dict per key or tuple.
+
+    A window is submitted by the first tuple or tick after its end. The state of the open window is part of the
+    pickled callable, so that it is kept in the checkpoints of a consistent region and submitted after a reset.
+    Python callables are not invoked on the final punctuation, the open window is dropped with a warning
+    when the PE is shut down before its end.
+    Integer sums are exact, a sum exceeding the range of the output type is clamped to the range with a warning.
+    """
+    def __init__(self, names, group_by, window, aggregations, integral, window_start=None):
+        self.names = names
+        self.group_by = group_by
+        self.window = window
+        # (output attribute, function, input attribute)
+        self.aggregations = aggregations
+        # integer type by output attribute with integer values
+        self.integral = integral
+        self.window_start = window_start
+        self._slots = None
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._slots:
+            _logger.warning('Aggregation window ending at ' + str(self._end) + ' dropped on shutdown, ' + str(len(self._keys)) + ' groups not inserted.')
+
+    def _reset(self, now):
+        self._slots = {}
+        self._keys = []
+        self._counts = array.array('q')
+        # integer accumulators for integer results, exact beyond the precision of a double
+        self._values = [_accumulator(function, self.integral.get(out)) for out, function, _ in self.aggregations]
+        self._start = math.floor(now / self.window) * self.window
+        self._end = self._start + self.window
+
+    def _initial(self, function, spl_type):
+        if function == 'min':
+            return _INTEGER_RANGES[spl_type][1] if spl_type is not None else math.inf
+        if function == 'max':
+            return _INTEGER_RANGES[spl_type][0] if spl_type is not None else -math.inf
+        return 0
+
+    def _flush(self):
+        rows = []
+        start = None
+        if self.window_start is not None:
+            start = streamsx.spl.types.Timestamp(int(self._start), int(round((self._start % 1) * 1e9)), 0)
+        for slot, key in enumerate(self._keys):
+            row = dict(zip(self.group_by, key))
+            count = self._counts[slot]
+            for (out, function, _), values in zip(self.aggregations, self._values):
+                if function == 'count':
+                    value = count
+                elif function == 'mean':
+                    value = values[slot] / count
+                else:
+                    value = values[slot]
+                    if function == 'sum' and out in self.integral:
+                        value = self._clamp(out, key, value)
+                row[out] = value
+            if start is not None:
+                row[self.window_start] = start
+            rows.append(row)
+        return rows
+
+    def _clamp(self, out, key, value):
+        low, high = _INTEGER_RANGES[self.integral[out]]
+        if low <= value <= high:
+            return value
+        _logger.warning('Sum ' + str(value) + ' of attribute ' + out + ' for group ' + str(key) + ' exceeds the range of ' + self.integral[out] + ', clamped.')
+        return low if value < low else high
+
+    def __call__(self, tuple_):
+        now = time.time()
+        out = []
+        if self._slots is None:
+            self._reset(now)
+        elif now >= self._end:
+            out = self._flush()
+            self._reset(now)
+        if not _batching._is_row(tuple_):
+            return out
+        if not isinstance(tuple_, dict):
+            tuple_ = dict(zip(self.names, tuple_))
+        key = tuple(tuple_[name] for name in self.group_by)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._keys)
+            self._slots[key] = slot
+            self._keys.append(key)
+            self._counts.append(0)
+            for (attr, function, _), values in zip(self.aggregations, self._values):
+                values.append(self._initial(function, self.integral.get(attr)))
+        self._counts[slot] += 1
+        for (_, function, attribute), values in zip(self.aggregations, self._values):
+            if function == 'count':
+                continue
+            value = tuple_[attribute]
+            if function == 'min':
+                if value < values[slot]:
+                    values[slot] = value
+            elif function == 'max':
+                if value > values[slot]:
+                    values[slot] = value
+            else:
+                values[slot] += value
+        return out
@@ -0,0 +1,98 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import threading
+import time
+import streamsx.ec
+
+
+class _Tick(object):
+    """Heartbeat marker merged into a stream of rows, it is never inserted."""
+    pass
+
+_TICK = _Tick()
+
+def _is_row(tuple_):
+    return not isinstance(tuple_, _Tick)
+
+def _channel(op):
+    try:
+        return streamsx.ec.channel(op)
+    except Exception:
+        return -1
+
+
+class _Registry(object):
+    """State shared by the stages of an insert fused into the same PE, key is the insert id and channel.
+
+    Each stage acquires the state when it starts and releases it when it stops,
+    the state is removed when the last stage of the key has released it.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def acquire(self, key, *args):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [self.factory(*args), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._entries[key]
+
+
+class _Ticker(object):
+    """Source callable submitting a heartbeat marker every ``period`` seconds until the PE is shutdown."""
+    def __init__(self, period):
+        self.period = period
+
+    def __call__(self):
+        return self._ticks()
+
+    def _ticks(self):
+        while not streamsx.ec.shutdown().wait(self.period):
+            yield _TICK
+
+
+class _DeadlineFlush(object):
+    """Punctor callable requesting a window punctuation when the oldest row of the current batch is older than ``timeout`` seconds.
+
+    The EventStoreSink inserts its partially filled batch when it receives a window punctuation.
+    When ``batch_size`` is given, the count of rows in the current batch is tracked as the sink fills its batch
+    and the deadline is restarted whenever a batch is complete.
+    """
+    def __init__(self, batch_size, timeout):
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._count = 0
+        self._deadline = None
+
+    def __call__(self, tuple_):
+        now = time.monotonic()
+        if _is_row(tuple_):
+            self._count += 1
+            if self.batch_size is not None and self._count >= self.batch_size:
+                # sink inserts the full batch itself
+                self._count = 0
+                self._deadline = None
+                return False
+            if self._count == 1:
+                self._deadline = now + self.timeout
+        if self._deadline is not None and now >= self._deadline:
+            self._count = 0
+            self._deadline = None
+            return True
+        return False
@@ -0,0 +1,199 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import datetime
+import decimal
+import streamsx.spl.types
+from streamsx.topology.schema import CommonSchema, StreamSchema
+from streamsx.eventstore._sizing import _schema_types
+from streamsx.eventstore._aggregate import _INTEGER_RANGES
+
+_INTEGER_TYPES = ('int8', 'int16', 'int32', 'int64', 'uint8', 'uint16', 'uint32', 'uint64')
+_FLOAT_TYPES = ('float32', 'float64')
+_STRING_TYPES = ('rstring', 'ustring')
+_DECIMAL_TYPES = ('decimal32', 'decimal64', 'decimal128')
+_COLLECTION_TYPES = ('list', 'set')
+
+
+def _boolean(value):
+    if isinstance(value, str):
+        lower = value.lower()
+        if lower in ('true', '1', 'yes'):
+            return True
+        if lower in ('false', '0', 'no', ''):
+            return False
+        raise ValueError("Invalid boolean value " + repr(value))
+    return bool(value)
+
+def _timestamp(value):
+    if isinstance(value, (datetime.datetime, streamsx.spl.types.Timestamp)):
+        return value
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    # seconds since the epoch
+    seconds = float(value)
+    whole = int(seconds // 1)
+    return streamsx.spl.types.Timestamp(whole, int(round((seconds - whole) * 1e9)), 0)
+
+def _integer(spl_type):
+    low, high = _INTEGER_RANGES[spl_type]
+    def integer(value):
+        result = int(value)
+        # int truncates floats and decimals
+        if not isinstance(value, str) and result != value:
+            raise ValueError("Invalid " + spl_type + " value " + repr(value) + ", integral value required.")
+        if not low <= result <= high:
+            raise ValueError("Invalid " + spl_type + " value " + repr(value) + ", value in [" + str(low) + ", " + str(high) + "] required.")
+        return result
+    return integer
+
+def _decimal(value):
+    if isinstance(value, float):
+        # the shortest representation instead of the binary value
+        return decimal.Decimal(repr(value))
+    return decimal.Decimal(value)
+
+def _optional(coerce):
+    def optional(value):
+        return None if value is None else coerce(value)
+    return optional
+
+def _collection(coerce, kind):
+    def collection(value):
+        return kind(coerce(v) for v in value)
+    return collection
+
+
+def _coercion(spl_type, name):
+    """Returns the callable coercing a Python value to the SPL type, builtins for the basic types."""
+    if isinstance(spl_type, tuple):
+        if spl_type[0] == 'optional':
+            return _optional(_coercion(spl_type[1], name))
+        if spl_type[0] in _COLLECTION_TYPES:
+            return _collection(_coercion(spl_type[1], name), list if spl_type[0] == 'list' else set)
+    elif spl_type in _INTEGER_TYPES:
+        return _integer(spl_type)
+    elif spl_type in _FLOAT_TYPES:
+        return float
+    elif spl_type in _STRING_TYPES:
+        return str
+    elif spl_type == 'boolean':
+        return _boolean
+    elif spl_type == 'timestamp':
+        return _timestamp
+    elif spl_type in _DECIMAL_TYPES:
+        return _decimal
+    raise ValueError("Unsupported type " + str(spl_type) + " of attribute " + name + ", numeric, boolean, string, timestamp, decimal, optional, list or set types required.")
+
+
+class _Converter(object):
+    """Converts dicts or sequences into tuples of the schema with a function generated once per schema and mapping.
+
+    The generated function builds the tuple in a single expression of item lookups and coercions, without loops or intermediate dicts.
+    """
+    def __init__(self, types, sources):
+        # (SPL type, attribute name) and the source of each attribute: key, index or callable
+        self.types = types
+        self.sources = sources
+        self._convert = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_convert'] = None
+        state.pop('_coercions', None)
+        return state
+
+    def _expression(self, index):
+        source = self.sources[index]
+        if callable(source):
+            value = '_s[%d](t)' % index
+        else:
+            value = 't[%r]' % (source,)
+        return '_c[%d](%s)' % (index, value)
+
+    def _compile(self):
+        self._coercions = [_coercion(spl_type, name) for spl_type, name in self.types]
+        code = 'def _convert(t):\n    return (' + ''.join(self._expression(i) + ', ' for i in range(len(self.types))) + ')\n'
+        namespace = {'_c': self._coercions, '_s': self.sources}
+        exec(compile(code, '<to_table_schema>', 'exec'), namespace)
+        return namespace['_convert']
+
+    def _describe(self, tuple_, error):
+        # finds the attribute failing the conversion
+        for (spl_type, name), source, coerce in zip(self.types, self.sources, self._coercions):
+            try:
+                coerce(source(tuple_) if callable(source) else tuple_[source])
+            except Exception as e:
+                return "Conversion of attribute " + name + " to " + str(spl_type) + " failed: " + repr(e)
+        return "Conversion failed: " + repr(error)
+
+    def __call__(self, tuple_):
+        if self._convert is None:
+            self._convert = self._compile()
+        try:
+            return self._convert(tuple_)
+        except (KeyError, IndexError, TypeError, ValueError, ArithmeticError) as e:
+            raise ValueError(self._describe(tuple_, e)) from e
+
+
+def _source_names(schema):
+    # structured input tuples are passed as dicts, other schemas are not validated
+    if isinstance(schema, StreamSchema):
+        return [name for _, name in _schema_types(schema)]
+    return None
+
+
+def to_table_schema(stream, schema, mapping=None, name=None):
+    """Converts the tuples of a stream into tuples with the schema of an IBM Db2 Event Store table.
+
+    Use this function instead of a generic ``map`` in front of :py:class:`~Insert`, when the tuples are dicts, for example of a JSON stream, or sequences.
+    The attribute names, types and the mapping are validated when the topology is built.
+    A conversion function is generated once for the schema, which looks up and coerces the values of all attributes in a single expression.
+    A tuple that can not be converted raises a ``ValueError`` naming the attribute.
+
+    The values are coerced to the attribute type: ``int`` for integer types, where floats must be integral and the values within the range of the type, ``float`` for floating point types, ``str`` for strings,
+    ``True`` or ``False`` for booleans, including the strings ``'true'`` and ``'false'``, ``decimal.Decimal`` for decimal types,
+    and a timestamp from a ``datetime``, an ISO 8601 string or the seconds since the epoch. Optional types accept ``None``, list and set types convert each element.
+
+    Example of inserting the rows of a JSON stream, where the ``id`` attribute is read from the key ``deviceId``::
+
+        import streamsx.eventstore as es
+
+        schema = StreamSchema('tuple<int32 id, rstring name, float64 reading, timestamp ts>')
+        rows = es.to_table_schema(json_stream, schema, mapping={'id': 'deviceId'})
+        rows.for_each(es.Insert(config='eventstore', table='SampleTable'))
+
+    Args:
+        stream(streamsx.topology.topology.Stream): Stream of dicts, sequences or structured tuples.
+        schema(str|streamsx.topology.schema.StreamSchema): Schema of the table rows.
+        mapping(dict): Source of the attributes by attribute name, either a key of the dicts, an index of the sequences, which is not supported for structured input tuples, or a callable returning the value of the attribute for an input tuple. Attributes not contained in the mapping are read from the key with the attribute name.
+        name(str): Name of the conversion stage, defaults to a generated name.
+
+    Returns:
+        streamsx.topology.topology.Stream: Stream with the ``schema``.
+
+    .. versionadded:: 2.9
+    """
+    types = _schema_types(schema)
+    names = [attr for _, attr in types]
+    mapping = dict(mapping) if mapping is not None else {}
+    for attr in mapping:
+        if attr not in names:
+            raise ValueError("Invalid mapping attribute " + str(attr) + ", attribute of the schema required.")
+    sources = [mapping.get(attr, attr) for attr in names]
+    input_names = _source_names(stream.oport.schema)
+    for attr, source in zip(names, sources):
+        if not (callable(source) or isinstance(source, (str, int))):
+            raise ValueError("Invalid source " + repr(source) + " of attribute " + attr + ", key, index or callable required.")
+        if input_names is not None and isinstance(source, str) and source not in input_names:
+            raise ValueError("Invalid source " + source + " of attribute " + attr + ", attribute of the input stream required.")
+        if input_names is not None and isinstance(source, int):
+            raise ValueError("Invalid source " + str(source) + " of attribute " + attr + ", attribute name of the input stream required for structured tuples.")
+    for spl_type, attr in types:
+        _coercion(spl_type, attr)
+    if isinstance(schema, CommonSchema):
+        schema = schema.value
+    if isinstance(schema, str):
+        schema = StreamSchema(schema)
+    return stream.map(_Converter(types, sources), schema=schema.as_tuple(), name=name)
@@ -0,0 +1,154 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import collections
+import hashlib
+import math
+import time
+import streamsx.ec
+
+_MODES = ('lru', 'bloom')
+_DEFAULT_CAPACITY = 1000000
+# false positive rate a Bloom filter generation is sized for at its capacity
+_BLOOM_ERROR_RATE = 0.01
+
+
+class _BloomFilter(object):
+    def __init__(self, capacity, error_rate=_BLOOM_ERROR_RATE):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def error_rate(self):
+        # estimated probability that a key not added is reported as contained
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class _Dedup(object):
+    """Filter dropping tuples whose primary key was seen within the window.
+
+    In ``'lru'`` mode the keys are held exactly, up to ``capacity`` keys, the least recently seen keys are evicted first.
+    A duplicate refreshes its key, the window is measured from the last occurrence of a key.
+    In ``'bloom'`` mode the keys are held in two Bloom filter generations of fixed size, each sized for ``capacity`` keys.
+    A new generation is started when the current generation is full or older than the window, dropping the older generation.
+    Unique tuples are dropped with a small probability.
+    """
+    def __init__(self, names, key_names, mode='lru', window=None, capacity=_DEFAULT_CAPACITY):
+        self.names = names
+        self.key_names = key_names
+        self.positions = [names.index(name) for name in key_names]
+        self.mode = mode
+        self.window = window
+        self.capacity = capacity
+        self._keys = None
+
+    def __enter__(self):
+        if self.mode == 'lru':
+            self._keys = collections.OrderedDict()
+        else:
+            self._keys = _BloomFilter(self.capacity)
+            self._previous = None
+            self._started = time.monotonic()
+        self.duplicates = 0
+        self.evicted = 0
+        self._metrics = None
+        if streamsx.ec.is_active():
+            self._metrics = {
+                'duplicates': streamsx.ec.CustomMetric(self, name='nDuplicates', description='Number of tuples dropped as duplicates'),
+                'evicted': streamsx.ec.CustomMetric(self, name='nEvictedKeys', description='Number of keys removed before the end of the window because of the capacity'),
+                'error': streamsx.ec.CustomMetric(self, name='falsePositiveRatePpm', description='Estimated rate of unique tuples dropped as duplicates in parts per million', kind='Gauge')}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_keys'] = None
+        for attr in ['_previous', '_metrics']:
+            state.pop(attr, None)
+        return state
+
+    def _key(self, tuple_):
+        if isinstance(tuple_, dict):
+            return tuple(tuple_[name] for name in self.key_names)
+        return tuple(tuple_[p] for p in self.positions)
+
+    def _evicted(self, count):
+        self.evicted += count
+        if self._metrics is not None:
+            self._metrics['evicted'] += count
+
+    def _lru(self, key, now):
+        keys = self._keys
+        if self.window is not None:
+            # keys in order of their last occurrence, expired keys are at the front
+            while keys:
+                seen = next(iter(keys.values()))
+                if now - seen < self.window:
+                    break
+                keys.popitem(last=False)
+        if key in keys:
+            keys[key] = now
+            keys.move_to_end(key)
+            return False
+        keys[key] = now
+        if len(keys) > self.capacity:
+            keys.popitem(last=False)
+            self._evicted(1)
+        return True
+
+    def _bloom(self, key, now):
+        if self.window is not None and now - self._started >= self.window:
+            # a key is remembered for at least one and at most two windows
+            self._previous = self._keys if now - self._started < 2 * self.window else None
+            self._keys = _BloomFilter(self.capacity)
+            self._started = now
+        data = repr(key).encode('utf-8')
+        if data in self._keys or (self._previous is not None and data in self._previous):
+            return False
+        if self._keys.count >= self.capacity:
+            if self._previous is not None:
+                self._evicted(self._previous.count)
+            self._previous = self._keys
+            self._keys = _BloomFilter(self.capacity)
+            self._started = now
+        self._keys.add(data)
+        if self._metrics is not None:
+            self._metrics['error'].value = int(self.error_rate() * 1e6)
+        return True
+
+    def error_rate(self):
+        if self.mode == 'lru' or self._keys is None:
+            return 0.0
+        rate = self._keys.error_rate()
+        if self._previous is not None:
+            rate = 1 - (1 - rate) * (1 - self._previous.error_rate())
+        return rate
+
+    def __call__(self, tuple_):
+        if self._keys is None:
+            self.__enter__()
+        now = time.monotonic()
+        key = self._key(tuple_)
+        unique = self._lru(key, now) if self.mode == 'lru' else self._bloom(key, now)
+        if not unique:
+            self.duplicates += 1
+            if self._metrics is not None:
+                self._metrics['duplicates'] += 1
+        return unique
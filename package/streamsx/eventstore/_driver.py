@@ -0,0 +1,145 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import zipfile
+import requests
+from tempfile import gettempdir
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_DRIVER_NAME = 'ibm-event_2.11-1.0.jar'
+_DRIVER_URL = 'https://github.com/IBMStreams/streamsx.eventstore/raw/develop/com.ibm.streamsx.eventstore/opt/' + _DRIVER_NAME
+# driver installed with IBM Cloud Pak for Data
+_GLOBAL_DRIVER = '/user-home/_global_/eventstore/' + _DRIVER_NAME
+
+# environment variables: cache directory, expected SHA-256 digest of the driver and offline mode
+_CACHE_ENV = 'STREAMSX_EVENTSTORE_CACHE'
+_SHA256_ENV = 'STREAMSX_EVENTSTORE_DRIVER_SHA256'
+_OFFLINE_ENV = 'STREAMSX_EVENTSTORE_OFFLINE'
+
+_CHUNK_SIZE = 1024 * 1024
+_TIMEOUT = 60
+
+
+def _cache_dir():
+    path = os.environ.get(_CACHE_ENV)
+    if not path:
+        path = os.path.join(gettempdir(), 'streamsx.eventstore')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _offline():
+    return os.environ.get(_OFFLINE_ENV, '').lower() in ('1', 'true', 'yes')
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def _locked(cache_dir):
+    """Serializes the download of concurrent builds sharing the cache directory."""
+    with open(os.path.join(cache_dir, '.lock'), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _index_path(cache_dir, name):
+    return os.path.join(cache_dir, name + '.sha256')
+
+def _cached(cache_dir, name, expected):
+    """Returns the path of the cached file if its content is intact and matches the expected digest."""
+    digest = expected
+    if digest is None:
+        try:
+            with open(_index_path(cache_dir, name)) as fd:
+                digest = fd.read().strip()
+        except IOError:
+            return None
+    path = os.path.join(cache_dir, 'sha256', digest, name)
+    if not os.path.isfile(path):
+        return None
+    if _sha256(path) != digest:
+        # corrupted entry, downloaded again
+        os.remove(path)
+        return None
+    return path
+
+
+def _download(url, cache_dir, name, expected=None):
+    """Downloads the file into the content addressed cache and returns its path."""
+    r = requests.get(url, stream=True, timeout=_TIMEOUT)
+    r.raise_for_status()
+    digest = hashlib.sha256()
+    size = 0
+    fd = tempfile.NamedTemporaryFile(dir=cache_dir, prefix=name + '.', suffix='.part', delete=False)
+    try:
+        with fd:
+            for chunk in r.iter_content(chunk_size=_CHUNK_SIZE):
+                fd.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            fd.flush()
+            os.fsync(fd.fileno())
+        length = r.headers.get('Content-Length')
+        if length is not None and r.headers.get('Content-Encoding') is None and int(length) != size:
+            raise ValueError("Incomplete download of " + url + ", " + str(size) + " of " + length + " bytes received.")
+        hexdigest = digest.hexdigest()
+        if expected is not None and hexdigest != expected:
+            raise ValueError("Checksum mismatch of " + url + ", expected SHA-256 " + expected + ", got " + hexdigest + ".")
+        if name.endswith('.jar') and not zipfile.is_zipfile(fd.name):
+            raise ValueError("Invalid JDBC driver downloaded from " + url)
+        target_dir = os.path.join(cache_dir, 'sha256', hexdigest)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, name)
+        os.replace(fd.name, target)
+    except BaseException:
+        if os.path.exists(fd.name):
+            os.remove(fd.name)
+        raise
+    index = tempfile.NamedTemporaryFile('w', dir=cache_dir, prefix=name + '.', suffix='.part', delete=False)
+    with index:
+        index.write(hexdigest)
+    os.replace(index.name, _index_path(cache_dir, name))
+    return target
+
+
+def _get_jdbc_driver():
+    """Returns the path of the Db2 Event Store JDBC driver, downloaded into the driver cache if required.
+
+    The cache directory is set with the environment variable ``STREAMSX_EVENTSTORE_CACHE``.
+    The expected SHA-256 digest of the driver can be set with ``STREAMSX_EVENTSTORE_DRIVER_SHA256``.
+    Set ``STREAMSX_EVENTSTORE_OFFLINE`` to ``1`` to use cached drivers only.
+    """
+    if os.path.isfile(_GLOBAL_DRIVER):
+        return _GLOBAL_DRIVER
+    cache_dir = _cache_dir()
+    expected = os.environ.get(_SHA256_ENV)
+    expected = expected.lower() if expected else None
+    path = _cached(cache_dir, _DRIVER_NAME, expected)
+    if path is not None:
+        return path
+    if _offline():
+        raise ValueError("JDBC driver " + _DRIVER_NAME + " not found in cache " + cache_dir + " and download disabled with " + _OFFLINE_ENV + ".")
+    with _locked(cache_dir):
+        # another build may have completed the download while waiting for the lock
+        path = _cached(cache_dir, _DRIVER_NAME, expected)
+        if path is None:
+            path = _download(_DRIVER_URL, cache_dir, _DRIVER_NAME, expected)
+    return path
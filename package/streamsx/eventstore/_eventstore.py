@@ -4,22 +4,34 @@
 
 import streamsx.spl.op
 import streamsx.spl.types
+import streamsx.spl.toolkit
+import streamsx.topology.composite
 from streamsx.topology.schema import CommonSchema, StreamSchema
 from streamsx.spl.types import rstring
 import os
-import getpass
-import wget
-from tempfile import gettempdir
-import shutil
-import tarfile
-import requests
-import string
-import random
-import re
-import urllib.parse as up
 import json
-import streamsx.database as db
-from streamsx.toolkits import download_toolkit
+import datetime
+import copy
+import uuid
+import hashlib
+import threading
+import concurrent.futures
+import socket
+import time
+import weakref
+import tempfile
+import shutil
+import streamsx.eventstore._batching as _batching
+import streamsx.eventstore._acks as _acks
+import streamsx.eventstore._retry as _retry
+import streamsx.eventstore._routing as _routing
+import streamsx.eventstore._aggregate as _aggregate
+import streamsx.eventstore._dedup as _dedup
+import streamsx.eventstore._metrics as _metrics
+import streamsx.eventstore._adaptive as _adaptive
+import streamsx.eventstore._local as _local
+from streamsx.eventstore._sizing import recommend_batching, recommend_heap_size, _default_batch_size, _row_width, _schema_types
+from streamsx.eventstore._local import LocalEventStore
 
 _TOOLKIT_NAME = 'com.ibm.streamsx.eventstore'
 
@@ -28,10 +40,121 @@ def _add_toolkit_dependency(topo):
     # This is important when toolkit is not set with streamsx.spl.toolkit.add_toolkit (selecting toolkit from remote build service)
     streamsx.spl.toolkit.add_toolkit_dependency(topo, 'com.ibm.streamsx.eventstore', '[2.0.0,3.0.0)')
 
+# store files added to each topology: content hash -> path in the bundle, and file stat -> content hash
+_store_files = weakref.WeakKeyDictionary()
+
+def _file_digest(path, digests):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in digests:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digests[key] = digest.hexdigest()
+    return digests[key]
+
 def _add_store_file(topology, path):
+    # each store file is added once, sinks sharing a trust store or key store get the same path
+    registry = _store_files.setdefault(topology, ({}, {}))
+    paths, digests = registry
+    digest = _file_digest(path, digests)
+    if digest in paths:
+        return paths[digest]
     filename = os.path.basename(path)
+    used = {os.path.basename(p) for p in topology._files.get('opt', [])}
+    if filename in used:
+        # different file with the same name, added under a unique name
+        stem, ext = os.path.splitext(filename)
+        filename = stem + '_' + digest[:12] + ext
+        # the copy is kept until the bundle is built, its location is keyed by the content, so that it is reused by later topologies
+        directory = os.path.join(tempfile.gettempdir(), 'streamsx_eventstore_' + digest)
+        unique = os.path.join(directory, filename)
+        if not os.path.exists(unique):
+            os.makedirs(directory, exist_ok=True)
+            partial = unique + '.' + str(os.getpid())
+            shutil.copyfile(path, partial)
+            os.replace(partial, unique)
+        path = unique
     topology.add_file_dependency(path, 'opt')
-    return 'opt/'+filename
+    paths[digest] = 'opt/'+filename
+    return paths[digest]
+
+def _attribute_names(attributes):
+    # attribute names given as list or as string of names separated by commas
+    if attributes is None:
+        return []
+    if isinstance(attributes, str):
+        attributes = attributes.split(',')
+    return [a.strip() for a in attributes if a.strip()]
+
+def _parallel_region(stream, width, hash_attributes, partitioning_key):
+    keys = _attribute_names(hash_attributes)
+    if not keys:
+        keys = _attribute_names(partitioning_key)
+    if keys:
+        return stream.parallel(width, routing=streamsx.topology.topology.Routing.KEY_PARTITIONED, keys=keys)
+    return stream.parallel(width)
+
+def _seconds(value):
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return float(value)
+
+def _timeout(batch_timeout):
+    timeout = _seconds(batch_timeout)
+    if timeout <= 0:
+        raise ValueError("Invalid batch_timeout " + str(batch_timeout) + ", positive value required.")
+    return timeout
+
+def _flush_on_timeout(topology, stream, batch_size, batch_timeout):
+    # Rows are merged with heartbeat ticks to get the deadline checked even if no rows arrive,
+    # a window punctuation makes the sink insert its partially filled batch.
+    timeout = _timeout(batch_timeout)
+    schema = stream.oport.schema
+    ticks = topology.source(_batching._Ticker(timeout / 4.0))
+    rows = stream.map().union({ticks})
+    rows = rows.punctor(_batching._DeadlineFlush(batch_size, timeout), before=False)
+    return rows.filter(_batching._is_row).map(schema=schema)
+
+def _heartbeat(topology, period, parallel_width):
+    # heartbeat ticks, broadcast to each channel of the parallel region of the insert
+    ticks = topology.source(_batching._Ticker(period))
+    if parallel_width is not None:
+        ticks = ticks.parallel(parallel_width, routing=streamsx.topology.topology.Routing.BROADCAST)
+    return ticks
+
+# congestion policies of a threaded input port
+_CONGESTION_POLICIES = {'wait': 'Sys.Wait', 'drop_first': 'Sys.DropFirst', 'drop_last': 'Sys.DropLast'}
+_DEFAULT_QUEUE_SIZE = 1000
+# alias of the input port of the sink, the threaded port refers to the port by this name
+_QUEUE_PORT = 'Rows'
+
+def _placement(sink):
+    # a Sink wrapping an SPL operator is placed through the operator invocation
+    op = sink._op()
+    return op if isinstance(op, streamsx.spl.op.Invoke) else sink
+
+class _Batches(object):
+    # batch settings of an insert and the stages sharing the recorded batches with the sink in the same PE
+    def __init__(self, batch_size, max_num_active_batches, adaptive):
+        self.batch_size = batch_size
+        self.max_num_active_batches = max_num_active_batches
+        self.adaptive = adaptive
+        self.insert_id = None
+        self.stages = []
+
+def _vm_args(vm_arg, heap_size):
+    args = []
+    if vm_arg is not None:
+        args = [vm_arg] if isinstance(vm_arg, str) else list(vm_arg)
+    if heap_size is not None:
+        if isinstance(heap_size, str) and heap_size.isdigit():
+            heap_size = int(heap_size)
+        if not isinstance(heap_size, int) or isinstance(heap_size, bool) or heap_size <= 0:
+            raise ValueError("Invalid heap_size " + repr(heap_size) + ", positive number of megabytes or 'auto' required.")
+        args.append('-Xmx' + str(heap_size) + 'm')
+    return args
 
 def download_toolkit(url=None, target_dir=None):
     r"""Downloads the latest Eventstore toolkit from GitHub.
@@ -64,11 +187,83 @@ def download_toolkit(url=None, target_dir=None):
     .. note:: This function requires an outgoing Internet connection
     .. versionadded:: 2.5
     """
+    # deferred, the toolkits package loads the SSL and key store libraries
+    import streamsx.toolkits
     _toolkit_location = streamsx.toolkits.download_toolkit (toolkit_name=_TOOLKIT_NAME, url=url, target_dir=target_dir)
     return _toolkit_location
 
 
-def configure_connection(instance, name='eventstore', database=None, connection=None, user=None, password=None, keystore_password=None, truststore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None):
+_PROBE_TIMEOUT = 2.0
+
+def _probe_endpoints(endpoints, timeout=_PROBE_TIMEOUT):
+    """Orders the endpoints by the time to open a TCP connection, unreachable endpoints last."""
+    def probe(endpoint):
+        host, _, port = endpoint.rpartition(':')
+        start = time.monotonic()
+        try:
+            with socket.create_connection((host, int(port)), timeout=timeout):
+                return time.monotonic() - start
+        except (OSError, ValueError):
+            return float('inf')
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(endpoints))) as executor:
+        latencies = list(executor.map(probe, endpoints))
+    # sorted is stable, endpoints with equal latency keep their order
+    return [e for _, e in sorted(zip(latencies, endpoints), key=lambda x: x[0])]
+
+def _jdbc_url(endpoints, database):
+    # first endpoint is the primary server, the others are alternate servers for client reroute in this order
+    url = 'jdbc:db2://' + endpoints[0] + '/' + database
+    if len(endpoints) > 1:
+        hosts = []
+        ports = []
+        for endpoint in endpoints[1:]:
+            host, _, port = endpoint.rpartition(':')
+            hosts.append(host)
+            ports.append(port)
+        url += ':clientRerouteAlternateServerName=' + ','.join(hosts) + ';clientRerouteAlternatePortNumber=' + ','.join(ports) + ';enableClientAffinitiesList=1;'
+    return url
+
+
+def _connection_properties(name, database=None, connection=None, user=None, password=None, keystore_password=None, truststore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None, probe_endpoints=False):
+    # Prepare operator (toolkit) specific properties for application configuration
+    description = 'Config for Db2 Event Store connection ' + name
+    properties = {}
+    if database is not None:
+        properties['databaseName']=database
+    if connection is not None:
+        properties['connectionString']=connection
+    if user is not None:
+        properties['eventStoreUser']=user
+    if password is not None:
+        properties['eventStorePassword']=password
+    if keystore_password is not None:
+        properties['keyStorePassword']=keystore_password
+    if truststore_password is not None:
+        properties['trustStorePassword']=truststore_password
+    if plugin_name is not None:
+        properties['pluginName']=plugin_name
+    if plugin_flag is not None:
+        properties['pluginFlag']=plugin_flag
+    if ssl_connection is not None:
+        properties['sslConnection']=ssl_connection
+
+    # prepare app config credentials for jdbc toolkit
+    if database is not None and connection is not None and user is not None and password is not None:
+        if ';' in connection:
+            credentials = {}
+            conn = connection.split(";", 1)
+            credentials['username']=user
+            credentials['password']=password
+            endpoints = [e.strip() for e in conn[0].split(",") if e.strip()]
+            if probe_endpoints:
+                endpoints = _probe_endpoints(endpoints)
+            credentials['jdbcurl']=_jdbc_url(endpoints, database)
+            # add for app config
+            properties ['credentials'] = json.dumps (credentials)
+    return description, properties
+
+
+def configure_connection(instance, name='eventstore', database=None, connection=None, user=None, password=None, keystore_password=None, truststore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None, probe_endpoints=False):
     """Configures IBM Streams for a connection to IBM Db2 Event Store database.
 
     Creates an application configuration object containing the required properties with connection information.
@@ -97,49 +292,16 @@ def configure_connection(instance, name='eventstore', database=None, connection=
         plugin_name(str): The plug-in name for the SSL connection.
         plugin_flag(str): Set "false" to disable SSL plugin. If not specified the default is plugin is used.
         ssl_connection(str): Set "false" to disable SSL connection. If not specified the default is SSL enabled.
+        probe_endpoints(bool): Set to ``True`` to measure the connection time to each JDBC endpoint and to order the endpoints fastest first.
 
     Returns:
         Name of the application configuration.
+
+    .. versionchanged:: 2.9 All JDBC endpoints of the ``connection`` are used, the first endpoint as primary server and the others as alternate servers for client reroute. ``probe_endpoints`` parameter added.
     """
 
-    # Prepare operator (toolkit) specific properties for application configuration
-    description = 'Config for Db2 Event Store connection ' + name
-    properties = {}
-    if database is not None:
-        properties['databaseName']=database
-    if connection is not None:
-        properties['connectionString']=connection
-    if user is not None:
-        properties['eventStoreUser']=user
-    if password is not None:
-        properties['eventStorePassword']=password
-    if keystore_password is not None:
-        properties['keyStorePassword']=keystore_password
-    if truststore_password is not None:
-        properties['trustStorePassword']=truststore_password
-    if plugin_name is not None:
-        properties['pluginName']=plugin_name
-    if plugin_flag is not None:
-        properties['pluginFlag']=plugin_flag
-    if ssl_connection is not None:
-        properties['sslConnection']=ssl_connection
+    description, properties = _connection_properties(name, database, connection, user, password, keystore_password, truststore_password, plugin_name, plugin_flag, ssl_connection, probe_endpoints)
 
-    # prepare app config credentials for jdbc toolkit
-    if database is not None and connection is not None and user is not None and password is not None:
-        if ';' in connection:
-            credentials = {}
-            conn = connection.split(";", 1)
-            credentials['username']=user
-            credentials['password']=password
-            if ',' in conn[0]:
-                jdbc_conn = conn[0].split(",", 1)
-                jdbcurl = 'jdbc:db2://' + jdbc_conn[0] + '/' + database
-            else:
-                jdbcurl = 'jdbc:db2://' + conn[0] + '/' + database
-            credentials['jdbcurl']=jdbcurl
-            # add for app config
-            properties ['credentials'] = json.dumps (credentials)
-    
     # check if application configuration exists
     app_config = instance.get_application_configurations(name=name)
     if app_config:
@@ -151,159 +313,109 @@ def configure_connection(instance, name='eventstore', database=None, connection=
     return name
 
 
-def _download_driver_file_from_url(url, tmpfile):
-    r = requests.get(url)
-    with open(tmpfile, 'wb') as fd:
-        for chunk in r.iter_content(chunk_size=128):
-            fd.write(chunk)
-    return tmpfile
-
-def _get_jdbc_driver():
-    jdbc_driver_lib = '/user-home/_global_/eventstore/ibm-event_2.11-1.0.jar'
-    if os.path.isfile(jdbc_driver_lib):
-        return jdbc_driver_lib
-    else:
-        tmpfile = gettempdir() + '/ibm-event_2.11-1.0.jar'
-        if os.path.isfile(tmpfile):
-            return tmpfile
+# keyword arguments of configure_connection accepted in the configs of configure_connections
+_CONNECTION_ARGS = ['name', 'database', 'connection', 'user', 'password', 'keystore_password', 'truststore_password', 'plugin_name', 'plugin_flag', 'ssl_connection', 'probe_endpoints']
+
+def _properties_hash(properties):
+    # application configuration properties are stored as strings
+    values = {str(k): None if v is None else str(v) for k, v in properties.items()}
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class _AppConfigCache(object):
+    """Lists the application configurations of each instance once, shared by the workers of configure_connections."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances = {}
+
+    def _entry(self, instance):
+        with self._lock:
+            key = getattr(instance, 'id', None) or id(instance)
+            if key not in self._instances:
+                self._instances[key] = [threading.Lock(), None]
+            return self._instances[key]
+
+    def get(self, instance, name):
+        entry = self._entry(instance)
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = {cfg.name: cfg for cfg in instance.get_application_configurations()}
+            return entry[1].get(name)
+
+    def put(self, instance, app_config):
+        entry = self._entry(instance)
+        with entry[0]:
+            if entry[1] is not None:
+                entry[1][app_config.name] = app_config
+
+
+def _configure(cache, instance, config):
+    name = config.get('name', 'eventstore')
+    result = {'instance': getattr(instance, 'id', None), 'name': name, 'action': None, 'error': None}
+    try:
+        unknown = set(config) - set(_CONNECTION_ARGS)
+        if unknown:
+            raise ValueError("Invalid connection parameters: " + ', '.join(sorted(unknown)))
+        args = dict(config)
+        args['name'] = name
+        description, properties = _connection_properties(**args)
+        app_config = cache.get(instance, name)
+        if app_config is None:
+            cache.put(instance, instance.create_application_configuration(name, properties, description))
+            result['action'] = 'created'
         else:
-            _download_driver_file_from_url("https://github.com/IBMStreams/streamsx.eventstore/raw/develop/com.ibm.streamsx.eventstore/opt/ibm-event_2.11-1.0.jar", tmpfile)
-            if os.path.isfile(tmpfile):
-                return tmpfile
+            current = {k: app_config.properties.get(k) for k in properties} if app_config.properties else {}
+            if _properties_hash(current) == _properties_hash(properties):
+                result['action'] = 'unchanged'
             else:
-                raise ValueError("Invalid JDBC driver")
-
-
-class SQLStatement(db.JDBCStatement):
-    """Runs a SQL statement using Db2 Event Store client driver and JDBC database interface.
-
-    The statement is called once for each input tuple received. Result sets that are produced by the statement are emitted as output stream tuples.
-    
-    This class bases :py:class:`db_ref:streamsx.database.JDBCStatement`, includes the JDBC driver ('ibm-event_2.11-1.0.jar') and sets defaults for Db2 Event Store database:
-
-    * jdbc_driver_class = 'COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'
-    * ssl_connection = True
-    * keystore_type = 'PKCS12'
-    * truststore_type = 'PKCS12'
-    * plugin_name = 'IBMIAMauth'
-    * security_mechanism = 15
-
-    Example with "select count" statement and defined output schema with attribute ``TOTAL`` having the result of the query::
-
-        import streamsx.eventstore as es
-
-        sample_schema = StreamSchema('tuple<int32 TOTAL, rstring string>')
-        sql_query = 'SELECT COUNT(*) AS TOTAL FROM SAMPLE.TAB1'
-        query = topo.source([sql_query]).as_string()
-        res = s.map(es.SQLStatement(credentials='eventstore'), schema=sample_schema)
-        res.print()
+                app_config.update(properties)
+                result['action'] = 'updated'
+    except Exception as e:
+        result['action'] = 'failed'
+        result['error'] = e
+    return result
 
-    Args:
-        credentials(dict|str): The credentials of the IBM cloud Db2 warehouse service in JSON or the name of the application configuration.
-        options (kwargs): The additional optional parameters as variable keyword arguments.
-
-    Returns:
-        :py:class:`topology_ref:streamsx.topology.topology.Stream`: Result stream.
-
-    .. note:: This function requires an outgoing Internet connection to download the driver if jdbc_driver_lib is not specified
-    .. versionadded:: 2.7
-    """
-    def __init__(self, credentials, **options):
-        jdbc_driver_lib = _get_jdbc_driver()  
-        print ('jdbc_driver_lib: '+jdbc_driver_lib)
-
-        super(SQLStatement, self).__init__(credentials, **options)
-        self.jdbc_driver_lib = jdbc_driver_lib
-        self.jdbc_driver_class='COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'
-        self.ssl_connection=True
-        self.keystore_type='PKCS12'
-        self.truststore_type='PKCS12'
-        self.plugin_name='IBMIAMauth'
-        self.security_mechanism=15
 
+def configure_connections(instances, configs, max_workers=None):
+    """Configures several IBM Streams instances for connections to IBM Db2 Event Store databases.
 
-def run_statement(stream, credentials, truststore, keystore, truststore_password=None, keystore_password=None, schema=None, sql=None, sql_attribute=None, sql_params=None, transaction_size=1, jdbc_driver_class='COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver', jdbc_driver_lib=None, ssl_connection=True, keystore_type='PKCS12', truststore_type='PKCS12', plugin_name='IBMIAMauth', security_mechanism=15, vm_arg=None, name=None):
-    """Runs a SQL statement using Db2 Event Store client driver and JDBC database interface.
+    Creates or updates an application configuration for each combination of instance and connection configuration, like :py:func:`~configure_connection`.
+    The targets are configured concurrently. The application configurations of each instance are listed once,
+    and application configurations whose properties are unchanged are not updated.
 
-    The statement is called once for each input tuple received. Result sets that are produced by the statement are emitted as output stream tuples.
-    
-    This function includes the JDBC driver ('ibm-event_2.11-1.0.jar') for Db2 Event Store database ('COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver') in the application bundle per default.
-
-    Supports two ways to specify the statement:
-
-    * Statement is part of the input stream. You can specify which input stream attribute contains the statement with the ``sql_attribute`` argument. If input stream is of type ``CommonSchema.String``, then you don't need to specify the ``sql_attribute`` argument.
-    * Statement is given with the ``sql`` argument. The statement can contain parameter markers that are set with input stream attributes specified by ``sql_params`` argument.
-
-    Example with "select count" statement and defined output schema with attribute ``TOTAL`` having the result of the query::
+    Example for rolling the credentials of two databases on all instances::
 
         import streamsx.eventstore as es
 
-        sample_schema = StreamSchema('tuple<int32 TOTAL, rstring string>')
-        sql_query = 'SELECT COUNT(*) AS TOTAL FROM SAMPLE.TAB1'
-        query = topo.source([sql_query]).as_string()
-        res = es.run_statement(query, credentials=credentials, schema=sample_schema)
-    
+        configs = [
+            dict(name='eventstore_a', database='DBA', connection='HostA:Port1;HostA:Port2', user='db2-user', password=new_password),
+            dict(name='eventstore_b', database='DBB', connection='HostB:Port1;HostB:Port2', user='db2-user', password=new_password)]
+        for result in es.configure_connections(instances, configs, max_workers=16):
+            if result['action'] == 'failed':
+                print(result['instance'], result['name'], result['error'])
 
     Args:
-        stream(streamsx.topology.topology.Stream): Stream of tuples containing the SQL statements or SQL statement parameter values. Supports :py:class:`topology_ref:streamsx.topology.schema.StreamSchema` (schema for a structured stream) or ``CommonSchema.String`` as input.
-        credentials(dict|str): The credentials of the IBM cloud Db2 warehouse service in JSON or the name of the application configuration.
-        truststore(str): Path to the trust store file for the SSL connection.
-        keystore(str): Path to the key store file for the SSL connection.
-        truststore_password(str): Password for the trust store file given by the truststore parameter.
-        keystore_password(str): Password for the key store file given by the keystore parameter.
-        schema(StreamSchema): Schema for returned stream. Defaults to input stream schema if not set.             
-        sql(str): String containing the SQL statement. Use this as alternative option to ``sql_attribute`` parameter.
-        sql_attribute(str): Name of the input stream attribute containing the SQL statement. Use this as alternative option to ``sql`` parameter.
-        sql_params(str): The values of SQL statement parameters. These values and SQL statement parameter markers are associated in lexicographic order. For example, the first parameter marker in the SQL statement is associated with the first sql_params value.
-        transaction_size(int): The number of tuples to commit per transaction. The default value is 1.
-        jdbc_driver_class(str): The default driver is for Db2 Event Store database 'COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'.
-        jdbc_driver_lib(str): Path to the JDBC driver library file. Specify the jar filename with absolute path, containing the class given with ``jdbc_driver_class`` parameter. Per default the 'ibm-event_2.11-1.0.jar' is added to the 'opt' directory in the application bundle.
-        ssl_connection(bool): Use SSL connection, default is ``True``
-        keystore_type(str): Type of the key store file, default is ``PKCS12``.
-        truststore_type(str): Type of the key store file, default is ``PKCS12``.
-        plugin_name(str): Name of the security plugin, default is 'IBMIAMauth'.
-        security_mechanism(int): Value of the security mechanism, default is 15 (com.ibm.db2.jcc.DB2BaseDataSource.PLUGIN_SECURITY).
-        vm_arg(str): Arbitrary JVM arguments can be passed to the Streams operator.
-        name(str): Sink name in the Streams context, defaults to a generated name.
+        instances(list): IBM Streams instance objects (:py:class:`streamsx.rest_primitives.Instance`).
+        configs(list): Connection configurations, each a dict with keyword arguments of :py:func:`~configure_connection` except ``instance``.
+        max_workers(int): Maximum number of concurrent requests. If not specified, the default of :py:class:`concurrent.futures.ThreadPoolExecutor` is used.
 
     Returns:
-        :py:class:`topology_ref:streamsx.topology.topology.Stream`: Result stream.
+        list: One dict per instance and configuration, in the order of ``instances`` and ``configs``, with the keys ``instance`` (instance id), ``name`` (application configuration name),
+        ``action`` (``'created'``, ``'updated'``, ``'unchanged'`` or ``'failed'``) and ``error`` (the exception if the configuration failed, else ``None``).
 
-    .. note:: This function requires an outgoing Internet connection to download the driver if jdbc_driver_lib is not specified
-    .. versionadded:: 2.4
-    .. deprecated:: 2.7.0
-        Use the :py:class:`~SQLStatement`.
+    .. versionadded:: 2.9
     """
-    
-    jdbc_driver_lib = _get_jdbc_driver()  
-    print ('jdbc_driver_lib: '+jdbc_driver_lib)
-
-    return db.run_statement(stream,
-                            credentials,
-                            schema=schema,
-                            sql=sql,
-                            sql_attribute=sql_attribute,
-                            sql_params=sql_params,
-                            transaction_size=transaction_size,
-                            jdbc_driver_class=jdbc_driver_class,
-                            jdbc_driver_lib=jdbc_driver_lib,
-                            ssl_connection=ssl_connection,
-                            truststore=truststore,
-                            truststore_password=truststore_password,
-                            keystore=keystore,
-                            keystore_password=keystore_password,
-                            keystore_type=keystore_type,
-                            truststore_type=truststore_type,
-                            plugin_name=plugin_name,
-                            security_mechanism=security_mechanism,
-                            vm_arg=vm_arg,
-                            name=name)
+    cache = _AppConfigCache()
+    targets = [(instance, config) for instance in instances for config in configs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda target: _configure(cache, *target), targets))
 
 
 class Insert(streamsx.topology.composite.ForEach):
     """Inserts tuple into a table using Db2 Event Store Scala API.
 
     Important: The tuple field types and positions in the IBM Streams schema must match the field names in your IBM Db2 Event Store table schema exactly.
+    Use :py:func:`~to_table_schema` to convert dicts, for example of a JSON stream, into tuples with the schema of the table.
 
     Creates the table if the table does not exist. Set the ``primary_key`` and ``partitioning_key`` in case the table needs to be created.
 
@@ -319,6 +431,15 @@ class Insert(streamsx.topology.composite.ForEach):
         # insert tuple data into table as rows
         s.for_each(es.Insert(config='eventstore', table='SampleTable', schema_name='sample', primary_key='id', partitioning_key='id'))
 
+    Example of inserting with four parallel channels. Tuples are partitioned by the ``partitioning_key`` attributes, so that all rows with the same key are inserted by the same channel::
+
+        s.for_each(es.Insert(config='eventstore', table='SampleTable', schema_name='sample', primary_key='id', partitioning_key='id', parallel_width=4))
+
+    Batch acknowledgements, ``metrics``, ``adaptive_batching`` and the results of a local ``backend`` are computed by Python stages
+    that share the recorded batches or results with the sink in process memory. The insert colocates these stages with the sink,
+    so that they are fused into one PE. Do not separate them with further placements, for example by isolating or colocating the operators of the insert yourself.
+    A stage summarizing the results raises a ``RuntimeError`` when results arrive, but no rows were recorded in its PE.
+
     Args:
         table(str): The name of the table into which you want to insert rows.
         schema_name(str): The name of the table schema name of the table into which to insert data.
@@ -327,7 +448,7 @@ class Insert(streamsx.topology.composite.ForEach):
         user(str): Name of the IBM Db2 Event Store User in order to connect. Alternative this parameter can be set with function :py:meth:`~streamsx.eventstore.configure_connection`.
         password(str): Password for the IBM Db2 Event Store User in order to connect. Alternative this parameter can be set with function :py:meth:`~streamsx.eventstore.configure_connection`.
         config(str): The name of the application configuration. Value returned by the function :py:meth:`~streamsx.eventstore.configure_connection`.
-        batch_size(int): The number of rows that will be batched in the operator before the batch is inserted into IBM Db2 Event Store by using the batchInsertAsync method. If you do not specify this parameter, the batchSize defaults to the estimated number of rows that could fit into an 8K memory page.
+        batch_size(int|str): The number of rows that will be batched in the operator before the batch is inserted into IBM Db2 Event Store by using the batchInsertAsync method. If you do not specify this parameter, the batchSize defaults to the estimated number of rows that could fit into an 8K memory page. Set to ``'auto'`` to compute the batch size from the input stream schema, ``target_rows_per_sec`` and ``batching_samples`` with :py:func:`~recommend_batching`, which also sets ``max_num_active_batches`` if not specified. Without ``target_rows_per_sec`` and ``batching_samples`` the recommendation is a static default for the schema with a single active batch.
         front_end_connection_flag(bool): Set to ``True`` to connect through a Secure Gateway (for Event Store Enterprise Edition version >= 1.1.2 and Developer Edition version > 1.1.4)
         max_num_active_batches(int): The number of batches that can be filled and inserted asynchronously. The default is 1.        
         partitioning_key(str): Partitioning key for the table. A string of attribute names separated by commas. The partitioning_key parameter is used only, if the table does not yet exist in the IBM Db2 Event Store database.
@@ -339,14 +460,37 @@ class Insert(streamsx.topology.composite.ForEach):
         plugin_name(str): The plug-in name for the SSL connection. The default value is IBMIAMauth.      
         plugin_flag(str|bool): Set "false" or ``False`` to disable SSL plugin. If not specified, the default is use plugin.
         ssl_connection(str|bool): Set "false" or ``False`` to disable SSL connection. If not specified the default is SSL enabled.
+        parallel_width(int): Number of parallel channels inserting into the table. Each channel has its own connection to IBM Db2 Event Store and its own batches. If not specified, a single operator inserts all rows.
+        parallel_hash_attributes(str|list): Attribute names used to partition the tuples across the parallel channels, either a list or a string of attribute names separated by commas. Tuples with the same values are always inserted by the same channel. Defaults to the attributes of the ``partitioning_key``. If neither is set, tuples are distributed round-robin. Ignored if ``parallel_width`` is not set.
+        batch_timeout(float|datetime.timedelta): Maximum time in seconds a row waits in a partially filled batch. When the oldest row of a batch is older than the timeout, the batch is inserted even if it has less than ``batch_size`` rows. Full batches are still inserted as soon as they are filled. If not specified, a batch is inserted only when it is full.
+        backend(str|LocalEventStore): Set to ``'local'`` or to a :py:class:`~LocalEventStore` instance to insert into the in-process stand-in instead of IBM Db2 Event Store, for example to measure the throughput of the application without a database. The connection parameters are ignored in this case. The default is ``'eventstore'``.
+        ordering(str): Set to ``'strict'`` to insert the rows in the order of the tuples, or to ``'relaxed'`` to allow batches to complete out of order, which gives a higher throughput with ``max_num_active_batches`` greater than 1. Use ``'relaxed'`` for tables where the insert order is not relevant, for example append-only event tables. If not specified, the default of the operator is used.
+        vm_arg(str|list): Arbitrary JVM arguments for the operator, for example garbage collection options like ``'-XX:+UseG1GC'``.
+        heap_size(int|str): Maximum JVM heap size of the operator in megabytes. Set to ``'auto'`` to size the heap from the input stream schema, ``batch_size`` and ``max_num_active_batches`` with :py:func:`~recommend_heap_size`.
+        dedup(bool|str): Set to ``True`` or ``'lru'`` to drop tuples with a ``primary_key`` value already inserted within ``dedup_window``, holding up to ``dedup_capacity`` keys exactly and forgetting the least recently seen keys first. A duplicate refreshes its key, so that in this mode the window is measured from the last occurrence of a key. Set to ``'bloom'`` to hold the keys in two Bloom filters of fixed size instead, which needs about 10 bits per key, but drops about 1% of the unique tuples as false positives when the filters are full. Requires ``primary_key``. The filter runs in a single Python operator in front of the parallel channels and provides the metrics ``nDuplicates``, ``nEvictedKeys`` (keys forgotten before the end of the window) and ``falsePositiveRatePpm`` (estimated false positive rate in parts per million).
+        dedup_window(float|datetime.timedelta): Time in seconds a key is remembered for the deduplication. If not specified, keys are only forgotten when ``dedup_capacity`` is exceeded.
+        dedup_capacity(int): Maximum number of keys held for the deduplication. The default is 1000000.
+        metrics(bool): Set to ``True`` to register insert metrics: a Python stage in front of the sink provides ``nRowsSubmitted``, a Python stage fused with the sink derives the batches from the per row results of the sink and provides ``rowsPerSecond``, ``nBatches``, ``batchesPerSecond``, ``batchLatencyP50Ms``, ``batchLatencyP99Ms``, ``batchFillPercent``, ``insertQueueDepth``, ``inFlightBatches`` and ``nActiveBatchesLimitHits``. The gauges cover intervals of 10 seconds and are published on heartbeat ticks also while no rows arrive. If ``batch_size`` is not set, the sink is invoked with the estimated number of rows fitting into an 8K memory page, so that the batches can be counted. The results of the sink carry no batch id, the batches are derived from the order of the results, therefore the latency gauges are not provided with ``ordering='relaxed'`` or ``max_num_active_batches`` greater than 1. The metrics are not free: the sink submits a result tuple per row, which passes a map, a union with heartbeat ticks and the metrics stage, next to a stage per row in front of the sink. Use :py:func:`~insert_metrics` to summarize the metrics of a running job.
+        adaptive_batching(bool): Set to ``True`` to adjust the batch size to the observed insert latency. The sink is invoked with ``max_batch`` as batch size and a Python stage in front of the sink cuts the batches at the current setpoint. A Python stage fused with the sink measures the latency of each batch from the per row results of the sink. The batches are derived from the order of the results, ``ordering='relaxed'`` and ``max_num_active_batches`` greater than 1 are not supported. The setpoint grows by half of ``min_batch`` for each full batch inserted within ``target_latency_ms`` and is halved for each batch that took longer or had failed rows. The setpoint starts at ``batch_size``, if set, otherwise at ``min_batch``, and is provided as the metric ``batchSizeSetpoint``. With ``batch_timeout`` the same stage also cuts the batch when its oldest row is older than the timeout, so that every batch inserted on a punctuation is counted by the adaptive batching.
+        min_batch(int): Smallest batch size of the adaptive batching. The default is 100.
+        max_batch(int): Largest batch size of the adaptive batching. The default is 10000.
+        target_latency_ms(int): Target latency of a batch insert in milliseconds for the adaptive batching, from the arrival of the first row of the batch until the batch insert completed. The default is 1000.
+        isolate(bool): Set to ``True`` to run the insert in a separate processing element from the upstream processing, so that the JVM of the sink does not stall CPU intensive upstream stages when batches are flushed.
+        colocate_with(streamsx.topology.topology.Stream|streamsx.topology.topology.Sink|list): Processing logic to run in the same processing element as the sink.
+        resource_tags(str|list): Resource tags of the hosts where the sink runs, for example hosts with dedicated cores for the ingest.
+        queue_size(int): Size of the queue of a threaded input port of the sink. The tuples are queued and inserted by a separate thread, decoupling the sink from the upstream operators in the same processing element. The default is 1000 if only ``congestion_policy`` is set. Not applied with a local ``backend``. The threaded port is declared through the ``queue`` configuration of the operator, which is translated by the SPL generator of the topology toolkit of streamsx 1.14.6 or later.
+        congestion_policy(str): Behavior of the threaded input port when the queue is full: ``'wait'`` blocks the upstream operators, ``'drop_first'`` drops the oldest and ``'drop_last'`` the newest tuple. The default is ``'wait'`` if only ``queue_size`` is set.
+        target_rows_per_sec(int): Expected number of rows inserted per second, used with ``batch_size='auto'`` to recommend ``max_num_active_batches``.
+        batching_samples(list): Sample tuples of the input stream, either as tuples or as dicts, used with ``batch_size='auto'`` to measure the average size of variable width attributes.
 
     Returns:
         streamsx.topology.topology.Sink: Stream termination
 
     .. versionadded:: 2.8
+    .. versionchanged:: 2.9 ``parallel_width``, ``parallel_hash_attributes``, ``batch_timeout``, ``backend``, ``ordering``, ``vm_arg``, ``heap_size``, ``dedup``, ``dedup_window``, ``dedup_capacity``, ``metrics``, ``adaptive_batching``, ``min_batch``, ``max_batch``, ``target_latency_ms``, ``isolate``, ``colocate_with``, ``resource_tags``, ``queue_size``, ``congestion_policy``, ``target_rows_per_sec`` and ``batching_samples`` parameters added, ``batch_size`` supports ``'auto'``.
     """
 
-    def __init__(self, table, schema_name=None, database=None, connection=None, user=None, password=None, config=None, batch_size=None, front_end_connection_flag=None, max_num_active_batches=None, partitioning_key=None, primary_key=None, truststore=None, truststore_password=None, keystore=None, keystore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None):
+    def __init__(self, table, schema_name=None, database=None, connection=None, user=None, password=None, config=None, batch_size=None, front_end_connection_flag=None, max_num_active_batches=None, partitioning_key=None, primary_key=None, truststore=None, truststore_password=None, keystore=None, keystore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None, parallel_width=None, parallel_hash_attributes=None, batch_timeout=None, backend=None, ordering=None, vm_arg=None, heap_size=None, dedup=False, dedup_window=None, dedup_capacity=None, metrics=False, adaptive_batching=False, min_batch=None, max_batch=None, target_latency_ms=None, isolate=False, colocate_with=None, resource_tags=None, queue_size=None, congestion_policy=None, target_rows_per_sec=None, batching_samples=None):
         self.table = table
         self.schema_name = schema_name
         self.database = database
@@ -366,26 +510,209 @@ class Insert(streamsx.topology.composite.ForEach):
         self.plugin_name = plugin_name
         self.plugin_flag = plugin_flag
         self.ssl_connection = ssl_connection
+        self.parallel_width = parallel_width
+        self.parallel_hash_attributes = parallel_hash_attributes
+        self.batch_timeout = batch_timeout
+        self.backend = backend
+        self.ordering = ordering
+        self.vm_arg = vm_arg
+        self.heap_size = heap_size
+        self.dedup = dedup
+        self.dedup_window = dedup_window
+        self.dedup_capacity = dedup_capacity
+        self.metrics = metrics
+        self.adaptive_batching = adaptive_batching
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_latency_ms = target_latency_ms
+        self.isolate = isolate
+        self.colocate_with = colocate_with
+        self.resource_tags = resource_tags
+        self.queue_size = queue_size
+        self.congestion_policy = congestion_policy
+        self.target_rows_per_sec = target_rows_per_sec
+        self.batching_samples = batching_samples
 
     def populate(self, topology, stream, name, **options) -> streamsx.topology.topology.Sink:
-
-        if self.config is None and self.connection is None:
-            raise ValueError("Either config parameter or connection must be set.")
-        if self.config is None and self.database is None:
-            raise ValueError("Either config parameter or database must be set.")
-
-        # python wrapper eventstore toolkit dependency
-        _add_toolkit_dependency(topology)
-
-        _op = _EventStoreSink(stream, schema=None, connectionString=self.connection, databaseName=self.database, tableName=self.table, schemaName=self.schema_name, partitioningKey=self.partitioning_key, primaryKey=self.primary_key, name=name)
+        return self._insert(topology, stream, None, name)
+
+    def _insert(self, topology, stream, schema, name, acknowledgement=None):
+        batch_acks = self._acknowledgement(schema, acknowledgement)
+        local_store = self._backend(topology)
+        queue = self._queue()
+        if self.isolate:
+            stream = stream.isolate()
+        if self.dedup:
+            stream = self._deduplicate(stream)
+        if self.parallel_width is not None or self.batch_timeout is not None or batch_acks or self.metrics or self.adaptive_batching or self.isolate:
+            # parallel region, isolation and union markers can not be part of a composite group
+            self.group = False
+
+        batches = self._batches(stream, batch_acks, local_store)
+        stream = self._batching(topology, stream, batches)
+        observe = self.metrics or batches.adaptive is not None
+        result_schema = schema
+        if observe and schema is None:
+            # the batches are derived from the per row results of the sink
+            result_schema = stream.oport.schema.extend(StreamSchema('tuple<boolean _Inserted_>'))
+        if batch_acks or observe:
+            stream = self._record(topology, stream, batches, local_store)
+
+        if local_store is not None:
+            placed, result = self._local_sink(topology, stream, result_schema, name, batches, local_store)
+            sink = placed
+        else:
+            placed, result = self._sink(topology, stream, result_schema, name, batches, queue)
+            sink = streamsx.topology.topology.Sink(placed)
+        if result is None:
+            return sink
+        if batch_acks:
+            return self._batch_acknowledgements(topology, batches, placed, result, schema)
+        if observe:
+            self._observe(topology, batches, placed, result, result_schema)
+        if schema is None:
+            return sink
+        if self.parallel_width is not None:
+            result = result.end_parallel()
+        return result
+
+    def _acknowledgement(self, schema, acknowledgement):
+        if self.ordering not in (None, 'strict', 'relaxed'):
+            raise ValueError("Invalid ordering " + str(self.ordering) + ", 'strict' or 'relaxed' required.")
+        if acknowledgement not in (None, 'row', 'batch'):
+            raise ValueError("Invalid acknowledgement " + str(acknowledgement) + ", 'row' or 'batch' required.")
+        batch_acks = acknowledgement == 'batch'
+        if batch_acks and schema is None:
+            raise ValueError("The schema parameter is required for batch acknowledgements.")
+        return batch_acks
+
+    def _backend(self, topology):
+        local_store = self._local_store()
+        if local_store is None:
+            if self.config is None and self.connection is None:
+                raise ValueError("Either config parameter or connection must be set.")
+            if self.config is None and self.database is None:
+                raise ValueError("Either config parameter or database must be set.")
+
+            # python wrapper eventstore toolkit dependency
+            _add_toolkit_dependency(topology)
+        return local_store
+
+    def _batches(self, stream, batch_acks, local_store):
+        batch_size = self.batch_size
+        max_num_active_batches = self.max_num_active_batches
+        if batch_size == 'auto':
+            batching = recommend_batching(stream.oport.schema, target_rows_per_sec=self.target_rows_per_sec, samples=self.batching_samples)
+            batch_size = batching['batch_size']
+            if max_num_active_batches is None and not (batch_acks or self.adaptive_batching):
+                max_num_active_batches = batching['max_num_active_batches']
+        adaptive = None
+        if self.adaptive_batching:
+            adaptive = self._adaptive_controller(batch_size)
+            # the sink inserts batches of the maximum size, smaller batches are cut by punctuations
+            batch_size = adaptive.max_batch
+        if local_store is not None and local_store.max_num_active_batches is not None:
+            # a configured stand-in inserts with its own number of active batches
+            max_num_active_batches = local_store.max_num_active_batches
+        # the results of the sink carry no batch id, the batches are derived from the order of the results,
+        # which is the order of the batches only if they are inserted one at a time and in order
+        if (batch_acks or adaptive is not None) and not self._in_order(max_num_active_batches):
+            raise ValueError("Invalid ordering " + str(self.ordering) + " and max_num_active_batches " + str(max_num_active_batches) + " for batch acknowledgements and adaptive batching, strict ordering and a single active batch required.")
+        return _Batches(batch_size, max_num_active_batches, adaptive)
+
+    def _batching(self, topology, stream, batches):
+        if self.batch_timeout is not None and batches.adaptive is None:
+            # with parallel channels the batches are not tracked, a punctuation flushes the batches of all channels
+            batch_size = batches.batch_size if self.parallel_width is None else None
+            stream = _flush_on_timeout(topology, stream, batch_size, self.batch_timeout)
+        if self.parallel_width is not None:
+            stream = _parallel_region(stream, self.parallel_width, self.parallel_hash_attributes, self.partitioning_key)
+        return stream
+
+    def _record(self, topology, stream, batches, local_store):
+        # the stages recording the batches share state with the sink, they are fused with the sink
+        if local_store is not None and local_store.batch_size is not None:
+            # a configured stand-in inserts batches of its own size
+            batches.batch_size = local_store.batch_size
+        if batches.batch_size is None:
+            # the batches are counted, the sink is invoked with the batch size it would estimate
+            batches.batch_size = _default_batch_size(_row_width(stream.oport.schema))
+        batches.insert_id = uuid.uuid4().hex
+        adaptive = batches.adaptive
+        if adaptive is not None:
+            if self.batch_timeout is None:
+                stream = stream.punctor(_adaptive._AdaptiveFlush(batches.insert_id, adaptive), before=False)
+                batches.stages.append(stream)
+            else:
+                # the deadline is checked by the adaptive flush, so that it counts every batch cut by a punctuation
+                timeout = _timeout(self.batch_timeout)
+                ticks = _heartbeat(topology, timeout / 4.0, self.parallel_width)
+                rows_schema = stream.oport.schema
+                flushed = stream.map().union({ticks}).punctor(_adaptive._AdaptiveFlush(batches.insert_id, adaptive, timeout), before=False)
+                stream = flushed.filter(_batching._is_row).map(schema=rows_schema)
+                batches.stages.extend([flushed, stream])
+                if self.parallel_width is None:
+                    batches.stages.append(ticks)
+        # consumes the rows and punctuations of the sink to record the batches of the sink
+        submit = _metrics._Submitted(batches.insert_id, batches.batch_size) if self.metrics else _acks._Submitted(batches.insert_id, batches.batch_size)
+        batches.stages.append(stream.for_each(submit, process_punct=True))
+        return stream
+
+    def _local_sink(self, topology, stream, result_schema, name, batches, local_store):
+        if local_store.batch_size is None:
+            local_store.batch_size = batches.batch_size
+        if local_store.max_num_active_batches is None:
+            local_store.max_num_active_batches = batches.max_num_active_batches
+        if result_schema is not None:
+            local_store._result_id = uuid.uuid4().hex
+        # the stand-in inserts partially filled batches on window punctuations like the sink
+        store = self._place(stream.for_each(local_store, name=name, process_punct=True))
+        if result_schema is None:
+            return store, None
+        names = [attr for _, attr in _schema_types(stream.oport.schema)]
+        # the results of completed batch inserts are submitted on heartbeat ticks, also after the last batch,
+        # by a stage sharing the results with the stand-in, fused with the stand-in
+        ticks = _heartbeat(topology, _local._RESULT_PERIOD, self.parallel_width)
+        inserted = ticks.flat_map(_local._LocalResults(local_store._result_id, names))
+        store.colocate(inserted)
+        if self.parallel_width is None:
+            ticks.colocate(inserted)
+        return store, inserted.map(schema=result_schema)
+
+    def _sink(self, topology, stream, result_schema, name, batches, queue):
+        if queue is not None:
+            stream = stream.aliased_as(_QUEUE_PORT)
+        _op = _EventStoreSink(stream, schema=result_schema, connectionString=self.connection, databaseName=self.database, tableName=self.table, schemaName=self.schema_name, partitioningKey=self.partitioning_key, primaryKey=self.primary_key, name=name)
+        if self.ordering is not None:
+            if self.ordering == 'strict':
+                _op.params['preserveOrder'] = _op.expression('true')
+            else:
+                _op.params['preserveOrder'] = _op.expression('false')
+        heap_size = self.heap_size
+        if heap_size == 'auto':
+            heap_size = recommend_heap_size(_row_width(stream.oport.schema), batches.batch_size, batches.max_num_active_batches)
+        vm_args = _vm_args(self.vm_arg, heap_size)
+        if vm_args:
+            _op.params['vmArg'] = vm_args
+        if batches.batch_size is not None:
+            _op.params['batchSize'] = streamsx.spl.types.int32(batches.batch_size)
+        if batches.max_num_active_batches is not None:
+            _op.params['maxNumActiveBatches'] = streamsx.spl.types.int32(batches.max_num_active_batches)
+        self._connection_params(topology, _op)
+
+        self._place(_op)
+        if queue is not None:
+            # streamsx provides no Python API for a threaded port, the SPL generator of the topology toolkit
+            # declares the threadedPort of the operator from its queue configuration, as for the Java API
+            _op._op().config['queue'] = dict(queue, inputPortName=_QUEUE_PORT)
+        if result_schema is None:
+            return _op, None
+        return _op, _op.outputs[0]
+
+    def _connection_params(self, topology, _op):
         if self.front_end_connection_flag is not None:
             if self.front_end_connection_flag is True:
                 _op.params['frontEndConnectionFlag'] = _op.expression('true')
-        if self.batch_size is not None:
-            _op.params['batchSize'] = streamsx.spl.types.int32(self.batch_size)
-        if self.max_num_active_batches is not None:
-            _op.params['maxNumActiveBatches'] = streamsx.spl.types.int32(self.max_num_active_batches)
-          
         if self.keystore is not None:
             _op.params['keyStore'] = _add_store_file(topology, self.keystore)
         if self.keystore_password is not None:
@@ -429,10 +756,356 @@ class Insert(streamsx.topology.composite.ForEach):
             if self.password is not None:
                 _op.params['eventStorePassword'] = self.password
 
-        return streamsx.topology.topology.Sink(_op)
+    def _in_order(self, max_num_active_batches):
+        return self.ordering != 'relaxed' and (max_num_active_batches is None or max_num_active_batches <= 1)
+
+    def _summarize(self, topology, batches, result, schema, process):
+        # the per row results are summarized in the PE of the sink and are not transported to other PEs
+        names = [attr for _, attr in _schema_types(schema)]
+        key = self.primary_key if self.primary_key is not None else self.partitioning_key
+        key_names = _attribute_names(key) if key is not None else []
+        if self.metrics:
+            summarize = _metrics._BatchMetrics(batches.insert_id, names, key_names, batches.batch_size, batches.max_num_active_batches, adaptive=batches.adaptive, latency=self._in_order(batches.max_num_active_batches))
+        else:
+            summarize = _acks._BatchAcknowledgement(batches.insert_id, names, key_names, batches.batch_size, adaptive=batches.adaptive)
+        # ticks complete the last batch when no further results follow, in each channel of a parallel region
+        ticks = _heartbeat(topology, _acks._TICK_PERIOD, self.parallel_width)
+        acks = process(result.map().union({ticks}), summarize)
+        if self.parallel_width is None:
+            ticks.colocate(acks)
+        return acks
+
+    def _observe(self, topology, batches, sink, result, schema):
+        observed = self._summarize(topology, batches, result, schema, lambda s, f: s.for_each(f))
+        # the stages share the recorded batches with the summary in process memory
+        sink.colocate(batches.stages + [observed])
+        return observed
+
+    def _batch_acknowledgements(self, topology, batches, sink, result, schema):
+        acks = self._summarize(topology, batches, result, schema, lambda s, f: s.flat_map(f))
+        # the stages share the recorded batches with the summary in process memory
+        sink.colocate(batches.stages + [acks])
+        summaries, failed = acks.split(2, _acks._route, names=['summary', 'failed'])
+        summaries = summaries.map(_acks._payload, schema=_acks.BatchSummarySchema)
+        failed = failed.map(_acks._payload, schema=schema)
+        if self.parallel_width is not None:
+            summaries = summaries.end_parallel()
+            failed = failed.end_parallel()
+        return summaries, failed
+
+    def _deduplicate(self, stream):
+        mode = 'lru' if self.dedup is True else self.dedup
+        if mode not in _dedup._MODES:
+            raise ValueError("Invalid dedup " + str(self.dedup) + ", True, 'lru' or 'bloom' required.")
+        if self.primary_key is None:
+            raise ValueError("The primary_key parameter is required for dedup.")
+        capacity = self.dedup_capacity if self.dedup_capacity is not None else _dedup._DEFAULT_CAPACITY
+        if capacity <= 0:
+            raise ValueError("Invalid dedup_capacity " + str(capacity) + ", positive value required.")
+        window = _seconds(self.dedup_window) if self.dedup_window is not None else None
+        if window is not None and window <= 0:
+            raise ValueError("Invalid dedup_window " + str(self.dedup_window) + ", positive value required.")
+        names = [attr for _, attr in _schema_types(stream.oport.schema)]
+        key_names = _attribute_names(self.primary_key)
+        for key in key_names:
+            if key not in names:
+                raise ValueError("Primary key attribute " + key + " not in the input stream schema.")
+        return stream.filter(_dedup._Dedup(names, key_names, mode, window, capacity))
+
+    def _adaptive_controller(self, batch_size):
+        min_batch = self.min_batch if self.min_batch is not None else _adaptive._DEFAULT_MIN_BATCH
+        max_batch = self.max_batch if self.max_batch is not None else max(_adaptive._DEFAULT_MAX_BATCH, min_batch)
+        target_latency_ms = self.target_latency_ms if self.target_latency_ms is not None else _adaptive._DEFAULT_TARGET_LATENCY_MS
+        if min_batch <= 0 or max_batch < min_batch:
+            raise ValueError("Invalid adaptive batch range [" + str(min_batch) + ", " + str(max_batch) + "], 0 < min_batch <= max_batch required.")
+        if target_latency_ms <= 0:
+            raise ValueError("Invalid target_latency_ms " + str(target_latency_ms) + ", positive value required.")
+        return _adaptive._Controller(int(min_batch), int(max_batch), target_latency_ms / 1000.0, batch_size)
+
+    def _queue(self):
+        if self.queue_size is None and self.congestion_policy is None:
+            return None
+        queue_size = self.queue_size if self.queue_size is not None else _DEFAULT_QUEUE_SIZE
+        if queue_size <= 0:
+            raise ValueError("Invalid queue_size " + str(self.queue_size) + ", positive value required.")
+        policy = self.congestion_policy if self.congestion_policy is not None else 'wait'
+        if policy not in _CONGESTION_POLICIES:
+            raise ValueError("Invalid congestion_policy " + str(policy) + ", 'wait', 'drop_first' or 'drop_last' required.")
+        return {'congestionPolicy': _CONGESTION_POLICIES[policy], 'queueSize': str(int(queue_size))}
+
+    def _place(self, sink):
+        if self.colocate_with is not None:
+            sink.colocate(self.colocate_with)
+        if self.resource_tags is not None:
+            tags = [self.resource_tags] if isinstance(self.resource_tags, str) else self.resource_tags
+            sink.resource_tags.update(tags)
+        # the sink or stand-in of the insert, colocated with the other table sinks of a RoutedInsert
+        self._placed = sink
+        return sink
+
+    def _local_store(self):
+        if self.backend is None or self.backend == 'eventstore':
+            return None
+        if self.backend == 'local':
+            return LocalEventStore()
+        if isinstance(self.backend, LocalEventStore):
+            # the batch settings of the Insert are applied to a copy
+            return copy.copy(self.backend)
+        raise ValueError("Invalid backend " + str(self.backend) + ", 'eventstore', 'local' or a LocalEventStore required.")
+
+
+class InsertWithRetry(Insert):
+    """Inserts tuple into a table using Db2 Event Store Scala API and retries the insert of failed rows.
+
+    Rows that failed to insert are held back and inserted again, up to ``max_retries`` times.
+    The rows wait ``backoff`` seconds before the first retry and the wait time doubles with each further retry, up to ``max_backoff`` seconds,
+    so that a transient outage of IBM Db2 Event Store neither stops the application nor loses rows.
+    Each retry attempt holds up to ``queue_capacity`` waiting rows in memory, further rows are spilled to a log file on disk.
+    Rows that failed in all attempts are written to the ``dead_letter`` file.
+
+    Each retry attempt inserts with its own operator and connection, because the results of an insert can not be fed back to the same operator.
+    The insert therefore adds ``max_retries + 1`` EventStoreSink operators, each with its own JVM of ``heap_size`` and its own connection to the database,
+    and per retry attempt a heartbeat source and the stages holding the failed rows. Keep ``max_retries`` low and prefer a longer ``backoff`` to cover longer outages.
+    The retry stages provide the metrics ``queueDepth`` (rows waiting for the attempt), ``spilledRows`` (waiting rows held on disk) and ``nRetriedRows``,
+    the dead letter stage provides the metric ``nDeadLetterRows``.
+
+    Example of inserting with up to five retries, starting with a wait time of two seconds::
+
+        import streamsx.eventstore as es
+
+        s.for_each(es.InsertWithRetry(config='eventstore', table='SampleTable', batch_size=1000, max_retries=5, backoff=2.0, dead_letter='/tmp/sample_dead_letter.json'))
+
+    Args:
+        table(str): The name of the table into which you want to insert rows.
+        max_retries(int): Maximum number of insert attempts after the first failure of a row. The default is 3.
+        backoff(float): Time in seconds a failed row waits before the first retry. The time doubles for each further retry. The default is 1 second.
+        max_backoff(float): Maximum time in seconds a failed row waits before a retry. The default is 60 seconds.
+        queue_capacity(int): Number of waiting rows of a retry attempt held in memory, further rows are spilled to disk. The default is 10000.
+        spill_dir(str): Directory of the spill log files. If not specified, the temporary directory of the PE is used.
+        dead_letter(str): Path of the file where rows failed in all attempts are appended as JSON lines. If not specified, the rows are logged as errors.
+        **options: Further parameters of :py:class:`~Insert`, used for the first insert and the retries. ``parallel_width`` applies to the first insert only.
+
+    Returns:
+        streamsx.topology.topology.Sink: Stream termination
+
+    .. versionadded:: 2.9
+    """
+
+    def __init__(self, table, max_retries=3, backoff=1.0, max_backoff=60.0, queue_capacity=10000, spill_dir=None, dead_letter=None, **options):
+        super(InsertWithRetry, self).__init__(table, **options)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue_capacity = queue_capacity
+        self.spill_dir = spill_dir
+        self.dead_letter = dead_letter
+
+    def populate(self, topology, stream, name, **options) -> streamsx.topology.topology.Sink:
+        if self.max_retries < 0:
+            raise ValueError("Invalid max_retries " + str(self.max_retries) + ", value >= 0 required.")
+        if self.backoff <= 0:
+            raise ValueError("Invalid backoff " + str(self.backoff) + ", positive value required.")
+        if self.max_backoff <= 0:
+            raise ValueError("Invalid max_backoff " + str(self.max_backoff) + ", positive value required.")
+        if self.queue_capacity <= 0:
+            raise ValueError("Invalid queue_capacity " + str(self.queue_capacity) + ", positive value required.")
+        # retry stages and union markers can not be part of a composite group
+        self.group = False
+        schema = stream.oport.schema
+        result_schema = schema.extend(StreamSchema('tuple<boolean _Inserted_>'))
+        results = self._insert(topology, stream, result_schema, name)
+        for attempt in range(1, self.max_retries + 1):
+            delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+            failed = results.filter(_retry._failed)
+            ticks = topology.source(_batching._Ticker(min(delay / 4, 1.0)))
+            rows = failed.map().union({ticks}).flat_map(_retry._Retry(attempt, delay, self.queue_capacity, self.spill_dir)).map(schema=schema)
+            retry = copy.copy(self)
+            retry.parallel_width = None
+            # failed rows are no duplicates of the rows passed by the first insert
+            retry.dedup = False
+            if retry.batch_timeout is None:
+                # released rows do not wait for a full batch longer than the backoff
+                retry.batch_timeout = delay
+            results = retry._insert(topology, rows, result_schema, None)
+        return results.filter(_retry._failed).for_each(_retry._DeadLetter(self.dead_letter))
+
+
+class RoutedInsert(Insert):
+    """Inserts tuple into several tables of a Db2 Event Store database, selecting the table by the value of an attribute.
+
+    The tuples are routed to the table sinks by one operator with a lookup of the ``route_attribute`` value in ``tables``,
+    instead of one filter per table. Each table has its own sink with its own batches and its own connection to the database.
+    Without ``parallel_width`` the table sinks are fused into one PE, so that they run in one process instead of one process per table,
+    the number of connections is not reduced.
+    Tuples with a value not contained in ``tables`` are inserted into ``default_table``, or are dropped if no default table is set.
+
+    Example of inserting events into a table per event type::
+
+        import streamsx.eventstore as es
+
+        s.for_each(es.RoutedInsert(route_attribute='type', tables={'click': 'ClickEvents', 'view': 'ViewEvents'}, default_table='OtherEvents', config='eventstore', schema_name='sample'))
+
+    As ``for_each`` returns a single sink, the sinks of all tables are available as :py:attr:`sinks` after the insert is added.
+    Use :py:meth:`insert` to get the sinks or, with a result ``schema``, the result streams of all tables::
 
+        routed = es.RoutedInsert(route_attribute='type', tables={'click': 'ClickEvents', 'view': 'ViewEvents'}, config='eventstore')
+        results = routed.insert(s, schema=StreamSchema('tuple<rstring type, boolean _Inserted_>'))
+        results['ClickEvents'].print()
 
-def insert(stream, table, schema_name=None, database=None, connection=None, user=None, password=None, config=None, batch_size=None, front_end_connection_flag=None, max_num_active_batches=None, partitioning_key=None, primary_key=None, truststore=None, truststore_password=None, keystore=None, keystore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None, schema=None, name=None):
+    Args:
+        route_attribute(str): Name of the attribute selecting the table. The attribute is inserted as a column of the row.
+        tables(dict): Table names by value of the ``route_attribute``. Several values can be mapped to the same table.
+        default_table(str): Table for tuples with values not contained in ``tables``. If not specified, these tuples are dropped.
+        **options: Further parameters of :py:class:`~Insert`, applied to all tables.
+
+    Returns:
+        streamsx.topology.topology.Sink: Stream termination of the first table sink, the sinks of all tables are set as :py:attr:`sinks`.
+
+    .. versionadded:: 2.9
+    """
+
+    def __init__(self, route_attribute, tables, default_table=None, **options):
+        super(RoutedInsert, self).__init__(default_table, **options)
+        self.route_attribute = route_attribute
+        self.tables = tables
+        self.default_table = default_table
+        #: dict: Sinks by table name, set when the insert is added to a stream.
+        self.sinks = None
+
+    def populate(self, topology, stream, name, **options) -> streamsx.topology.topology.Sink:
+        self.sinks = self._route(topology, stream, None, name)
+        return next(iter(self.sinks.values()))
+
+    def insert(self, stream, schema=None, name=None):
+        """Inserts the tuples of the stream into the tables.
+
+        Args:
+            stream(streamsx.topology.topology.Stream): Stream of tuples containing the fields to be inserted as a row.
+            schema(StreamSchema): Schema of the result streams, see :py:func:`~insert`. If not specified, no results are returned.
+            name(str): Name of the routing operator in the Streams context, defaults to a generated name.
+
+        Returns:
+            dict: Sinks, or with ``schema`` result streams, by table name.
+        """
+        self.group = False
+        return self._route(stream.topology, stream, schema, name)
+
+    def _route(self, topology, stream, schema, name):
+        if not self.tables and self.default_table is None:
+            raise ValueError("At least one table is required.")
+        names = [attr for _, attr in _schema_types(stream.oport.schema)]
+        if self.route_attribute not in names:
+            raise ValueError("Invalid route_attribute " + str(self.route_attribute) + ", attribute of the input stream required.")
+        table_names = []
+        for table in list(self.tables.values()) + ([self.default_table] if self.default_table is not None else []):
+            if table not in table_names:
+                table_names.append(table)
+        routes = {value: table_names.index(table) for value, table in self.tables.items()}
+        default = table_names.index(self.default_table) if self.default_table is not None else -1
+        route = _routing._Route(self.route_attribute, names.index(self.route_attribute), routes, default)
+        streams = stream.split(len(table_names), route, name=name)
+        sinks = []
+        results = {}
+        for table, table_stream in zip(table_names, streams):
+            insert = copy.copy(self)
+            insert.table = table
+            results[table] = insert._insert(topology, table_stream, schema, None)
+            sinks.append(insert._placed)
+        if self.parallel_width is None and len(sinks) > 1:
+            placements = [_placement(sink) if isinstance(sink, streamsx.topology.topology.Sink) else sink for sink in sinks]
+            placements[0].colocate(placements[1:])
+        return results
+
+
+class AggregatingInsert(Insert):
+    """Aggregates tuples in tumbling windows and inserts one row per key and window into a table using Db2 Event Store Scala API.
+
+    The tuples are grouped by the ``group_by`` attributes. At the end of each window of ``window`` seconds (processing time, aligned to multiples of the window length),
+    one row per group is inserted, containing the ``group_by`` attributes, the ``aggregations`` and optionally the start of the window.
+    The state of the aggregation is a few numbers per group held in arrays, independent of the number of tuples in a window.
+
+    The schema of the inserted rows is derived from the input stream: ``count`` aggregations are ``int64``, ``mean`` aggregations are ``float64``,
+    ``sum`` aggregations are ``int64`` for signed integer, ``uint64`` for unsigned integer and ``float64`` for float attributes, ``min`` and ``max`` aggregations have the type of the attribute.
+    The ``group_by`` attributes must have a primitive type, optional and collection types are not supported.
+    The attribute order is the ``group_by`` attributes, the ``aggregations`` in the given order and the ``window_start`` attribute.
+    Integer sums are computed exactly and clamped to the range of the ``int64`` or ``uint64`` attribute, a clamped sum is logged as warning.
+
+    A window is inserted with the first tuple or heartbeat after its end, within a quarter of the window length and at most one second.
+    With a consistent region the open window is part of the checkpointed state. The final punctuation is not delivered to Python callables,
+    therefore the rows of the window open at the shutdown of the PE are not inserted, which is logged as warning.
+
+    Example of inserting the count and sum of the readings per device and second::
+
+        import streamsx.eventstore as es
+
+        s.for_each(es.AggregatingInsert(group_by='device', window=1.0, aggregations={'events': ('count', None), 'total': ('sum', 'reading'), 'peak': ('max', 'reading')},
+                                        window_start='ts', config='eventstore', table='ReadingsPerSecond', batch_timeout=1.0))
+
+    Args:
+        group_by(str|list): Attribute names grouping the tuples, either a list or a string of attribute names separated by commas.
+        window(float|datetime.timedelta): Length of the tumbling window in seconds.
+        aggregations(dict): Aggregations by output attribute name, each a tuple of the function (``'count'``, ``'sum'``, ``'min'``, ``'max'`` or ``'mean'``) and the input attribute name, which is ignored for ``'count'``.
+        window_start(str): Name of a ``timestamp`` attribute set to the start of the window. If not specified, the rows contain no window attribute.
+        table(str): The name of the table into which the aggregated rows are inserted.
+        **options: Further parameters of :py:class:`~Insert`. Set ``batch_timeout`` to insert the rows of a window without waiting for a full batch.
+
+    Returns:
+        streamsx.topology.topology.Sink: Stream termination
+
+    .. versionadded:: 2.9
+    """
+
+    def __init__(self, group_by, window, aggregations, window_start=None, table=None, **options):
+        super(AggregatingInsert, self).__init__(table, **options)
+        self.group_by = group_by
+        self.window = window
+        self.aggregations = aggregations
+        self.window_start = window_start
+
+    def _aggregate_schema(self, types):
+        group_by = _attribute_names(self.group_by)
+        for name in group_by:
+            if name not in types:
+                raise ValueError("Invalid group_by attribute " + str(name) + ", attribute of the input stream required.")
+            if isinstance(types[name], tuple):
+                raise ValueError("Invalid group_by attribute " + str(name) + ", attribute of a primitive type required.")
+        attributes = [(types[name], name) for name in group_by]
+        aggregations = []
+        integral = {}
+        for out, (function, attribute) in self.aggregations.items():
+            if function not in _aggregate._FUNCTIONS:
+                raise ValueError("Invalid aggregation function " + str(function) + ", one of " + ', '.join(_aggregate._FUNCTIONS) + " required.")
+            if function != 'count' and attribute not in types:
+                raise ValueError("Invalid aggregation attribute " + str(attribute) + ", attribute of the input stream required.")
+            spl_type = _aggregate._aggregation_type(function, types.get(attribute))
+            if spl_type in _aggregate._INTEGER_TYPES:
+                integral[out] = spl_type
+            attributes.append((spl_type, out))
+            aggregations.append((out, function, attribute))
+        if self.window_start is not None:
+            attributes.append(('timestamp', self.window_start))
+        schema = StreamSchema('tuple<' + ', '.join(t + ' ' + n for t, n in attributes) + '>')
+        return schema, group_by, aggregations, integral
+
+    def populate(self, topology, stream, name, **options) -> streamsx.topology.topology.Sink:
+        if self.table is None:
+            raise ValueError("The table parameter is required.")
+        window = _seconds(self.window)
+        if window <= 0:
+            raise ValueError("Invalid window " + str(self.window) + ", positive value required.")
+        if not self.aggregations:
+            raise ValueError("At least one aggregation is required.")
+        input_types = _schema_types(stream.oport.schema)
+        schema, group_by, aggregations, integral = self._aggregate_schema({n: t for t, n in input_types})
+        # ticks close the window when no further tuples arrive
+        self.group = False
+        ticks = topology.source(_batching._Ticker(min(window / 4, 1.0)))
+        aggregate = _aggregate._TumblingAggregate([n for _, n in input_types], group_by, window, aggregations, integral, self.window_start)
+        rows = stream.map().union({ticks}).flat_map(aggregate).map(schema=schema)
+        return self._insert(topology, rows, None, name)
+
+
+def insert(stream, table, schema_name=None, database=None, connection=None, user=None, password=None, config=None, batch_size=None, front_end_connection_flag=None, max_num_active_batches=None, partitioning_key=None, primary_key=None, truststore=None, truststore_password=None, keystore=None, keystore_password=None, plugin_name=None, plugin_flag=None, ssl_connection=None, schema=None, name=None, parallel_width=None, parallel_hash_attributes=None, batch_timeout=None, backend=None, ordering=None, vm_arg=None, heap_size=None, acknowledgement=None, dedup=False, dedup_window=None, dedup_capacity=None, metrics=False, adaptive_batching=False, min_batch=None, max_batch=None, target_latency_ms=None, isolate=False, colocate_with=None, resource_tags=None, queue_size=None, congestion_policy=None, target_rows_per_sec=None, batching_samples=None):
     """Inserts tuple into a table using Db2 Event Store Scala API.
 
     Important: The tuple field types and positions in the IBM Streams schema must match the field names in your IBM Db2 Event Store table schema exactly.
@@ -450,6 +1123,12 @@ def insert(stream, table, schema_name=None, database=None, connection=None, user
         # insert tuple data into table as rows
         res = es.insert(s, connection=es_connection, database='TESTDB', table='SampleTable', schema_name='sample', primary_key='id', partitioning_key='id')
 
+    Example of receiving one acknowledgement per batch instead of one result per row. Failed rows are still submitted individually::
+
+        result_schema = StreamSchema('tuple<int32 id, rstring name, boolean _Inserted_>')
+        summaries, failed = es.insert(s, config='eventstore', table='SampleTable', batch_size=1000, schema=result_schema, acknowledgement='batch')
+        summaries.for_each(lambda b: print(b['rows'], b['failedRows'], b['latency']))
+
     Args:
         stream(streamsx.topology.topology.Stream): Stream of tuples containing the fields to be inserted as a row. Supports :py:class:`topology_ref:streamsx.topology.schema.StreamSchema` (schema for a structured stream) as input. The tuple attribute types and positions in the IBM Streams schema must match the field names in your IBM Db2 Event Store table schema exactly.
         table(str): The name of the table into which you want to insert rows.
@@ -459,7 +1138,7 @@ def insert(stream, table, schema_name=None, database=None, connection=None, user
         user(str): Name of the IBM Db2 Event Store User in order to connect. Alternative this parameter can be set with function :py:meth:`~streamsx.eventstore.configure_connection`.
         password(str): Password for the IBM Db2 Event Store User in order to connect. Alternative this parameter can be set with function :py:meth:`~streamsx.eventstore.configure_connection`.
         config(str): The name of the application configuration. Value returned by the function :py:meth:`~streamsx.eventstore.configure_connection`.
-        batch_size(int): The number of rows that will be batched in the operator before the batch is inserted into IBM Db2 Event Store by using the batchInsertAsync method. If you do not specify this parameter, the batchSize defaults to the estimated number of rows that could fit into an 8K memory page.
+        batch_size(int|str): The number of rows that will be batched in the operator before the batch is inserted into IBM Db2 Event Store by using the batchInsertAsync method. If you do not specify this parameter, the batchSize defaults to the estimated number of rows that could fit into an 8K memory page. Set to ``'auto'`` to compute the batch size from the input stream schema, ``target_rows_per_sec`` and ``batching_samples`` with :py:func:`~recommend_batching`, which also sets ``max_num_active_batches`` if not specified. Without ``target_rows_per_sec`` and ``batching_samples`` the recommendation is a static default for the schema with a single active batch.
         front_end_connection_flag(bool): Set to ``True`` to connect through a Secure Gateway (for Event Store Enterprise Edition version >= 1.1.2 and Developer Edition version > 1.1.4)
         max_num_active_batches(int): The number of batches that can be filled and inserted asynchronously. The default is 1.        
         partitioning_key(str): Partitioning key for the table. A string of attribute names separated by commas. The partitioning_key parameter is used only, if the table does not yet exist in the IBM Db2 Event Store database.
@@ -473,80 +1152,47 @@ def insert(stream, table, schema_name=None, database=None, connection=None, user
         ssl_connection(str|bool): Set "false" or ``False`` to disable SSL connection. If not specified the default is SSL enabled.
         schema(streamsx.topology.schema.StreamSchema): Schema for returned stream. Expects a Boolean attribute called ``_Inserted_`` in the output stream. This attribute is set to true if the data was successfully inserted and false if the insert failed. Input stream attributes are forwarded to the output stream if present in schema.            
         name(str): Sink name in the Streams context, defaults to a generated name.
+        parallel_width(int): Number of parallel channels inserting into the table. Each channel has its own connection to IBM Db2 Event Store and its own batches. The output stream, if requested with ``schema``, merges the results of all channels.
+        parallel_hash_attributes(str|list): Attribute names used to partition the tuples across the parallel channels. Defaults to the attributes of the ``partitioning_key``. If neither is set, tuples are distributed round-robin.
+        batch_timeout(float|datetime.timedelta): Maximum time in seconds a row waits in a partially filled batch before the batch is inserted. If not specified, a batch is inserted only when it is full.
+        backend(str|LocalEventStore): Set to ``'local'`` or to a :py:class:`~LocalEventStore` instance to insert into the in-process stand-in instead of IBM Db2 Event Store. With ``schema`` the results of the stand-in are submitted by a stage driven by heartbeat ticks, within 0.1 seconds after a batch insert has completed, also for the last partially filled batch flushed by ``batch_timeout``.
+        ordering(str): Set to ``'strict'`` to insert the rows in the order of the tuples, or to ``'relaxed'`` to allow batches to complete out of order for a higher throughput. If not specified, the default of the operator is used.
+        vm_arg(str|list): Arbitrary JVM arguments for the operator.
+        heap_size(int|str): Maximum JVM heap size of the operator in megabytes, or ``'auto'`` to size the heap with :py:func:`~recommend_heap_size`.
+        acknowledgement(str): Set to ``'batch'`` to return one tuple of :py:const:`~BatchSummarySchema` per inserted batch and a stream of the failed rows only, instead of one result per row. The per row results of the operator are summarized in the same PE, so that only the summaries and the failed rows are transported. A batch ends with ``batch_size`` rows or when the operator inserts a partially filled batch on a window punctuation, if ``batch_size`` is not set the operator is invoked with the estimated number of rows fitting into an 8K memory page. The batches are derived from the order of the results, ``ordering='relaxed'`` and ``max_num_active_batches`` greater than 1 are not supported. Requires ``schema``. The default is ``'row'``.
+        dedup(bool|str): Set to ``True``, ``'lru'`` or ``'bloom'`` to drop tuples with a ``primary_key`` value already inserted within ``dedup_window``, see :py:class:`~Insert`.
+        dedup_window(float|datetime.timedelta): Time in seconds a key is remembered for the deduplication.
+        dedup_capacity(int): Maximum number of keys held for the deduplication. The default is 1000000.
+        metrics(bool): Set to ``True`` to register the insert metrics, see :py:class:`~Insert`.
+        adaptive_batching(bool): Set to ``True`` to adjust the batch size within ``[min_batch, max_batch]`` to the observed insert latency, see :py:class:`~Insert`. With ``batch_timeout`` the same stage also cuts the batch when its oldest row is older than the timeout, so that every batch inserted on a punctuation is counted by the adaptive batching.
+        min_batch(int): Smallest batch size of the adaptive batching. The default is 100.
+        max_batch(int): Largest batch size of the adaptive batching. The default is 10000.
+        target_latency_ms(int): Target latency of a batch insert in milliseconds for the adaptive batching. The default is 1000.
+        isolate(bool): Set to ``True`` to run the insert in a separate processing element from the upstream processing.
+        colocate_with(streamsx.topology.topology.Stream|streamsx.topology.topology.Sink|list): Processing logic to run in the same processing element as the sink.
+        resource_tags(str|list): Resource tags of the hosts where the sink runs.
+        queue_size(int): Size of the queue of a threaded input port of the sink, see :py:class:`~Insert`.
+        congestion_policy(str): Behavior of the threaded input port when the queue is full: ``'wait'``, ``'drop_first'`` or ``'drop_last'``.
+        target_rows_per_sec(int): Expected number of rows inserted per second for ``batch_size='auto'``.
+        batching_samples(list): Sample tuples of the input stream for ``batch_size='auto'``.
 
     Returns:
         streamsx.topology.topology.Sink: Stream termination
         or
         Output Stream if ``schema`` parameter is specified. This output port is intended to output the information on whether a tuple was successful or not when it was inserted into the database.
+        or
+        Tuple of the summary stream and the failed rows stream if ``acknowledgement`` is ``'batch'``.
 
     .. deprecated:: 2.8.0
         Use the :py:class:`~Insert`.
+    .. versionchanged:: 2.9 ``acknowledgement``, ``dedup``, ``dedup_window``, ``dedup_capacity``, ``metrics``, ``adaptive_batching``, ``min_batch``, ``max_batch``, ``target_latency_ms``, ``isolate``, ``colocate_with``, ``resource_tags``, ``queue_size``, ``congestion_policy``, ``target_rows_per_sec`` and ``batching_samples`` parameters added.
     """
 
-    if config is None and connection is None:
-         raise ValueError("Either config parameter or connection must be set.")
-    if config is None and database is None:
-         raise ValueError("Either config parameter or database must be set.")
-
-    # python wrapper eventstore toolkit dependency
-    _add_toolkit_dependency(stream.topology)
-
-    _op = _EventStoreSink(stream, schema, connectionString=connection, databaseName=database, tableName=table, schemaName=schema_name, partitioningKey=partitioning_key, primaryKey=primary_key, name=name)
-    if front_end_connection_flag is not None:
-        if front_end_connection_flag is True:
-            _op.params['frontEndConnectionFlag'] = _op.expression('true')
-    if batch_size is not None:
-        _op.params['batchSize'] = streamsx.spl.types.int32(batch_size)
-    if max_num_active_batches is not None:
-        _op.params['maxNumActiveBatches'] = streamsx.spl.types.int32(max_num_active_batches)
-          
-    if keystore is not None:
-        _op.params['keyStore'] = _add_store_file(stream.topology, keystore)
-    if keystore_password is not None:
-        _op.params['keyStorePassword'] = keystore_password
-    if plugin_name is not None:
-        _op.params['pluginName'] = plugin_name
-    else:
-        _op.params['pluginName'] = 'IBMIAMauth'
-    if plugin_flag is not None:
-        if isinstance(plugin_flag, (bool)):
-            if plugin_flag:
-                _op.params['pluginFlag'] = _op.expression('true')
-            else:
-                _op.params['pluginFlag'] = _op.expression('false')
-        else:
-            if 'true' in plugin_flag.lower():
-                _op.params['pluginFlag'] = _op.expression('true')
-            else:
-                _op.params['pluginFlag'] = _op.expression('false')
-    if ssl_connection is not None:
-        if isinstance(ssl_connection, (bool)):
-            if ssl_connection:
-                _op.params['sslConnection'] = _op.expression('true')
-            else:
-                _op.params['sslConnection'] = _op.expression('false')
-        else:
-            if 'true' in ssl_connection.lower():
-                _op.params['sslConnection'] = _op.expression('true')
-            else:
-                _op.params['sslConnection'] = _op.expression('false')
-    if truststore is not None:
-        _op.params['trustStore'] = _add_store_file(stream.topology, truststore)
-    if truststore_password is not None:
-        _op.params['trustStorePassword'] = truststore_password
-
-    if config is not None:
-        _op.params['configObject'] = config
-    else:
-        if user is not None:
-            _op.params['eventStoreUser'] = user
-        if password is not None:
-            _op.params['eventStorePassword'] = password
-
-    if schema is not None:
-        return _op.outputs[0]
-    else:
-        return streamsx.topology.topology.Sink(_op)
+    # the parameters of the function are the parameters of the Insert, besides the stream and the result options
+    options = dict(locals())
+    for key in ('stream', 'schema', 'name', 'acknowledgement'):
+        del options[key]
+    return Insert(**options)._insert(stream.topology, stream, schema, name, acknowledgement)
 
 
 class _EventStoreSink(streamsx.spl.op.Invoke):
@@ -0,0 +1,188 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import re
+import types
+import streamsx.spl.types
+from streamsx.topology.schema import CommonSchema, StreamSchema
+from streamsx.eventstore._sizing import _schema_types
+import streamsx.eventstore._eventstore as _eventstore
+
+_DEFAULT_CHUNK_ROWS = 10000
+
+# SPL types by NumPy, pandas or Arrow type name
+_TYPES = {
+    'int8': 'int8', 'int16': 'int16', 'int32': 'int32', 'int64': 'int64',
+    'uint8': 'uint8', 'uint16': 'uint16', 'uint32': 'uint32', 'uint64': 'uint64',
+    'float32': 'float32', 'float64': 'float64', 'float': 'float32', 'double': 'float64',
+    'bool': 'boolean',
+    'object': 'rstring', 'string': 'rstring', 'str': 'rstring', 'large_string': 'rstring', 'utf8': 'rstring',
+}
+# pandas extension types with missing values
+_NULLABLE_TYPES = {
+    'Int8': 'int8', 'Int16': 'int16', 'Int32': 'int32', 'Int64': 'int64',
+    'UInt8': 'uint8', 'UInt16': 'uint16', 'UInt32': 'uint32', 'UInt64': 'uint64',
+    'Float32': 'float32', 'Float64': 'float64', 'boolean': 'boolean',
+}
+_TIMESTAMP = re.compile(r'^(datetime64|timestamp)\[(ns|us|ms|s)(,.*)?\]$')
+_NANOS = {'s': 1000000000, 'ms': 1000000, 'us': 1000, 'ns': 1}
+
+
+def _spl_type(dtype, column):
+    """Returns the SPL type of a column with the NumPy, pandas or Arrow type."""
+    name = str(dtype)
+    if name in _TYPES:
+        return _TYPES[name]
+    if name in _NULLABLE_TYPES:
+        return 'optional<' + _NULLABLE_TYPES[name] + '>'
+    if _TIMESTAMP.match(name):
+        return 'timestamp'
+    raise ValueError("Unsupported type " + name + " of column " + str(column) + ", numeric, boolean, string or timestamp columns required.")
+
+def _is_arrow(frame):
+    return hasattr(frame, 'schema') and hasattr(frame, 'column_names')
+
+def _columns(frame):
+    if _is_arrow(frame):
+        return list(zip(frame.schema.names, frame.schema.types))
+    return list(zip(frame.columns, frame.dtypes))
+
+def _frame_schema(frame):
+    for column, _ in _columns(frame):
+        if not str(column).isidentifier():
+            raise ValueError("Invalid column name " + repr(column) + ", attribute name required, rename the column or set the schema parameter.")
+    return StreamSchema('tuple<' + ', '.join(_spl_type(dtype, column) + ' ' + str(column) for column, dtype in _columns(frame)) + '>')
+
+
+_OPTIONAL_TIMESTAMP = 'optional<timestamp>'
+
+def _timestamps(nanos, column, spl_type):
+    if spl_type != _OPTIONAL_TIMESTAMP and None in nanos:
+        raise ValueError("Missing timestamp in column " + str(column) + ", optional<timestamp> attribute required.")
+    return [None if n is None else streamsx.spl.types.Timestamp(n // 1000000000, n % 1000000000, 0) for n in nanos]
+
+def _pandas_column(chunk, column, spl_type):
+    series = chunk[column]
+    if spl_type in ('timestamp', _OPTIONAL_TIMESTAMP):
+        # datetime64 values in UTC, also for time zone aware columns, NaT is the smallest int64 and mapped to None
+        nanos = series.values.astype('datetime64[ns]').view('int64').tolist()
+        return _timestamps([None if missing else n for n, missing in zip(nanos, series.isna().tolist())], column, spl_type)
+    if spl_type.startswith('optional'):
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+def _arrow_column(chunk, column, spl_type):
+    array = chunk.column(chunk.schema.get_field_index(column))
+    if spl_type in ('timestamp', _OPTIONAL_TIMESTAMP):
+        factor = _NANOS[array.type.unit]
+        return _timestamps([None if v is None else v * factor for v in array.cast('int64').to_pylist()], column, spl_type)
+    return array.to_pylist()
+
+
+class _FrameSource(object):
+    """Source callable submitting the rows of data frames, converted column by column for chunks of ``chunk_rows`` rows.
+
+    ``frames`` is a frame, a list of frames or a callable returning the frames, which is called when the source is started,
+    so that the frames can be read lazily, for example chunk by chunk from a file.
+    """
+    def __init__(self, frames, columns, chunk_rows):
+        self.frames = frames
+        # (column name, SPL type) in the order of the schema
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+
+    def _chunks(self, frame):
+        if _is_arrow(frame):
+            for offset in range(0, frame.num_rows, self.chunk_rows):
+                yield frame.slice(offset, self.chunk_rows), _arrow_column
+        else:
+            for offset in range(0, len(frame), self.chunk_rows):
+                yield frame.iloc[offset:offset + self.chunk_rows], _pandas_column
+
+    def _rows(self):
+        frames = self.frames() if callable(self.frames) else self.frames
+        if _is_frame(frames):
+            frames = [frames]
+        for frame in frames:
+            for chunk, convert in self._chunks(frame):
+                # vectorized conversion of each column to Python values, the rows are assembled by zip
+                yield from zip(*[convert(chunk, column, spl_type) for column, spl_type in self.columns])
+
+    def __call__(self):
+        return self._rows()
+
+
+def _is_frame(value):
+    return _is_arrow(value) or (hasattr(value, 'dtypes') and hasattr(value, 'iloc'))
+
+def _first_frame(frames):
+    if callable(frames):
+        frames = frames()
+    if _is_frame(frames):
+        return frames
+    for frame in frames:
+        return frame
+    raise ValueError("No data frame to derive the schema from, schema parameter required.")
+
+
+def insert_dataframe(topology, frames, table, schema=None, chunk_rows=_DEFAULT_CHUNK_ROWS, name=None, **options):
+    """Inserts the rows of pandas data frames or Arrow tables into a table.
+
+    The frames are submitted by a source, which converts chunks of ``chunk_rows`` rows column by column
+    with the vectorized conversions of pandas or Arrow instead of converting each row, and inserted with :py:class:`~Insert`.
+
+    The schema is derived from the column types of the first frame if not specified:
+    integer and floating point types map to the SPL types of the same size, ``bool`` to ``boolean``,
+    ``object`` and string columns to ``rstring``, and ``datetime64`` or Arrow timestamp columns to ``timestamp``.
+    The pandas types with missing values, for example ``Int64``, map to optional types.
+    Missing timestamps, ``NaT`` in pandas or null in Arrow, are inserted as null into ``optional<timestamp>`` attributes
+    and raise a ``ValueError`` for ``timestamp`` attributes, set the ``schema`` parameter for timestamp columns with missing values.
+
+    Frames larger than memory are inserted by passing a callable returning the frames,
+    which is called in the Streams job, so that the frames are read lazily, for example chunk by chunk from a file.
+    Without ``schema`` the callable is also called when the topology is built, to read the types of the first frame.
+
+    Example of a backfill from a CSV file larger than memory::
+
+        import pandas as pd
+        import streamsx.eventstore as es
+
+        es.insert_dataframe(topo, lambda: pd.read_csv('/data/events.csv', chunksize=100000), 'SampleTable', config='eventstore', batch_size=1000)
+
+    Args:
+        topology(streamsx.topology.topology.Topology): Topology to add the source and the insert to.
+        frames: A pandas ``DataFrame``, an Arrow ``Table`` or ``RecordBatch``, a list of these, or a callable returning a frame or an iterable of frames. The frames are serialized with the application unless a callable is given.
+        table(str): The name of the table into which you want to insert rows.
+        schema(str|streamsx.topology.schema.StreamSchema): Schema of the rows. The columns are selected by the attribute names. If not specified, the schema is derived from the column types of the first frame.
+        chunk_rows(int): Number of rows converted at once. The default is 10000.
+        name(str): Sink name in the Streams context, defaults to a generated name.
+        **options: Further parameters of :py:class:`~Insert`.
+
+    Returns:
+        streamsx.topology.topology.Sink: Stream termination
+
+    .. versionadded:: 2.9
+    """
+    if isinstance(frames, types.GeneratorType):
+        raise ValueError("Generators can not be serialized with the application, a callable returning the frames required.")
+    if chunk_rows <= 0:
+        raise ValueError("Invalid chunk_rows " + str(chunk_rows) + ", positive value required.")
+    if schema is None:
+        schema = _frame_schema(_first_frame(frames))
+    elif isinstance(schema, CommonSchema):
+        schema = StreamSchema(schema.value)
+    elif isinstance(schema, str):
+        schema = StreamSchema(schema)
+    columns = []
+    for spl_type, column in _schema_types(schema):
+        if isinstance(spl_type, tuple):
+            if spl_type == ('optional', 'timestamp'):
+                # converted as the timestamp columns, missing values are None
+                spl_type = _OPTIONAL_TIMESTAMP
+            else:
+                spl_type = 'optional' if spl_type[0] == 'optional' else spl_type[0]
+        columns.append((column, spl_type))
+    rows = topology.source(_FrameSource(frames, columns, int(chunk_rows)))
+    rows = rows.map(schema=schema.as_tuple())
+    return rows.for_each(_eventstore.Insert(table, **options), name=name)
@@ -0,0 +1,222 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+import streamsx.eventstore._batching as _batching
+
+# default batch size of the stand-in, the EventStoreSink estimates the rows fitting into an 8K page
+_DEFAULT_BATCH_SIZE = 100
+# period in seconds of the ticks submitting the results of the completed batch inserts
+_RESULT_PERIOD = 0.1
+
+# results of the completed batch inserts of a stand-in, shared with the stage
+# submitting them in the same PE, key is the result id and channel
+_results = _batching._Registry(collections.deque)
+
+def _result(row, names, inserted):
+    if isinstance(row, dict):
+        result = dict(row)
+    else:
+        result = dict(zip(names, row))
+    result['_Inserted_'] = inserted
+    return result
+
+
+class LocalEventStore(object):
+    """In-process stand-in for the Db2 Event Store sink.
+
+    Emulates the batch insert of the EventStoreSink operator without a Db2 Event Store database:
+    rows are collected into batches of ``batch_size`` rows, each full batch is inserted asynchronously
+    with a simulated latency and error model, and at most ``max_num_active_batches`` batches are inserted concurrently.
+    When all batches are active, the caller blocks until a batch insert completes, like the EventStoreSink operator.
+    The rows are not stored.
+
+    Use it to measure and tune the Python side of an insert pipeline without an IBM Db2 Event Store database,
+    either as sink callable or with the ``backend`` parameter of :py:class:`~Insert`::
+
+        import streamsx.eventstore as es
+
+        s.for_each(es.LocalEventStore(batch_size=1000, max_num_active_batches=2, batch_latency=0.05), process_punct=True)
+        # or
+        s.for_each(es.Insert(table='SampleTable', batch_size=1000, backend='local'))
+
+    The stand-in can be used outside of a Streams application as context manager::
+
+        with es.LocalEventStore(batch_size=1000, batch_latency=0.01) as store:
+            for row in rows:
+                store(row)
+        print(store.stats())
+
+    Args:
+        batch_size(int): The number of rows per batch. The default is 100.
+        max_num_active_batches(int): The number of batches that can be inserted concurrently. The default is 1.
+        batch_latency(float|callable): Simulated duration of a batch insert in seconds, or a callable returning the duration for a given number of rows. The default is no latency.
+        error_rate(float): Probability between 0 and 1 that a batch insert fails. The default is 0.
+        seed(int): Seed for the random failures, set to make runs repeatable.
+
+    .. versionadded:: 2.9
+    """
+
+    def __init__(self, batch_size=None, max_num_active_batches=None, batch_latency=0.0, error_rate=0.0, seed=None):
+        if error_rate < 0 or error_rate > 1:
+            raise ValueError("Invalid error_rate " + str(error_rate) + ", value between 0 and 1 required.")
+        self.batch_size = batch_size
+        self.max_num_active_batches = max_num_active_batches
+        self.batch_latency = batch_latency
+        self.error_rate = error_rate
+        self.seed = seed
+        # id of the results shared with the stage submitting them
+        self._result_id = None
+        self._executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attr in ['_executor', '_slots', '_lock', '_random', '_batch', '_results', '_counters']:
+            state.pop(attr, None)
+        state['_executor'] = None
+        return state
+
+    def __enter__(self):
+        self._start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._executor is not None:
+            self.flush()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            if self._results is not None:
+                _results.release(self._results_key)
+
+    def _start(self):
+        if self._executor is not None:
+            return
+        self._batch_size = self.batch_size if self.batch_size else _DEFAULT_BATCH_SIZE
+        active = self.max_num_active_batches if self.max_num_active_batches else 1
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=active)
+        self._slots = threading.BoundedSemaphore(active)
+        self._lock = threading.Lock()
+        self._random = random.Random(self.seed)
+        self._batch = []
+        self._results = None
+        if self._result_id is not None:
+            self._results_key = (self._result_id, _batching._channel(self))
+            self._results = _results.acquire(self._results_key)
+        self._counters = collections.Counter()
+        self._active = 0
+        self._latency_total = 0.0
+
+    def __call__(self, tuple_):
+        if self._executor is None:
+            self._start()
+        self._batch.append(tuple_)
+        if len(self._batch) >= self._batch_size:
+            self._submit()
+
+    def on_punct(self):
+        """Inserts the partially filled batch, as the EventStoreSink does on a window punctuation."""
+        self.flush(wait=False)
+
+    def flush(self, wait=True):
+        """Inserts the partially filled batch.
+
+        Args:
+            wait(bool): Wait until all active batch inserts are completed.
+        """
+        if self._executor is None:
+            return
+        if self._batch:
+            self._submit()
+        if wait:
+            active = self.max_num_active_batches if self.max_num_active_batches else 1
+            for _ in range(active):
+                self._slots.acquire()
+            for _ in range(active):
+                self._slots.release()
+
+    def _submit(self):
+        batch = self._batch
+        self._batch = []
+        self._slots.acquire()
+        with self._lock:
+            self._active += 1
+            self._counters['maxActiveBatches'] = max(self._counters['maxActiveBatches'], self._active)
+            failed = self._random.random() < self.error_rate
+        self._executor.submit(self._insert_batch, batch, failed)
+
+    def _insert_batch(self, batch, failed):
+        try:
+            start = time.monotonic()
+            latency = self.batch_latency(len(batch)) if callable(self.batch_latency) else self.batch_latency
+            if latency:
+                time.sleep(latency)
+            with self._lock:
+                self._active -= 1
+                self._latency_total += time.monotonic() - start
+                if failed:
+                    self._counters['batchesFailed'] += 1
+                    self._counters['rowsFailed'] += len(batch)
+                else:
+                    self._counters['batchesInserted'] += 1
+                    self._counters['rowsInserted'] += len(batch)
+            if self._results is not None:
+                self._results.append((batch, not failed))
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Returns the counters of the inserted batches.
+
+        Returns:
+            dict: Counters ``rowsInserted``, ``rowsFailed``, ``batchesInserted``, ``batchesFailed``, ``maxActiveBatches`` (highest number of concurrently inserted batches) and ``batchLatency`` (mean duration of a batch insert in seconds).
+        """
+        if self._executor is None and not hasattr(self, '_counters'):
+            return {}
+        with self._lock:
+            stats = dict(self._counters)
+            batches = stats.get('batchesInserted', 0) + stats.get('batchesFailed', 0)
+            stats['batchLatency'] = self._latency_total / batches if batches else 0.0
+        for key in ['rowsInserted', 'rowsFailed', 'batchesInserted', 'batchesFailed', 'maxActiveBatches']:
+            stats.setdefault(key, 0)
+        return stats
+
+
+class _LocalResults(object):
+    """Flat map callable of heartbeat ticks submitting the results of the batches inserted by the stand-in of the same PE and channel.
+
+    The stand-in is invoked as sink with punctuations, so that it inserts partially filled batches on window punctuations like the EventStoreSink,
+    the results of the completed batch inserts are submitted on the next tick.
+    """
+    def __init__(self, result_id, names):
+        self.result_id = result_id
+        self.names = names
+        self._results = None
+
+    def __enter__(self):
+        self._shared_key = (self.result_id, _batching._channel(self))
+        self._results = _results.acquire(self._shared_key)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._results is not None:
+            _results.release(self._shared_key)
+            self._results = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_results'] = None
+        return state
+
+    def __call__(self, tick):
+        if self._results is None:
+            self.__enter__()
+        out = []
+        while self._results:
+            batch, inserted = self._results.popleft()
+            for row in batch:
+                out.append(_result(row, self.names, inserted))
+        return out
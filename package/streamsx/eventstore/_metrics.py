@@ -0,0 +1,227 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import array
+import math
+import time
+import streamsx.ec
+import streamsx.eventstore._acks as _acks
+import streamsx.eventstore._batching as _batching
+
+# gauges are published for intervals of this length in seconds
+_INTERVAL = 10.0
+
+# histogram buckets per power of two, the recorded values are exact to 1/16
+_SUB_BUCKETS = 16
+# largest recorded value in microseconds, about 12 days
+_MAX_SHIFT = 36
+
+
+class _Histogram(object):
+    """Histogram of latencies in microseconds with log-linear buckets of fixed size, as in an HDR histogram.
+
+    Values below 32 have a bucket each, larger values are recorded with a relative error below 1/16.
+    """
+    def __init__(self):
+        self.counts = array.array('q', bytes(8 * (_SUB_BUCKETS * (_MAX_SHIFT + 2))))
+        self.total = 0
+
+    def _index(self, value):
+        if value < _SUB_BUCKETS:
+            return value
+        shift = min(value.bit_length() - 5, _MAX_SHIFT)
+        mantissa = min(value >> shift, 2 * _SUB_BUCKETS - 1)
+        return _SUB_BUCKETS * (shift + 1) + mantissa - _SUB_BUCKETS
+
+    def _value(self, index):
+        if index < _SUB_BUCKETS:
+            return index
+        shift = index // _SUB_BUCKETS - 1
+        mantissa = index % _SUB_BUCKETS + _SUB_BUCKETS
+        # middle of the bucket
+        return (mantissa << shift) + ((1 << shift) >> 1)
+
+    def record(self, value):
+        self.counts[self._index(max(0, int(value)))] += 1
+        self.total += 1
+
+    def percentile(self, p):
+        if self.total == 0:
+            return 0
+        rank = max(1, int(math.ceil(p * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._value(index)
+        return self._value(len(self.counts) - 1)
+
+    def reset(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.total = 0
+
+
+class _Submitted(_acks._Submitted):
+    """Records the arrival time of each row before the sink and counts the rows."""
+    def __enter__(self):
+        super(_Submitted, self).__enter__()
+        self._metric = None
+        if streamsx.ec.is_active():
+            self._metric = streamsx.ec.CustomMetric(self, name='nRowsSubmitted', description='Number of rows passed to the insert')
+
+    def __getstate__(self):
+        state = super(_Submitted, self).__getstate__()
+        state.pop('_metric', None)
+        return state
+
+    def __call__(self, tuple_):
+        if self._pending is None:
+            self.__enter__()
+        super(_Submitted, self).__call__(tuple_)
+        if self._metric is not None:
+            self._metric += 1
+
+
+class _BatchMetrics(_acks._BatchAcknowledgement):
+    """Derives the batches from the per row results of the sink, as the batch acknowledgements do, and publishes batch metrics.
+
+    The gauges ``rowsPerSecond``, ``batchesPerSecond``, ``batchLatencyP50Ms``, ``batchLatencyP99Ms`` and ``batchFillPercent`` cover the last interval,
+    they are published on heartbeat ticks as well, so that they drop to 0 while no rows are inserted.
+    ``insertQueueDepth`` is the number of rows passed to the sink and not yet inserted, ``inFlightBatches`` the number of full batches among them.
+    ``nActiveBatchesLimitHits`` counts the batches completed while ``max_num_active_batches`` batches were in flight, when the sink blocks further rows.
+    The latency of a batch is derived from the arrival times of its rows in the order of the results. When batches may complete out of order,
+    ``latency`` is ``False`` and the latency gauges are not registered.
+    """
+    def __init__(self, insert_id, names, key_names, batch_size, max_num_active_batches=None, adaptive=None, latency=True):
+        super(_BatchMetrics, self).__init__(insert_id, names, key_names, batch_size, adaptive=adaptive)
+        self.max_num_active_batches = max_num_active_batches
+        self.latency = latency
+        self._latency = None
+
+    def __enter__(self):
+        super(_BatchMetrics, self).__enter__()
+        self._latency = _Histogram()
+        self._batches = 0
+        self._batch_rows = 0
+        self._start = time.monotonic()
+        self._submitted = self._pending.submitted
+        self._metrics = None
+        if streamsx.ec.is_active():
+            self._metrics = {
+                'rows': streamsx.ec.CustomMetric(self, name='rowsPerSecond', description='Rows passed to the insert per second in the last interval', kind='Gauge'),
+                'batches': streamsx.ec.CustomMetric(self, name='nBatches', description='Number of inserted batches'),
+                'rate': streamsx.ec.CustomMetric(self, name='batchesPerSecond', description='Batches inserted per second in the last interval', kind='Gauge'),
+                'fill': streamsx.ec.CustomMetric(self, name='batchFillPercent', description='Average number of rows of a batch in percent of the batch size in the last interval', kind='Gauge'),
+                'queue': streamsx.ec.CustomMetric(self, name='insertQueueDepth', description='Number of rows passed to the sink and not yet inserted', kind='Gauge'),
+                'inflight': streamsx.ec.CustomMetric(self, name='inFlightBatches', description='Number of full batches passed to the sink and not yet inserted', kind='Gauge'),
+                'limit': streamsx.ec.CustomMetric(self, name='nActiveBatchesLimitHits', description='Number of batches completed while the maximum number of active batches was in flight')}
+            if self.latency:
+                self._metrics['p50'] = streamsx.ec.CustomMetric(self, name='batchLatencyP50Ms', description='Median batch latency in milliseconds in the last interval', kind='Gauge')
+                self._metrics['p99'] = streamsx.ec.CustomMetric(self, name='batchLatencyP99Ms', description='99th percentile of the batch latency in milliseconds in the last interval', kind='Gauge')
+
+    def __getstate__(self):
+        state = super(_BatchMetrics, self).__getstate__()
+        state['_latency'] = None
+        state.pop('_metrics', None)
+        return state
+
+    def in_flight(self):
+        return len(self._pending.times) // self.batch_size
+
+    def _summary(self):
+        rows = self._rows
+        if self.latency:
+            self._latency.record((self._last - self._first_submitted) * 1e6)
+        self._batches += 1
+        self._batch_rows += rows
+        in_flight = self.in_flight()
+        if self._metrics is not None:
+            self._metrics['batches'] += 1
+            self._metrics['queue'].value = len(self._pending.times)
+            self._metrics['inflight'].value = in_flight
+            if self.max_num_active_batches is not None and in_flight >= self.max_num_active_batches:
+                self._metrics['limit'] += 1
+        self._publish(self._last)
+        return super(_BatchMetrics, self)._summary()
+
+    def _publish(self, now):
+        elapsed = now - self._start
+        if elapsed < _INTERVAL:
+            return
+        submitted = self._pending.submitted
+        if self._metrics is not None:
+            self._metrics['rows'].value = int(round((submitted - self._submitted) / elapsed))
+            self._metrics['queue'].value = len(self._pending.times)
+            self._metrics['inflight'].value = self.in_flight()
+            self._metrics['rate'].value = int(round(self._batches / elapsed))
+            if self.latency:
+                self._metrics['p50'].value = int(round(self._latency.percentile(0.5) / 1000))
+                self._metrics['p99'].value = int(round(self._latency.percentile(0.99) / 1000))
+            if self.batch_size and self._batches:
+                self._metrics['fill'].value = int(round(100 * self._batch_rows / (self._batches * self.batch_size)))
+        self._latency.reset()
+        self._batches = 0
+        self._batch_rows = 0
+        self._submitted = submitted
+        self._start = now
+
+    def __call__(self, tuple_):
+        if self._latency is None:
+            self.__enter__()
+        out = super(_BatchMetrics, self).__call__(tuple_)
+        if not _batching._is_row(tuple_):
+            self._publish(time.monotonic())
+        return out
+
+
+# metrics summarized by insert_metrics: summary key, metric name and whether the values of the operators are added
+_SUMMARY = [
+    ('rows_per_second', 'rowsPerSecond', True),
+    ('rows', 'nRowsSubmitted', True),
+    ('batches_per_second', 'batchesPerSecond', True),
+    ('batches', 'nBatches', True),
+    ('batch_latency_p50_ms', 'batchLatencyP50Ms', False),
+    ('batch_latency_p99_ms', 'batchLatencyP99Ms', False),
+    ('batch_fill_percent', 'batchFillPercent', False),
+    ('queue_depth', 'insertQueueDepth', True),
+    ('in_flight_batches', 'inFlightBatches', True),
+    ('active_batches_limit_hits', 'nActiveBatchesLimitHits', True)]
+
+
+def insert_metrics(job):
+    """Summarizes the insert metrics of a running job.
+
+    The metrics are provided by inserts with ``metrics=True``, see :py:class:`~Insert`.
+    Counts, rates, queue depths and in-flight batches are added over the operators of all inserts and parallel channels,
+    for the latency percentiles and the batch fill the largest value of an operator is returned.
+
+    Example of printing the batch latency of a job submitted to a Streams instance::
+
+        import streamsx.eventstore as es
+
+        job = submission_result.job
+        print(es.insert_metrics(job)['batch_latency_p99_ms'])
+
+    Args:
+        job(streamsx.rest_primitives.Job): The job inserting rows.
+
+    Returns:
+        dict: Summary of the metrics, with the keys ``rows_per_second``, ``rows``, ``batches_per_second``, ``batches``,
+        ``batch_latency_p50_ms``, ``batch_latency_p99_ms``, ``batch_fill_percent``, ``queue_depth``, ``in_flight_batches`` and ``active_batches_limit_hits``.
+
+    .. versionadded:: 2.9
+    """
+    names = {name: (key, added) for key, name, added in _SUMMARY}
+    summary = {key: 0 for key, _, _ in _SUMMARY}
+    for operator in job.get_operators():
+        for metric in operator.get_metrics():
+            if metric.name not in names:
+                continue
+            key, added = names[metric.name]
+            if added:
+                summary[key] += metric.value
+            else:
+                summary[key] = max(summary[key], metric.value)
+    return summary
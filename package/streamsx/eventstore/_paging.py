@@ -0,0 +1,93 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import re
+
+_KEYWORD = re.compile(r'^[\s(]*(\w+)')
+_NESTED = re.compile(r"'(?:[^']|'')*'|\([^()]*\)")
+_ORDER_BY = re.compile(r'\bORDER\s+BY\b', re.IGNORECASE)
+_FETCH = re.compile(r'\bFETCH\s+(FIRST|NEXT)\b', re.IGNORECASE)
+
+
+def _top_level(sql):
+    # the statement without string literals and parenthesized expressions
+    previous = None
+    while previous != sql:
+        previous = sql
+        sql = _NESTED.sub(' ', sql)
+    return sql
+
+def _paged_sql(sql, max_rows=None, order_by=None):
+    """Orders the rows of a query by the ``order_by`` column and limits the number of rows.
+
+    Only queries starting with ``SELECT`` or ``WITH`` are rewritten, other statements are returned unchanged.
+    A ``SELECT`` query is wrapped to order it or to limit a query with its own ``FETCH`` clause.
+    A common table expression can not be nested, the clauses are appended to a ``WITH`` query if it has none of its own.
+    """
+    if max_rows is None and order_by is None:
+        return sql
+    keyword = _KEYWORD.match(sql)
+    keyword = keyword.group(1).upper() if keyword else None
+    if keyword not in ('SELECT', 'WITH'):
+        return sql
+    query = sql.strip().rstrip(';').rstrip()
+    top = _top_level(query)
+    fetch = _FETCH.search(top) is not None
+    if keyword == 'SELECT':
+        if order_by is not None or fetch:
+            query = 'SELECT * FROM (' + query + ') AS PAGED'
+            if order_by is not None:
+                query = query + ' ORDER BY ' + order_by
+            fetch = False
+    elif order_by is not None and not fetch and _ORDER_BY.search(top) is None:
+        query = query + ' ORDER BY ' + order_by
+    if max_rows is not None and not fetch:
+        query = query + ' FETCH FIRST ' + str(int(max_rows)) + ' ROWS ONLY'
+    return query
+
+
+class _RewriteStatement(object):
+    """Rewrites the statement contained in the input tuples to order and limit the rows of a query.
+
+    ``names`` are the attribute names of the input schema, the statement of a tuple passed as sequence is found by its position.
+    """
+    def __init__(self, attribute, max_rows=None, order_by=None, names=None):
+        self.attribute = attribute
+        self.max_rows = max_rows
+        self.order_by = order_by
+        self.position = names.index(attribute) if names is not None else None
+
+    def __call__(self, tuple_):
+        if isinstance(tuple_, str):
+            return _paged_sql(tuple_, self.max_rows, self.order_by)
+        if isinstance(tuple_, dict):
+            tuple_ = dict(tuple_)
+            tuple_[self.attribute] = _paged_sql(tuple_[self.attribute], self.max_rows, self.order_by)
+            return tuple_
+        values = list(tuple_)
+        values[self.position] = _paged_sql(values[self.position], self.max_rows, self.order_by)
+        return tuple(values)
+
+
+class _WindowBoundary(object):
+    """Punctor inserting a window punctuation before the first row of a window of the result stream.
+
+    A window has at least ``window_size`` rows, rows with the same key are kept in the same window.
+    ``names`` are the attribute names of the result schema, the key of a tuple passed as sequence is found by its position.
+    """
+    def __init__(self, order_by, window_size, names=None):
+        self.order_by = order_by
+        self.window_size = window_size
+        self.position = names.index(order_by) if names is not None else None
+        self._count = 0
+        self._key = None
+
+    def __call__(self, tuple_):
+        key = tuple_[self.order_by] if isinstance(tuple_, dict) else tuple_[self.position]
+        boundary = self._count >= self.window_size and key != self._key
+        if boundary:
+            self._count = 0
+        self._count += 1
+        self._key = key
+        return boundary
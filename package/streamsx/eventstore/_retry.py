@@ -0,0 +1,175 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import collections
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+import streamsx.ec
+import streamsx.eventstore._batching as _batching
+
+_logger = logging.getLogger('streamsx.eventstore')
+
+# length prefix of the records in the spill log
+_RECORD_HEADER = struct.Struct('<I')
+
+
+def _failed(tuple_):
+    return not tuple_['_Inserted_']
+
+
+class _SpillQueue(object):
+    """FIFO queue of ``(due, row)`` entries.
+
+    Up to ``capacity`` entries are held in memory, further entries are appended to a log file
+    and read back through a memory map when the in-memory entries are consumed.
+    """
+    def __init__(self, capacity, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self._memory = collections.deque()
+        self._file = None
+        self._read = 0
+        self._spilled = 0
+
+    def __len__(self):
+        return len(self._memory) + self._spilled
+
+    @property
+    def spilled(self):
+        return self._spilled
+
+    def put(self, due, row):
+        # once entries are spilled, new entries are spilled too to keep the order
+        if self._spilled == 0 and len(self._memory) < self.capacity:
+            self._memory.append((due, row))
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='eventstore_retry_', dir=self.directory)
+        data = pickle.dumps((due, row))
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(_RECORD_HEADER.pack(len(data)))
+        self._file.write(data)
+        self._spilled += 1
+
+    def due(self):
+        """Returns the due time of the oldest entry, ``None`` if the queue is empty."""
+        if not self._memory and self._spilled:
+            self._load()
+        return self._memory[0][0] if self._memory else None
+
+    def pop(self):
+        if not self._memory and self._spilled:
+            self._load()
+        return self._memory.popleft()[1]
+
+    def _load(self):
+        self._file.flush()
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            while self._spilled and len(self._memory) < self.capacity:
+                length, = _RECORD_HEADER.unpack_from(log, self._read)
+                start = self._read + _RECORD_HEADER.size
+                self._memory.append(pickle.loads(log[start:start + length]))
+                self._read = start + length
+                self._spilled -= 1
+        if self._spilled == 0:
+            # all spilled entries are consumed, start a new log
+            self._file.seek(0)
+            self._file.truncate()
+            self._read = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Retry(object):
+    """Holds failed rows for ``delay`` seconds and releases the rows for the next insert attempt."""
+    def __init__(self, attempt, delay, capacity, spill_dir=None):
+        self.attempt = attempt
+        self.delay = delay
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+        self._queue = None
+
+    def __enter__(self):
+        self._queue = _SpillQueue(self.capacity, self.spill_dir)
+        self._metrics = None
+        if streamsx.ec.is_active():
+            self._metrics = (
+                streamsx.ec.CustomMetric(self, name='queueDepth', description='Number of failed rows waiting for the insert attempt ' + str(self.attempt), kind='Gauge'),
+                streamsx.ec.CustomMetric(self, name='spilledRows', description='Number of waiting rows held in the spill log', kind='Gauge'),
+                streamsx.ec.CustomMetric(self, name='nRetriedRows', description='Number of rows released for the insert attempt ' + str(self.attempt)))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._queue is not None:
+            self._queue.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_queue'] = None
+        state.pop('_metrics', None)
+        return state
+
+    def __call__(self, tuple_):
+        if self._queue is None:
+            self.__enter__()
+        now = time.monotonic()
+        if _batching._is_row(tuple_):
+            row = dict(tuple_)
+            row.pop('_Inserted_', None)
+            self._queue.put(now + self.delay, row)
+        out = []
+        while True:
+            due = self._queue.due()
+            if due is None or due > now:
+                break
+            out.append(self._queue.pop())
+        if self._metrics is not None:
+            self._metrics[0].value = len(self._queue)
+            self._metrics[1].value = self._queue.spilled
+            self._metrics[2] += len(out)
+        return out
+
+
+class _DeadLetter(object):
+    """Writes the rows failed in all insert attempts as JSON lines to a file, or logs them."""
+    def __init__(self, path=None):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._metric = None
+        if self.path is not None:
+            self._file = open(self.path, 'a')
+        if streamsx.ec.is_active():
+            self._metric = streamsx.ec.CustomMetric(self, name='nDeadLetterRows', description='Number of rows failed in all insert attempts')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_file'] = None
+        state.pop('_metric', None)
+        return state
+
+    def __call__(self, tuple_):
+        row = dict(tuple_)
+        row.pop('_Inserted_', None)
+        if self._file is not None:
+            self._file.write(json.dumps(row, default=str) + '\n')
+            self._file.flush()
+        else:
+            _logger.error('Insert failed in all attempts: ' + json.dumps(row, default=str))
+        if getattr(self, '_metric', None) is not None:
+            self._metric += 1
@@ -0,0 +1,19 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+
+class _Route(object):
+    """Returns the index of the output stream for the value of the route attribute, -1 drops the tuple."""
+    def __init__(self, attribute, position, routes, default=-1):
+        self.attribute = attribute
+        self.position = position
+        self.routes = routes
+        self.default = default
+
+    def __call__(self, tuple_):
+        if isinstance(tuple_, dict):
+            value = tuple_[self.attribute]
+        else:
+            value = tuple_[self.position]
+        return self.routes.get(value, self.default)
@@ -0,0 +1,191 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import math
+from streamsx.topology.schema import CommonSchema, StreamSchema
+
+# bytes per value of the fixed width SPL types
+_FIXED_WIDTHS = {
+    'boolean': 1,
+    'int8': 1, 'uint8': 1,
+    'int16': 2, 'uint16': 2,
+    'int32': 4, 'uint32': 4,
+    'int64': 8, 'uint64': 8,
+    'float32': 4, 'float64': 8,
+    'decimal32': 4, 'decimal64': 8, 'decimal128': 16,
+    'complex32': 8, 'complex64': 16,
+    'timestamp': 16,
+}
+
+# length prefix of variable width values
+_LENGTH_WIDTH = 4
+_DEFAULT_STRING_LENGTH = 32
+_DEFAULT_COLLECTION_WIDTH = 64
+
+_DEFAULT_BATCH_BYTES = 1024 * 1024
+_DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+_DEFAULT_BATCH_LATENCY = 0.1
+
+
+def _schema_types(schema):
+    if schema == CommonSchema.Python:
+        raise TypeError("Structured schema required, Python objects have no fixed row layout.")
+    if isinstance(schema, CommonSchema):
+        schema = schema.value
+    if isinstance(schema, str):
+        schema = StreamSchema(schema)
+    if not isinstance(schema, StreamSchema):
+        raise TypeError("Structured schema required, got " + str(schema))
+    return schema._types
+
+
+def _sample_value(sample, index, name):
+    if isinstance(sample, dict):
+        return sample.get(name)
+    if hasattr(sample, '_asdict'):
+        return getattr(sample, name, None)
+    return sample[index]
+
+def _sampled_width(values, encoding):
+    widths = []
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, str):
+            widths.append(len(v.encode(encoding)))
+        elif isinstance(v, (bytes, bytearray, memoryview)):
+            widths.append(len(v))
+        else:
+            widths.append(len(str(v).encode(encoding)))
+    if not widths:
+        return None
+    return int(math.ceil(sum(widths) / len(widths)))
+
+def _attribute_width(spl_type, values):
+    if isinstance(spl_type, tuple):
+        if spl_type[0] == 'optional':
+            # null indicator and value
+            return 1 + _attribute_width(spl_type[1], values)
+        if spl_type[0] == 'tuple':
+            return sum(_attribute_width(t, []) for t, _ in spl_type[1])
+        sampled = _sampled_width(values, 'utf-8')
+        return _LENGTH_WIDTH + (sampled if sampled is not None else _DEFAULT_COLLECTION_WIDTH)
+    if spl_type in _FIXED_WIDTHS:
+        return _FIXED_WIDTHS[spl_type]
+    encoding = 'utf-16-le' if spl_type == 'ustring' else 'utf-8'
+    sampled = _sampled_width(values, encoding)
+    if sampled is None:
+        sampled = _DEFAULT_STRING_LENGTH * (2 if spl_type == 'ustring' else 1)
+    return _LENGTH_WIDTH + sampled
+
+
+def _row_width(schema, samples=None):
+    types = _schema_types(schema)
+    samples = list(samples) if samples is not None else []
+    width = 0
+    for index, (spl_type, name) in enumerate(types):
+        values = [_sample_value(s, index, name) for s in samples]
+        width += _attribute_width(spl_type, values)
+    return max(1, width)
+
+
+def recommend_batching(schema, target_rows_per_sec=None, samples=None, target_batch_bytes=_DEFAULT_BATCH_BYTES, memory_budget=_DEFAULT_MEMORY_BUDGET, batch_latency=_DEFAULT_BATCH_LATENCY):
+    """Recommends the batch settings for inserting rows of the given schema.
+
+    The row width is estimated from the attribute types of the schema. Fixed width types contribute their size,
+    strings, blobs and collections contribute a length prefix and the average size of the values in ``samples``, or a default size if no samples are given.
+
+    The batch size is the number of rows that fit into ``target_batch_bytes``.
+    The number of active batches is the number of batches required to sustain ``target_rows_per_sec``
+    when a batch insert takes ``batch_latency`` seconds, limited by the number of batches fitting into ``memory_budget``.
+
+    Example for checking the settings before submitting the application::
+
+        import streamsx.eventstore as es
+
+        schema = StreamSchema('tuple<int64 id, timestamp ts, rstring device, float64 reading>')
+        samples = [(1, None, 'sensor-0042', 0.5)]
+        print(es.recommend_batching(schema, target_rows_per_sec=100000, samples=samples))
+
+    Args:
+        schema(StreamSchema): Schema of the rows to insert.
+        target_rows_per_sec(int): Expected number of rows inserted per second. If not specified, a single active batch is recommended.
+        samples(list): Sample tuples of the schema, either as tuples or as dicts, used to measure the average size of variable width attributes.
+        target_batch_bytes(int): Target size of a batch in bytes, the default is 1 MiB.
+        memory_budget(int): Memory in bytes available for batches being filled and inserted, the default is 64 MiB.
+        batch_latency(float): Expected duration in seconds of a single batch insert, the default is 0.1 seconds.
+
+    Returns:
+        dict: Recommended settings with the keys ``batch_size`` and ``max_num_active_batches`` (values for the :py:class:`~Insert` parameters)
+        and the keys ``row_width``, ``batch_bytes`` and ``memory`` containing the estimated bytes per row, bytes per batch and bytes of all active batches.
+        The key ``heap_size`` contains the JVM heap size in megabytes recommended by :py:func:`~recommend_heap_size` for these settings.
+
+    .. versionadded:: 2.9
+    """
+    if target_batch_bytes <= 0 or memory_budget <= 0:
+        raise ValueError("target_batch_bytes and memory_budget must be positive.")
+    row_width = _row_width(schema, samples)
+    batch_size = max(1, target_batch_bytes // row_width)
+    batch_bytes = batch_size * row_width
+    max_by_memory = max(1, memory_budget // batch_bytes)
+    max_num_active_batches = 1
+    if target_rows_per_sec:
+        # batches in flight during a batch insert plus the batch being filled
+        batches_per_sec = float(target_rows_per_sec) / batch_size
+        max_num_active_batches = int(math.ceil(batches_per_sec * batch_latency)) + 1
+    max_num_active_batches = min(max_num_active_batches, max_by_memory)
+    return {
+        'batch_size': int(batch_size),
+        'max_num_active_batches': int(max_num_active_batches),
+        'row_width': int(row_width),
+        'batch_bytes': int(batch_bytes),
+        'memory': int(batch_bytes * max_num_active_batches),
+        'heap_size': recommend_heap_size(row_width, batch_size, max_num_active_batches),
+    }
+
+
+# JVM heap estimate: the rows of a batch are held as Streams tuples and as Event Store rows
+# with boxed values, the Java objects are larger than the raw values
+_JAVA_ROW_OVERHEAD = 64
+_JAVA_VALUE_FACTOR = 3
+_ROW_COPIES = 2
+_BASE_HEAP_MB = 256
+# rows of a batch when batchSize is not set: estimated rows fitting into an 8K memory page
+_PAGE_SIZE = 8 * 1024
+
+def _default_batch_size(row_width):
+    return max(1, _PAGE_SIZE // row_width)
+
+def recommend_heap_size(row_width, batch_size=None, max_num_active_batches=None):
+    """Recommends the maximum JVM heap size of the EventStoreSink operator in megabytes.
+
+    The heap needs to hold all active batches. The estimate is a base heap for the operator and the Event Store client
+    plus the rows of ``max_num_active_batches`` batches of ``batch_size`` rows, where each row is held as Streams tuple and as Event Store row
+    with Java object overhead.
+
+    Example for setting the heap size of the operator::
+
+        import streamsx.eventstore as es
+
+        batching = es.recommend_batching(schema, target_rows_per_sec=100000)
+        heap = es.recommend_heap_size(batching['row_width'], batching['batch_size'], batching['max_num_active_batches'])
+        s.for_each(es.Insert(config='eventstore', table='SampleTable', batch_size=batching['batch_size'], max_num_active_batches=batching['max_num_active_batches'], heap_size=heap))
+
+    Args:
+        row_width(int): Estimated bytes per row, see :py:func:`~recommend_batching`.
+        batch_size(int): The number of rows per batch. If not specified, the rows fitting into an 8K memory page, the default of the operator.
+        max_num_active_batches(int): The number of batches that can be filled and inserted asynchronously. The default is 1.
+
+    Returns:
+        int: Heap size in megabytes, for the ``heap_size`` parameter of :py:class:`~Insert` or the JVM option ``-Xmx<size>m``.
+
+    .. versionadded:: 2.9
+    """
+    if batch_size is None:
+        batch_size = _default_batch_size(row_width)
+    if max_num_active_batches is None:
+        max_num_active_batches = 1
+    row_bytes = _ROW_COPIES * (_JAVA_VALUE_FACTOR * row_width + _JAVA_ROW_OVERHEAD)
+    batches_mb = float(row_bytes * batch_size * max_num_active_batches) / (1024 * 1024)
+    return int(_BASE_HEAP_MB + math.ceil(batches_mb))
@@ -0,0 +1,362 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+
+import hashlib
+import os
+import tempfile
+from tempfile import gettempdir
+import streamsx.database as db
+import streamsx.spl.toolkit
+import streamsx.spl.types
+import streamsx.spl.op
+from streamsx.topology.schema import CommonSchema, StreamSchema
+from streamsx.topology.topology import Routing
+import streamsx.eventstore._paging as _paging
+from streamsx.eventstore._driver import _get_jdbc_driver
+from streamsx.eventstore._eventstore import _flush_on_timeout
+from streamsx.eventstore._sizing import _schema_types
+
+
+def _add_jdbc_properties(topology, properties):
+    """Adds a JDBC connection properties file to the bundle and returns its path for the jdbcProperties parameter."""
+    content = ''.join(k + '=' + str(properties[k]) + '\n' for k in sorted(properties))
+    filename = 'eventstore_jdbc_' + hashlib.sha256(content.encode('utf-8')).hexdigest()[:12] + '.properties'
+    directory = os.path.join(gettempdir(), 'streamsx.eventstore')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    if not os.path.isfile(path):
+        fd = tempfile.NamedTemporaryFile('w', dir=directory, suffix='.part', delete=False)
+        with fd:
+            fd.write(content)
+        os.replace(fd.name, path)
+    if path not in topology._files.get('etc', []):
+        topology.add_file_dependency(path, 'etc')
+    return 'etc/' + filename
+
+
+def _check_paging(fetch_size, max_rows, order_by, window_size, statement_cache_size=None):
+    for value, param in [(fetch_size, 'fetch_size'), (max_rows, 'max_rows'), (window_size, 'window_size'), (statement_cache_size, 'statement_cache_size')]:
+        if value is not None and value <= 0:
+            raise ValueError("Invalid " + param + " " + str(value) + ", positive value required.")
+    if window_size is not None and order_by is None:
+        raise ValueError("The order_by parameter is required for window_size.")
+
+def _attribute_names(schema):
+    # structured tuples may be passed as sequences, their attributes are found by position
+    if isinstance(schema, StreamSchema):
+        return [name for _, name in _schema_types(schema)]
+    return None
+
+def _page_statements(stream, sql_attribute, max_rows, order_by):
+    # statements contained in the input tuples are rewritten before the JDBC operator
+    if max_rows is None and order_by is None:
+        return stream
+    if sql_attribute is None and stream.oport.schema != CommonSchema.String:
+        raise ValueError("Either sql_attribute or sql parameter must be set.")
+    return stream.map(_paging._RewriteStatement(sql_attribute, max_rows, order_by, _attribute_names(stream.oport.schema)), schema=stream.oport.schema)
+
+def _batch_statements(topology, stream, batch_size, batch_timeout):
+    if batch_size is not None and batch_size <= 0:
+        raise ValueError("Invalid batch_size " + str(batch_size) + ", positive value required.")
+    if batch_timeout is None:
+        return stream
+    return _flush_on_timeout(topology, stream, batch_size, batch_timeout)
+
+def _batch_results(result, batch_size, batch_timeout):
+    params = result._op().params
+    if batch_size is not None:
+        params['batchSize'] = streamsx.spl.types.int32(batch_size)
+    if batch_timeout is not None:
+        params['batchOnPunct'] = streamsx.spl.op.Expression.expression('true')
+    if batch_size is not None or batch_timeout is not None:
+        # batch parameters have been introduced in toolkit version 1.9.0
+        streamsx.spl.toolkit.add_toolkit_dependency(result.topology, 'com.ibm.streamsx.jdbc', '[1.9.0,3.0.0)')
+
+def _page_results(result, fetch_size, order_by, window_size, statement_cache_size=None):
+    if fetch_size is None and window_size is not None:
+        # the driver fetches a window at once
+        fetch_size = window_size
+    properties = {}
+    if fetch_size is not None:
+        properties['fetchSize'] = int(fetch_size)
+    if statement_cache_size is not None:
+        # statement cache of the driver for its pooled connections and prepared statements
+        properties['maxStatements'] = int(statement_cache_size)
+    if properties:
+        result._op().params['jdbcProperties'] = _add_jdbc_properties(result.topology, properties)
+    if window_size is not None:
+        result = result.punctor(_paging._WindowBoundary(order_by, window_size, _attribute_names(result.oport.schema)), before=True)
+    return result
+
+
+class SQLStatement(db.JDBCStatement):
+    """Runs a SQL statement using Db2 Event Store client driver and JDBC database interface.
+
+    The statement is called once for each input tuple received. Result sets that are produced by the statement are emitted as output stream tuples.
+    
+    This class bases :py:class:`db_ref:streamsx.database.JDBCStatement`, includes the JDBC driver ('ibm-event_2.11-1.0.jar') and sets defaults for Db2 Event Store database:
+
+    * jdbc_driver_class = 'COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'
+    * ssl_connection = True
+    * keystore_type = 'PKCS12'
+    * truststore_type = 'PKCS12'
+    * plugin_name = 'IBMIAMauth'
+    * security_mechanism = 15
+
+    Example with "select count" statement and defined output schema with attribute ``TOTAL`` having the result of the query::
+
+        import streamsx.eventstore as es
+
+        sample_schema = StreamSchema('tuple<int32 TOTAL, rstring string>')
+        sql_query = 'SELECT COUNT(*) AS TOTAL FROM SAMPLE.TAB1'
+        query = topo.source([sql_query]).as_string()
+        res = s.map(es.SQLStatement(credentials='eventstore'), schema=sample_schema)
+        res.print()
+
+    Example of a query result ordered by the ``ts`` attribute, with a window punctuation after each 10000 rows::
+
+        sample_schema = StreamSchema('tuple<int64 id, timestamp ts, float64 reading>')
+        query = topo.source(['SELECT id, ts, reading FROM SAMPLE.READINGS']).as_string()
+        res = query.map(es.SQLStatement(credentials='eventstore', order_by='ts', window_size=10000, fetch_size=1000), schema=sample_schema)
+
+    Besides the parameters of :py:class:`db_ref:streamsx.database.JDBCStatement`, the following options control the result sets of queries:
+
+    * fetch_size(int): Number of rows the driver fetches from the database at once, limits the memory of the operator for large result sets. The database still runs the query as a whole.
+    * max_rows(int): Maximum number of rows of a query result. The query is limited with ``FETCH FIRST`` clause.
+    * order_by(str): Column ordering the rows of a query result, the query is wrapped with an ``ORDER BY`` of this column. Required for ``window_size``.
+    * window_size(int): Number of rows per window of the result stream. A window punctuation is inserted into the result stream after each window, rows with the same ``order_by`` value are kept in the same window. The ``fetch_size`` defaults to the window size.
+
+    The query is executed once, the windows are marked in the result stream by the application. This is not keyset paging:
+    the database orders and holds the whole result of the query, ``fetch_size`` limits the rows transferred at once.
+
+    ``max_rows`` and ``order_by`` apply to queries starting with ``SELECT`` or ``WITH`` only, other statements are executed unchanged.
+
+    Set the option ``statement_cache_size`` (int) to set the JDBC driver property ``maxStatements``, the size of the statement cache of the driver.
+    The driver caches statements of pooled connections and prepared statements only, whether the statements of the JDBC operator are reused depends on the operator.
+    No cache statistics are provided.
+
+    With ``batch_size`` the statement is executed in JDBC batches. Set the option ``batch_timeout`` (float|datetime.timedelta) to execute a partially filled batch
+    when its oldest tuple has waited for this number of seconds.
+
+    Args:
+        credentials(dict|str): The credentials of the IBM cloud Db2 warehouse service in JSON or the name of the application configuration.
+        options (kwargs): The additional optional parameters as variable keyword arguments.
+
+    Returns:
+        :py:class:`topology_ref:streamsx.topology.topology.Stream`: Result stream.
+
+    .. note:: This function requires an outgoing Internet connection to download the driver if jdbc_driver_lib is not specified
+    .. note:: The downloaded driver is cached in the directory set with the environment variable ``STREAMSX_EVENTSTORE_CACHE``, by default in the temporary directory. Set ``STREAMSX_EVENTSTORE_DRIVER_SHA256`` to verify the driver against a known SHA-256 digest and ``STREAMSX_EVENTSTORE_OFFLINE=1`` to use a cached driver without network access.
+    .. versionadded:: 2.7
+    .. versionchanged:: 2.9 ``fetch_size``, ``max_rows``, ``order_by``, ``window_size``, ``batch_timeout`` and ``statement_cache_size`` options added.
+    """
+    def __init__(self, credentials, **options):
+        jdbc_driver_lib = _get_jdbc_driver()  
+        print ('jdbc_driver_lib: '+jdbc_driver_lib)
+
+        super(SQLStatement, self).__init__(credentials, **options)
+        self.jdbc_driver_lib = jdbc_driver_lib
+        self.jdbc_driver_class='COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'
+        self.ssl_connection=True
+        self.keystore_type='PKCS12'
+        self.truststore_type='PKCS12'
+        self.plugin_name='IBMIAMauth'
+        self.security_mechanism=15
+        self.fetch_size = options.get('fetch_size')
+        self.max_rows = options.get('max_rows')
+        self.order_by = options.get('order_by')
+        self.window_size = options.get('window_size')
+        self.batch_timeout = options.get('batch_timeout')
+        self.statement_cache_size = options.get('statement_cache_size')
+
+    def populate(self, topology, stream, schema, name, **options):
+        _check_paging(self.fetch_size, self.max_rows, self.order_by, self.window_size, self.statement_cache_size)
+        sql = self.sql
+        if sql is not None:
+            self.sql = _paging._paged_sql(sql, self.max_rows, self.order_by)
+        else:
+            stream = _page_statements(stream, self.sql_attribute, self.max_rows, self.order_by)
+        if self.batch_timeout is not None:
+            # union markers can not be part of a composite group
+            self.group = False
+            stream = _batch_statements(topology, stream, self.batch_size, self.batch_timeout)
+            self.batch_on_punct = True
+        try:
+            result = super(SQLStatement, self).populate(topology, stream, schema, name, **options)
+        finally:
+            self.sql = sql
+        return _page_results(result, self.fetch_size, self.order_by, self.window_size, self.statement_cache_size)
+
+
+def run_statement(stream, credentials, truststore, keystore, truststore_password=None, keystore_password=None, schema=None, sql=None, sql_attribute=None, sql_params=None, transaction_size=1, jdbc_driver_class='COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver', jdbc_driver_lib=None, ssl_connection=True, keystore_type='PKCS12', truststore_type='PKCS12', plugin_name='IBMIAMauth', security_mechanism=15, vm_arg=None, name=None, fetch_size=None, max_rows=None, order_by=None, window_size=None, batch_size=None, batch_timeout=None, statement_cache_size=None):
+    """Runs a SQL statement using Db2 Event Store client driver and JDBC database interface.
+
+    The statement is called once for each input tuple received. Result sets that are produced by the statement are emitted as output stream tuples.
+    
+    This function includes the JDBC driver ('ibm-event_2.11-1.0.jar') for Db2 Event Store database ('COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver') in the application bundle per default.
+
+    Supports two ways to specify the statement:
+
+    * Statement is part of the input stream. You can specify which input stream attribute contains the statement with the ``sql_attribute`` argument. If input stream is of type ``CommonSchema.String``, then you don't need to specify the ``sql_attribute`` argument.
+    * Statement is given with the ``sql`` argument. The statement can contain parameter markers that are set with input stream attributes specified by ``sql_params`` argument.
+
+    Example with "select count" statement and defined output schema with attribute ``TOTAL`` having the result of the query::
+
+        import streamsx.eventstore as es
+
+        sample_schema = StreamSchema('tuple<int32 TOTAL, rstring string>')
+        sql_query = 'SELECT COUNT(*) AS TOTAL FROM SAMPLE.TAB1'
+        query = topo.source([sql_query]).as_string()
+        res = es.run_statement(query, credentials=credentials, schema=sample_schema)
+    
+
+    Args:
+        stream(streamsx.topology.topology.Stream): Stream of tuples containing the SQL statements or SQL statement parameter values. Supports :py:class:`topology_ref:streamsx.topology.schema.StreamSchema` (schema for a structured stream) or ``CommonSchema.String`` as input.
+        credentials(dict|str): The credentials of the IBM cloud Db2 warehouse service in JSON or the name of the application configuration.
+        truststore(str): Path to the trust store file for the SSL connection.
+        keystore(str): Path to the key store file for the SSL connection.
+        truststore_password(str): Password for the trust store file given by the truststore parameter.
+        keystore_password(str): Password for the key store file given by the keystore parameter.
+        schema(StreamSchema): Schema for returned stream. Defaults to input stream schema if not set.             
+        sql(str): String containing the SQL statement. Use this as alternative option to ``sql_attribute`` parameter.
+        sql_attribute(str): Name of the input stream attribute containing the SQL statement. Use this as alternative option to ``sql`` parameter.
+        sql_params(str): The values of SQL statement parameters. These values and SQL statement parameter markers are associated in lexicographic order. For example, the first parameter marker in the SQL statement is associated with the first sql_params value.
+        transaction_size(int): The number of tuples to commit per transaction. The default value is 1.
+        jdbc_driver_class(str): The default driver is for Db2 Event Store database 'COM.ibm.db2os390.sqlj.jdbc.DB2SQLJDriver'.
+        jdbc_driver_lib(str): Path to the JDBC driver library file. Specify the jar filename with absolute path, containing the class given with ``jdbc_driver_class`` parameter. Per default the 'ibm-event_2.11-1.0.jar' is added to the 'opt' directory in the application bundle.
+        ssl_connection(bool): Use SSL connection, default is ``True``
+        keystore_type(str): Type of the key store file, default is ``PKCS12``.
+        truststore_type(str): Type of the key store file, default is ``PKCS12``.
+        plugin_name(str): Name of the security plugin, default is 'IBMIAMauth'.
+        security_mechanism(int): Value of the security mechanism, default is 15 (com.ibm.db2.jcc.DB2BaseDataSource.PLUGIN_SECURITY).
+        vm_arg(str): Arbitrary JVM arguments can be passed to the Streams operator.
+        name(str): Sink name in the Streams context, defaults to a generated name.
+        fetch_size(int): Number of rows the driver fetches from the database at once, limits the memory of the operator for large result sets.
+        max_rows(int): Maximum number of rows of a query result, the ``SELECT`` statement is limited with ``FETCH FIRST`` clause.
+        order_by(str): Column ordering the rows of a query result, the ``SELECT`` statement is wrapped with an ``ORDER BY`` of this column. Required for ``window_size``.
+        window_size(int): Number of rows per window of the result stream. A window punctuation is inserted into the result stream after each window, rows with the same ``order_by`` value are kept in the same window. The ``fetch_size`` defaults to the window size. The query is executed once, the windows are marked in the result stream, the database still orders and holds the whole result of the query.
+        batch_size(int): Number of input tuples whose ``sql_params`` are bound to the statement and executed in one JDBC batch, instead of executing the statement for each tuple. Use for ``UPDATE``, ``DELETE`` or ``INSERT`` statements.
+        batch_timeout(float|datetime.timedelta): Maximum time in seconds a tuple waits in a partially filled batch before the batch is executed. If not specified, a batch is executed when it is full.
+        statement_cache_size(int): Value of the JDBC driver property ``maxStatements``, the size of the statement cache of the driver. The driver caches statements of pooled connections and prepared statements only, whether the statements of the JDBC operator are reused depends on the operator. No cache statistics are provided.
+
+    Returns:
+        :py:class:`topology_ref:streamsx.topology.topology.Stream`: Result stream.
+
+    .. note:: This function requires an outgoing Internet connection to download the driver if jdbc_driver_lib is not specified
+    .. note:: The downloaded driver is cached in the directory set with the environment variable ``STREAMSX_EVENTSTORE_CACHE``, by default in the temporary directory. Set ``STREAMSX_EVENTSTORE_DRIVER_SHA256`` to verify the driver against a known SHA-256 digest and ``STREAMSX_EVENTSTORE_OFFLINE=1`` to use a cached driver without network access.
+    .. versionadded:: 2.4
+    .. versionchanged:: 2.9 ``fetch_size``, ``max_rows``, ``order_by``, ``window_size``, ``batch_size``, ``batch_timeout`` and ``statement_cache_size`` parameters added.
+    .. deprecated:: 2.7.0
+        Use the :py:class:`~SQLStatement`.
+    """
+    
+    jdbc_driver_lib = _get_jdbc_driver()  
+    print ('jdbc_driver_lib: '+jdbc_driver_lib)
+
+    _check_paging(fetch_size, max_rows, order_by, window_size, statement_cache_size)
+    if sql is not None:
+        sql = _paging._paged_sql(sql, max_rows, order_by)
+    else:
+        stream = _page_statements(stream, sql_attribute, max_rows, order_by)
+    stream = _batch_statements(stream.topology, stream, batch_size, batch_timeout)
+
+    result = db.run_statement(stream,
+                            credentials,
+                            schema=schema,
+                            sql=sql,
+                            sql_attribute=sql_attribute,
+                            sql_params=sql_params,
+                            transaction_size=transaction_size,
+                            jdbc_driver_class=jdbc_driver_class,
+                            jdbc_driver_lib=jdbc_driver_lib,
+                            ssl_connection=ssl_connection,
+                            truststore=truststore,
+                            truststore_password=truststore_password,
+                            keystore=keystore,
+                            keystore_password=keystore_password,
+                            keystore_type=keystore_type,
+                            truststore_type=truststore_type,
+                            plugin_name=plugin_name,
+                            security_mechanism=security_mechanism,
+                            vm_arg=vm_arg,
+                            name=name)
+    _batch_results(result, batch_size, batch_timeout)
+    return _page_results(result, fetch_size, order_by, window_size, statement_cache_size)
+
+
+def _scan_statements(table, columns, shard_key=None, shards=1, predicate=None, ranges=None):
+    select = 'SELECT ' + ', '.join(columns) + ' FROM ' + table
+    if ranges is not None:
+        conditions = ['(' + r + ')' for r in ranges]
+    elif shards > 1:
+        # MOD has the sign of the dividend, negative keys are read by the shard of their absolute value
+        conditions = ['ABS(MOD(' + shard_key + ', ' + str(shards) + ')) = ' + str(i) for i in range(shards)]
+    else:
+        conditions = [None]
+    statements = []
+    for condition in conditions:
+        where = [c for c in [condition, '(' + predicate + ')' if predicate else None] if c]
+        statements.append(select + (' WHERE ' + ' AND '.join(where) if where else ''))
+    return statements
+
+
+def scan(topology, table, schema, credentials, shard_key=None, parallel_width=None, predicate=None, schema_name=None, ranges=None, fetch_size=1000, name=None, **options):
+    """Reads the rows of a Db2 Event Store table into a stream.
+
+    The table is split into shards that are read concurrently by ``parallel_width`` channels, each channel with its own JDBC connection.
+    The shards are either the rows with the same value of ``ABS(MOD(shard_key, parallel_width))`` for an integer ``shard_key`` column,
+    or the key or time ranges given as SQL conditions with ``ranges``. Each shard is read with a single query,
+    the driver fetches ``fetch_size`` rows at once, so that the memory of a channel is bounded independent of the size of the table.
+
+    Example of replaying a day of events with four channels::
+
+        import streamsx.eventstore as es
+
+        schema = StreamSchema('tuple<int64 id, timestamp ts, rstring device, float64 reading>')
+        rows = es.scan(topo, 'READINGS', schema, credentials='eventstore', schema_name='SAMPLE', shard_key='id', parallel_width=4,
+                       predicate="ts >= '2019-06-01 00:00:00' AND ts < '2019-06-02 00:00:00'")
+
+    Example of reading time ranges in parallel, one channel per range::
+
+        hours = ["ts >= TIMESTAMP('2019-06-01-00.00.00') + %d HOURS AND ts < TIMESTAMP('2019-06-01-00.00.00') + %d HOURS" % (h, h + 1) for h in range(24)]
+        rows = es.scan(topo, 'READINGS', schema, credentials='eventstore', schema_name='SAMPLE', ranges=hours, parallel_width=24)
+
+    Args:
+        topology(Topology): Topology of the source.
+        table(str): The name of the table to read.
+        schema(StreamSchema): Schema of the returned stream. The attribute names are the columns selected from the table.
+        credentials(dict|str): The credentials in JSON or the name of the application configuration, see :py:class:`~SQLStatement`.
+        shard_key(str): Integer column splitting the table into ``parallel_width`` shards. Required with ``parallel_width`` if ``ranges`` are not set.
+        parallel_width(int): Number of channels reading the shards. If not specified, a single query reads the table, or each range if ``ranges`` are set.
+        predicate(str): SQL condition selecting the rows to read, applied to all shards.
+        schema_name(str): The schema name of the table.
+        ranges(list): SQL conditions of the shards, for example key or time ranges. The shards are distributed round-robin to the channels.
+        fetch_size(int): Number of rows the driver fetches from the database at once, the default is 1000.
+        name(str): Source name in the Streams context, defaults to a generated name.
+        **options: Further options of :py:class:`~SQLStatement`, for example ``truststore`` and ``keystore``.
+
+    Returns:
+        :py:class:`topology_ref:streamsx.topology.topology.Stream`: Stream of the rows of the table.
+
+    .. versionadded:: 2.9
+    """
+    if parallel_width is not None and parallel_width < 1:
+        raise ValueError("Invalid parallel_width " + str(parallel_width) + ", positive value required.")
+    if ranges is not None and not ranges:
+        raise ValueError("At least one range is required.")
+    shards = parallel_width if parallel_width is not None else 1
+    if ranges is None and shards > 1 and shard_key is None:
+        raise ValueError("Either shard_key or ranges parameter must be set for parallel_width.")
+    if schema_name is not None:
+        table = schema_name + '.' + table
+    columns = [attr for _, attr in _schema_types(schema)]
+    statements = _scan_statements(table, columns, shard_key, shards, predicate, ranges)
+    stream = topology.source(statements, name=name).as_string()
+    if parallel_width is not None:
+        stream = stream.parallel(parallel_width, routing=Routing.ROUND_ROBIN)
+    rows = stream.map(SQLStatement(credentials, fetch_size=fetch_size, **options), schema=schema)
+    if parallel_width is not None:
+        rows = rows.end_parallel()
+    return rows
+
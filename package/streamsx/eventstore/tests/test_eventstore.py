@@ -14,6 +14,12 @@ import os
 import glob
 import shutil
 import uuid
+import time
+import datetime
+import json
+import re
+import sqlite3
+import importlib.util
 from tempfile import gettempdir
 
 
@@ -30,6 +36,39 @@ class TestParams(unittest.TestCase):
         es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size=100, max_num_active_batches=5, plugin_flag='false')
         es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size=100, max_num_active_batches=5, ssl_connection=False)
 
+    def _create_stream(self, topo):
+        s = topo.source([1,2,3,4,5,6])
+        schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple()
+        return s.map(lambda x : (x,'X'+str(x*2)), schema=schema)
+
+    def test_param_parallel(self):
+        topo = Topology()
+        s = self._create_stream(topo)
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', partitioning_key='id', parallel_width=3))
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', parallel_width=2, parallel_hash_attributes=['id', 'name']))
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', parallel_width=2))
+        res_schema = StreamSchema('tuple<int32 id, rstring name, boolean _Inserted_>')
+        res = es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', partitioning_key='id', schema=res_schema, parallel_width=2)
+        res.print()
+        routings = [op.outputPorts[0].routing for op in topo.graph.operators if op.kind == '$Parallel$']
+        self.assertEqual(['KEY_PARTITIONED', 'KEY_PARTITIONED', 'ROUND_ROBIN', 'KEY_PARTITIONED'], routings)
+        self.assertRaises(ValueError, es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', parallel_width=2, parallel_hash_attributes='unknown')._insert, topo, s, None, None)
+
+    def test_param_batch_timeout(self):
+        topo = Topology()
+        s = self._create_stream(topo)
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size=100, batch_timeout=0.5))
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', partitioning_key='id', parallel_width=2, batch_timeout=datetime.timedelta(seconds=2)))
+        es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_timeout=1)
+        self.assertEqual(3, len([op for op in topo.graph.operators if op.kind.endswith('::Punctor')]))
+        self.assertRaises(ValueError, es.insert, s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_timeout=0)
+
+    def test_insert_parameters(self):
+        import inspect
+        # the function passes its parameters to the Insert
+        function = set(inspect.signature(es.insert).parameters) - {'stream', 'schema', 'name', 'acknowledgement'}
+        self.assertEqual(set(inspect.signature(es.Insert).parameters), function)
+
     def test_update_toolkit(self):
         topo = Topology()
         url = None
@@ -155,3 +194,1066 @@ class TestDownloadToolkit(unittest.TestCase):
         print('toolkit location: ' + location)
         streamsx.spl.toolkit.add_toolkit(topology, location)
 
+
+
+class TestBatching(unittest.TestCase):
+
+    def test_deadline_flush(self):
+        from streamsx.eventstore._batching import _DeadlineFlush, _TICK
+        flush = _DeadlineFlush(batch_size=3, timeout=0.05)
+        self.assertFalse(flush(_TICK))
+        self.assertFalse(flush((1,'a')))
+        self.assertFalse(flush((2,'b')))
+        # third row completes the batch, the sink inserts it
+        self.assertFalse(flush((3,'c')))
+        time.sleep(0.1)
+        self.assertFalse(flush(_TICK))
+        self.assertFalse(flush((4,'d')))
+        time.sleep(0.1)
+        self.assertTrue(flush(_TICK))
+        self.assertFalse(flush(_TICK))
+
+    def test_recommend_batching(self):
+        schema = StreamSchema('tuple<int64 id, float64 reading, rstring device>')
+        rec = es.recommend_batching(schema)
+        # 8 + 8 + 4 bytes length and 32 bytes default string length
+        self.assertEqual(52, rec['row_width'])
+        self.assertEqual(1024*1024 // 52, rec['batch_size'])
+        self.assertEqual(1, rec['max_num_active_batches'])
+        rec = es.recommend_batching(schema, samples=[(1, 0.5, 'ab'), {'id':2, 'reading':0.7, 'device':'abcdef'}])
+        self.assertEqual(24, rec['row_width'])
+        rec = es.recommend_batching(schema, target_rows_per_sec=1000000, target_batch_bytes=52*1000, batch_latency=0.1)
+        self.assertEqual(1000, rec['batch_size'])
+        self.assertEqual(101, rec['max_num_active_batches'])
+        rec = es.recommend_batching(schema, target_rows_per_sec=1000000, target_batch_bytes=52*1000, memory_budget=52*1000*10)
+        self.assertEqual(10, rec['max_num_active_batches'])
+        self.assertEqual(52*1000*10, rec['memory'])
+        rec = es.recommend_batching(StreamSchema('tuple<optional<int32> a, list<int32> l, ustring u, timestamp ts>'))
+        self.assertEqual(5 + 68 + 68 + 16, rec['row_width'])
+        self.assertRaises(TypeError, es.recommend_batching, CommonSchema.Python)
+
+    def test_batch_size_auto(self):
+        topo = Topology()
+        s = topo.source([1]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size='auto'))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual(1024*1024 // 40, sink.params['batchSize'].spl_json()['value'])
+        self.assertEqual(1, sink.params['maxNumActiveBatches'].spl_json()['value'])
+        samples = [(1, 'ab')]
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size='auto', target_rows_per_sec=1000000, batching_samples=samples))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][1]
+        rec = es.recommend_batching(s.oport.schema, target_rows_per_sec=1000000, samples=samples)
+        self.assertEqual(rec['batch_size'], sink.params['batchSize'].spl_json()['value'])
+        self.assertEqual(rec['max_num_active_batches'], sink.params['maxNumActiveBatches'].spl_json()['value'])
+        self.assertGreater(rec['max_num_active_batches'], 1)
+
+
+class TestLocalEventStore(unittest.TestCase):
+
+    def test_batches(self):
+        with es.LocalEventStore(batch_size=10, max_num_active_batches=2, batch_latency=0.01) as store:
+            for i in range(95):
+                store((i, 'X'))
+        stats = store.stats()
+        self.assertEqual(95, stats['rowsInserted'])
+        self.assertEqual(10, stats['batchesInserted'])
+        self.assertEqual(0, stats['rowsFailed'])
+        self.assertLessEqual(stats['maxActiveBatches'], 2)
+        self.assertGreater(stats['batchLatency'], 0.0)
+
+    def test_errors_and_results(self):
+        from streamsx.eventstore._batching import _TICK
+        from streamsx.eventstore._local import _LocalResults
+        store = es.LocalEventStore(batch_size=5, error_rate=1.0, seed=1)
+        store._result_id = 'test_errors'
+        with store:
+            for i in range(10):
+                store((i, 'X'))
+            store.flush()
+            results = _LocalResults('test_errors', ['id', 'name'])(_TICK)
+        self.assertEqual(10, store.stats()['rowsFailed'])
+        self.assertEqual(10, len(results))
+        self.assertEqual({'id': 0, 'name': 'X', '_Inserted_': False}, results[0])
+        self.assertRaises(ValueError, es.LocalEventStore, error_rate=2)
+
+    def test_backend(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(table='sample_table', batch_size=100, backend='local'))
+        s.for_each(es.Insert(table='sample_table', partitioning_key='id', parallel_width=2, batch_timeout=1, backend=es.LocalEventStore(batch_latency=0.01)))
+        res = es.insert(s, table='sample_table', schema=StreamSchema('tuple<int32 id, boolean _Inserted_>'), backend='local')
+        res.print()
+        self.assertFalse([op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')])
+        self.assertRaises(ValueError, es.insert, s, table='sample_table', backend='unknown')
+
+    def test_tail_results(self):
+        from streamsx.eventstore._batching import _DeadlineFlush, _TICK
+        from streamsx.eventstore._local import _LocalResults
+        store = es.LocalEventStore(batch_size=100)
+        store._result_id = 'test_tail'
+        results = _LocalResults('test_tail', ['id', 'name'])
+        flush = _DeadlineFlush(batch_size=100, timeout=0.05)
+        with store:
+            for i in range(3):
+                self.assertFalse(flush((i, 'X')))
+                store((i, 'X'))
+            self.assertEqual([], results(_TICK))
+            time.sleep(0.1)
+            # the deadline flush punctuates after batch_timeout, the sink inserts the partial batch
+            self.assertTrue(flush(_TICK))
+            store.on_punct()
+            store.flush()
+            tail = results(_TICK)
+        self.assertEqual(3, len(tail))
+        self.assertEqual({'id': 2, 'name': 'X', '_Inserted_': True}, tail[-1])
+        self.assertEqual([], results(_TICK))
+
+    def test_backend_results(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        res = es.insert(s, table='sample_table', schema=StreamSchema('tuple<int32 id, boolean _Inserted_>'), batch_timeout=1, backend='local')
+        self.assertEqual(StreamSchema('tuple<int32 id, boolean _Inserted_>'), res.oport.schema)
+        ops = {op.name: op.kind for op in topo.graph.operators}
+        # the stand-in is a sink with punctuations, the results are submitted on ticks
+        self.assertTrue(ops['LocalEventStore'].endswith('::ForEach'))
+        self.assertTrue(ops['_LocalResults'].endswith('::FlatMap'))
+        res = es.insert(s, table='sample_table', partitioning_key='id', parallel_width=2, schema=StreamSchema('tuple<int32 id, boolean _Inserted_>'), backend='local')
+        res.print()
+
+
+class TestTuning(unittest.TestCase):
+
+    def test_ordering_and_vm_arg(self):
+        topo = Topology()
+        s = topo.source([1]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(connection='9.26.150.75:1101', database='sample_db', table='sample_table', ordering='relaxed', vm_arg='-XX:+UseG1GC', heap_size=1024))
+        es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', batch_size=1000, max_num_active_batches=4, ordering='strict', heap_size='auto')
+        sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')]
+        self.assertEqual('false', sinks[0].params['preserveOrder'].spl_json()['value'])
+        self.assertEqual(['-XX:+UseG1GC', '-Xmx1024m'], sinks[0].params['vmArg'])
+        self.assertEqual('true', sinks[1].params['preserveOrder'].spl_json()['value'])
+        self.assertEqual(['-Xmx' + str(es.recommend_heap_size(40, 1000, 4)) + 'm'], sinks[1].params['vmArg'])
+        self.assertRaises(ValueError, es.insert, s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', ordering='none')
+        for heap_size in ['2g', 0, -1, 1.5]:
+            self.assertRaisesRegex(ValueError, 'heap_size', es.insert, s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', heap_size=heap_size)
+        es.insert(s, connection='9.26.150.75:1101', database='sample_db', table='sample_table', heap_size='512')
+        sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')]
+        self.assertEqual(['-Xmx512m'], sinks[-1].params['vmArg'])
+
+    def test_recommend_heap_size(self):
+        self.assertEqual(256 + 1, es.recommend_heap_size(40))
+        heap = es.recommend_heap_size(100, batch_size=10000, max_num_active_batches=10)
+        # 2 copies of 10 batches of 10000 rows with 3*100+64 bytes
+        self.assertEqual(256 + 70, heap)
+        rec = es.recommend_batching(StreamSchema('tuple<int64 id>'), target_rows_per_sec=1000000)
+        self.assertEqual(es.recommend_heap_size(8, rec['batch_size'], rec['max_num_active_batches']), rec['heap_size'])
+
+
+class TestAcknowledgement(unittest.TestCase):
+
+    def test_batch_summary(self):
+        import streamsx.eventstore._acks as _acks
+        from streamsx.eventstore._batching import _TICK
+        submitted = _acks._Submitted('test', batch_size=3)
+        summarize = _acks._BatchAcknowledgement('test', ['id', 'name', '_Inserted_'], ['id'], batch_size=3)
+        for i in range(5):
+            submitted((i, 'X'))
+        out = []
+        for i in range(3):
+            out.extend(summarize((i, 'X', i != 1)))
+        self.assertEqual([(_acks._FAILED, {'id': 1, 'name': 'X', '_Inserted_': False})], [o for o in out if o[0] == _acks._FAILED])
+        summaries = [o[1] for o in out if o[0] == _acks._SUMMARY]
+        self.assertEqual(1, len(summaries))
+        self.assertEqual(3, summaries[0]['rows'])
+        self.assertEqual(1, summaries[0]['failedRows'])
+        self.assertEqual('0', summaries[0]['firstKey'])
+        self.assertEqual('2', summaries[0]['lastKey'])
+        self.assertGreaterEqual(summaries[0]['latency'], 0.0)
+        # results arriving without pause are not merged into one batch
+        self.assertEqual([], summarize((3, 'X', True)))
+        self.assertEqual([], summarize(_TICK))
+        # a partial batch inserted on a punctuation is reported with its last result
+        submitted.on_punct()
+        out = summarize((4, 'X', True))
+        self.assertEqual(1, len(out))
+        self.assertEqual(2, out[0][1]['rows'])
+        # or on the next tick, if its size is recorded after the last result
+        submitted((5, 'X'))
+        self.assertEqual([], summarize((5, 'X', True)))
+        submitted.on_punct()
+        out = summarize(_TICK)
+        self.assertEqual(1, len(out))
+        self.assertEqual(1, out[0][1]['rows'])
+
+    def test_shared_state(self):
+        import streamsx.eventstore._acks as _acks
+        from streamsx.eventstore._batching import _TICK
+        entries = len(_acks._pending)
+        submitted = _acks._Submitted('shared-test', batch_size=2)
+        summarize = _acks._BatchAcknowledgement('shared-test', ['id', '_Inserted_'], ['id'], batch_size=2)
+        submitted.__enter__()
+        summarize.__enter__()
+        self.assertIs(submitted._pending, summarize._pending)
+        submitted.__exit__(None, None, None)
+        summarize.__exit__(None, None, None)
+        # the state is removed with the last stage
+        self.assertEqual(entries, len(_acks._pending))
+        # results without rows recorded in the same PE
+        unfused = _acks._BatchAcknowledgement('unfused-test', ['id', '_Inserted_'], ['id'], batch_size=2)
+        unfused((1, True))
+        self.assertRaises(RuntimeError, unfused, _TICK)
+        unfused.__exit__(None, None, None)
+
+    def test_insert_acknowledgement(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        result_schema = StreamSchema('tuple<int32 id, rstring name, boolean _Inserted_>')
+        summaries, failed = es.insert(s, config='eventstore', table='sample_table', primary_key='id', batch_size=100, schema=result_schema, acknowledgement='batch')
+        self.assertEqual(es.BatchSummarySchema, summaries.oport.schema)
+        self.assertEqual(result_schema, failed.oport.schema)
+        summaries, failed = es.insert(s, table='sample_table', partitioning_key='id', parallel_width=2, schema=result_schema, backend='local', acknowledgement='batch')
+        failed.print()
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertIn('colocateTags', sink._placement)
+        # the ticks completing the last batch are broadcast to each channel
+        self.assertIn('BROADCAST', [op.outputPorts[0].routing for op in topo.graph.operators if op.kind == '$Parallel$'])
+        es.insert(s, config='eventstore', table='sample_table', schema=result_schema, acknowledgement='batch')
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][1]
+        self.assertEqual(8 * 1024 // 40, sink.params['batchSize'].spl_json()['value'])
+        self.assertRaises(ValueError, es.insert, s, config='eventstore', table='sample_table', acknowledgement='batch')
+        self.assertRaises(ValueError, es.insert, s, config='eventstore', table='sample_table', schema=result_schema, acknowledgement='tuple')
+        # the batches are derived from the order of the results
+        self.assertRaises(ValueError, es.insert, s, config='eventstore', table='sample_table', schema=result_schema, acknowledgement='batch', ordering='relaxed')
+        self.assertRaises(ValueError, es.insert, s, config='eventstore', table='sample_table', schema=result_schema, acknowledgement='batch', max_num_active_batches=2)
+        self.assertRaises(ValueError, es.insert, s, table='sample_table', schema=result_schema, acknowledgement='batch', backend=es.LocalEventStore(max_num_active_batches=2))
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_spill_queue(self):
+        from streamsx.eventstore._retry import _SpillQueue
+        q = _SpillQueue(capacity=3)
+        for i in range(10):
+            q.put(float(i), {'id': i})
+        self.assertEqual(10, len(q))
+        self.assertEqual(7, q.spilled)
+        out = []
+        while len(q):
+            self.assertEqual(float(len(out)), q.due())
+            out.append(q.pop()['id'])
+            if len(out) == 5:
+                q.put(10.0, {'id': 10})
+        self.assertEqual(list(range(11)), out)
+        self.assertIsNone(q.due())
+        q.close()
+
+    def test_retry_backoff(self):
+        from streamsx.eventstore._retry import _Retry
+        from streamsx.eventstore._batching import _TICK
+        retry = _Retry(1, 0.05, capacity=2)
+        for i in range(5):
+            self.assertEqual([], retry({'id': i, '_Inserted_': False}))
+        self.assertEqual([], retry(_TICK))
+        time.sleep(0.1)
+        self.assertEqual([{'id': i} for i in range(5)], retry(_TICK))
+        retry.__exit__(None, None, None)
+
+    def test_insert_with_retry(self):
+        import tempfile
+        dead_letter = os.path.join(tempfile.mkdtemp(), 'dead_letter.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(dead_letter))
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.InsertWithRetry(table='sample_table', config='eventstore', batch_size=100, max_retries=2, dead_letter=dead_letter))
+        sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')]
+        self.assertEqual(3, len(sinks))
+        self.assertRaises(ValueError, s.for_each, es.InsertWithRetry(table='sample_table', config='eventstore', max_retries=-1))
+        self.assertRaises(ValueError, s.for_each, es.InsertWithRetry(table='sample_table', config='eventstore', backoff=0))
+        self.assertRaises(ValueError, s.for_each, es.InsertWithRetry(table='sample_table', config='eventstore', max_backoff=-1.0))
+        self.assertRaises(ValueError, s.for_each, es.InsertWithRetry(table='sample_table', config='eventstore', queue_capacity=0))
+
+    def test_dead_letter(self):
+        import tempfile
+        from streamsx.eventstore._retry import _DeadLetter
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        dead_letter = _DeadLetter(path)
+        dead_letter.__enter__()
+        dead_letter({'id': 1, '_Inserted_': False})
+        dead_letter.__exit__(None, None, None)
+        with open(path) as f:
+            self.assertEqual([{'id': 1}], [json.loads(line) for line in f])
+
+
+class TestDriverCache(unittest.TestCase):
+
+    def setUp(self):
+        import io
+        import tempfile
+        import zipfile
+        self.cache = tempfile.mkdtemp()
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as z:
+            z.writestr('META-INF/MANIFEST.MF', 'Manifest-Version: 1.0\n')
+        self.jar = buf.getvalue()
+        self.env = dict(os.environ)
+        os.environ['STREAMSX_EVENTSTORE_CACHE'] = self.cache
+        for var in ['STREAMSX_EVENTSTORE_OFFLINE', 'STREAMSX_EVENTSTORE_DRIVER_SHA256']:
+            os.environ.pop(var, None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.env)
+        shutil.rmtree(self.cache)
+
+    def _response(self, *args, **kwargs):
+        from unittest import mock
+        r = mock.Mock()
+        r.headers = {'Content-Length': str(len(self.jar))}
+        r.iter_content.return_value = [self.jar[:10], self.jar[10:]]
+        return r
+
+    def test_download_once(self):
+        from unittest import mock
+        import hashlib
+        import streamsx.eventstore._driver as driver
+        with mock.patch.object(driver.requests, 'get', side_effect=self._response) as get:
+            path = driver._get_jdbc_driver()
+            self.assertEqual(path, driver._get_jdbc_driver())
+            self.assertEqual(1, get.call_count)
+            self.assertIn(hashlib.sha256(self.jar).hexdigest(), path)
+            self.assertFalse(glob.glob(os.path.join(self.cache, '*.part')))
+            # a corrupted entry is downloaded again
+            with open(path, 'ab') as fd:
+                fd.write(b'x')
+            self.assertEqual(path, driver._get_jdbc_driver())
+            self.assertEqual(2, get.call_count)
+            os.environ['STREAMSX_EVENTSTORE_DRIVER_SHA256'] = '0' * 64
+            self.assertRaises(ValueError, driver._get_jdbc_driver)
+            self.assertFalse(glob.glob(os.path.join(self.cache, '*.part')))
+
+    def test_offline(self):
+        import streamsx.eventstore._driver as driver
+        os.environ['STREAMSX_EVENTSTORE_OFFLINE'] = '1'
+        self.assertRaises(ValueError, driver._get_jdbc_driver)
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_time(self):
+        import subprocess
+        import sys
+        out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import streamsx.eventstore'], stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        self_times = {}
+        for line in out.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                self_us, _, module = line[len('import time:'):].split('|')
+                if self_us.strip().isdigit():
+                    self_times[module.strip()] = int(self_us)
+        self.assertIn('streamsx.eventstore', self_times)
+        # heavy dependencies are loaded on first use only
+        for module in ['streamsx.database', 'streamsx.toolkits', 'requests', 'wget']:
+            self.assertNotIn(module, self_times)
+        own = sum(t for m, t in self_times.items() if m.startswith('streamsx.eventstore'))
+        self.assertLess(own, 100000)
+
+
+class _AppConfig(object):
+    def __init__(self, name, properties):
+        self.name = name
+        self.properties = {k: str(v) for k, v in properties.items()}
+        self.updates = 0
+
+    def update(self, properties):
+        self.properties.update({k: str(v) for k, v in properties.items()})
+        self.updates += 1
+
+
+class _Instance(object):
+    def __init__(self, id):
+        self.id = id
+        self.app_configs = {}
+        self.listings = 0
+
+    def get_application_configurations(self, name=None):
+        self.listings += 1
+        return list(self.app_configs.values())
+
+    def create_application_configuration(self, name, properties, description=None):
+        if name == 'broken':
+            raise RuntimeError('create failed')
+        cfg = _AppConfig(name, properties)
+        self.app_configs[name] = cfg
+        return cfg
+
+
+class TestConfigureConnections(unittest.TestCase):
+
+    def test_configure_connections(self):
+        instances = [_Instance('i' + str(i)) for i in range(3)]
+        configs = [dict(name='es' + str(i), database='DB' + str(i), connection='host:1;host:2', user='u', password='p') for i in range(4)]
+        results = es.configure_connections(instances, configs, max_workers=4)
+        self.assertEqual(12, len(results))
+        self.assertEqual(['created'] * 12, [r['action'] for r in results])
+        self.assertEqual(('i0', 'es0'), (results[0]['instance'], results[0]['name']))
+        self.assertEqual([1, 1, 1], [i.listings for i in instances])
+
+        configs[1]['password'] = 'p2'
+        results = es.configure_connections(instances, configs + [dict(name='broken'), dict(name='x', unknown=1)], max_workers=4)
+        actions = [r['action'] for r in results[:6]]
+        self.assertEqual(['unchanged', 'updated', 'unchanged', 'unchanged', 'failed', 'failed'], actions)
+        self.assertIsInstance(results[4]['error'], RuntimeError)
+        self.assertIsInstance(results[5]['error'], ValueError)
+        self.assertEqual(1, instances[0].app_configs['es1'].updates)
+        self.assertEqual(0, instances[0].app_configs['es0'].updates)
+
+
+class TestStoreFiles(unittest.TestCase):
+
+    def test_store_file_dedup(self):
+        import tempfile
+        d = tempfile.mkdtemp()
+        try:
+            paths = []
+            for sub, content in [('a', b'one'), ('b', b'one'), ('c', b'two')]:
+                os.makedirs(os.path.join(d, sub))
+                paths.append(os.path.join(d, sub, 'truststore.jks'))
+                with open(paths[-1], 'wb') as fd:
+                    fd.write(content)
+            topo = Topology()
+            s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+            for i in range(5):
+                s.for_each(es.Insert(config='eventstore', table='t' + str(i), truststore=paths[0], keystore=paths[1]))
+            s.for_each(es.Insert(config='eventstore', table='t5', truststore=paths[2]))
+            self.assertEqual(2, len(topo._files['opt']))
+            sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')]
+            self.assertEqual({'opt/truststore.jks'}, {op.params['trustStore'] for op in sinks[:5]})
+            self.assertEqual({'opt/truststore.jks'}, {op.params['keyStore'] for op in sinks[:5]})
+            unique = sinks[5].params['trustStore']
+            self.assertNotEqual('opt/truststore.jks', unique)
+            self.assertEqual(os.path.basename(topo._files['opt'][1]), unique[len('opt/'):])
+            # a further topology reuses the copy of the same content
+            other = Topology()
+            o = other.source([1]).map(lambda x : (x,'X'), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+            o.for_each(es.Insert(config='eventstore', table='t0', truststore=paths[0]))
+            o.for_each(es.Insert(config='eventstore', table='t1', truststore=paths[2]))
+            self.assertEqual(topo._files['opt'][1], other._files['opt'][1])
+        finally:
+            shutil.rmtree(d)
+
+
+class TestRoutedInsert(unittest.TestCase):
+
+    def test_route(self):
+        from streamsx.eventstore._routing import _Route
+        route = _Route('type', 1, {'a': 0, 'b': 1, 'c': 1}, default=2)
+        self.assertEqual(1, route((1, 'c')))
+        self.assertEqual(0, route({'id': 1, 'type': 'a'}))
+        self.assertEqual(2, route((1, 'x')))
+        self.assertEqual(-1, _Route('type', 1, {'a': 0})((1, 'x')))
+
+    def test_routed_insert(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'a'), schema=StreamSchema('tuple<int32 id, rstring type>').as_tuple())
+        s.for_each(es.RoutedInsert(route_attribute='type', tables={'a': 'TA', 'b': 'TB', 'c': 'TB'}, default_table='TOTHER', config='eventstore'))
+        sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')]
+        self.assertEqual(['TA', 'TB', 'TOTHER'], [op.params['tableName'] for op in sinks])
+        self.assertEqual(1, len({tuple(op._placement['colocateTags']) for op in sinks}))
+        self.assertRaises(ValueError, s.for_each, es.RoutedInsert(route_attribute='unknown', tables={'a': 'TA'}, config='eventstore'))
+
+    def test_all_tables(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'a'), schema=StreamSchema('tuple<int32 id, rstring type>').as_tuple())
+        routed = es.RoutedInsert(route_attribute='type', tables={'a': 'TA', 'b': 'TB'}, config='eventstore')
+        sink = s.for_each(routed)
+        self.assertEqual(['TA', 'TB'], list(routed.sinks))
+        self.assertIs(sink, routed.sinks['TA'])
+        self.assertIsInstance(routed.sinks['TB'], streamsx.topology.topology.Sink)
+        result_schema = StreamSchema('tuple<int32 id, rstring type, boolean _Inserted_>')
+        results = es.RoutedInsert(route_attribute='type', tables={'a': 'TC', 'b': 'TD'}, config='eventstore').insert(s, schema=result_schema)
+        self.assertEqual(['TC', 'TD'], list(results))
+        for result in results.values():
+            self.assertEqual(result_schema, result.oport.schema)
+        sinks = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink') and op.params['tableName'] in ('TC', 'TD')]
+        self.assertEqual(1, len({tuple(op._placement['colocateTags']) for op in sinks}))
+
+
+class TestJdbcEndpoints(unittest.TestCase):
+
+    def test_jdbc_url(self):
+        from streamsx.eventstore._eventstore import _connection_properties
+        _, properties = _connection_properties('es', database='DB', connection='h1:1001,h2:1002,h3:1003;h1:1100', user='u', password='p')
+        url = json.loads(properties['credentials'])['jdbcurl']
+        self.assertEqual('jdbc:db2://h1:1001/DB:clientRerouteAlternateServerName=h2,h3;clientRerouteAlternatePortNumber=1002,1003;enableClientAffinitiesList=1;', url)
+        _, properties = _connection_properties('es', database='DB', connection='h1:1001;h1:1100', user='u', password='p')
+        self.assertEqual('jdbc:db2://h1:1001/DB', json.loads(properties['credentials'])['jdbcurl'])
+
+    def test_probe_endpoints(self):
+        import socket
+        from streamsx.eventstore._eventstore import _probe_endpoints
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        closed = socket.socket()
+        closed.bind(('127.0.0.1', 0))
+        try:
+            up = '127.0.0.1:' + str(server.getsockname()[1])
+            down = '127.0.0.1:' + str(closed.getsockname()[1])
+            self.assertEqual([up, down], _probe_endpoints([down, up], timeout=0.5))
+        finally:
+            server.close()
+            closed.close()
+
+
+class TestPaging(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from unittest import mock
+        fd, self.driver = tempfile.mkstemp(suffix='.jar')
+        os.close(fd)
+        patcher = mock.patch('streamsx.eventstore._statement._get_jdbc_driver', return_value=self.driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(os.remove, self.driver)
+
+    def test_paged_sql(self):
+        from streamsx.eventstore._paging import _paged_sql, _RewriteStatement
+        self.assertEqual('SELECT * FROM (SELECT a FROM T) AS PAGED ORDER BY ts FETCH FIRST 10 ROWS ONLY', _paged_sql('SELECT a FROM T', 10, 'ts'))
+        self.assertEqual('SELECT a FROM T', _paged_sql('SELECT a FROM T'))
+        self.assertEqual({'q': 'SELECT a FROM T FETCH FIRST 5 ROWS ONLY', 'x': 1}, _RewriteStatement('q', max_rows=5)({'q': 'SELECT a FROM T', 'x': 1}))
+        # other statements are passed unchanged
+        for sql in ["UPDATE T SET a = 1 WHERE b = 'SELECT'", 'INSERT INTO T SELECT * FROM U', 'DELETE FROM T', 'CALL P(1)']:
+            self.assertEqual(sql, _paged_sql(sql, 10, 'ts'))
+        self.assertEqual({'q': 'DELETE FROM T', 'x': 1}, _RewriteStatement('q', max_rows=5)({'q': 'DELETE FROM T', 'x': 1}))
+        # structured tuples passed as sequences
+        self.assertEqual((1, 'SELECT a FROM T FETCH FIRST 5 ROWS ONLY'), _RewriteStatement('q', max_rows=5, names=['x', 'q'])((1, 'SELECT a FROM T')))
+        self.assertEqual('select a FROM T FETCH FIRST 10 ROWS ONLY', _paged_sql('select a FROM T;', 10))
+        # a query with its own FETCH clause is wrapped instead of appending a second one
+        self.assertEqual('SELECT * FROM (SELECT a FROM T FETCH FIRST 3 ROWS ONLY) AS PAGED FETCH FIRST 10 ROWS ONLY', _paged_sql('SELECT a FROM T FETCH FIRST 3 ROWS ONLY;', 10))
+        self.assertEqual('SELECT a FROM T WHERE b IN (SELECT b FROM U FETCH FIRST 1 ROWS ONLY) FETCH FIRST 10 ROWS ONLY', _paged_sql('SELECT a FROM T WHERE b IN (SELECT b FROM U FETCH FIRST 1 ROWS ONLY)', 10))
+        self.assertEqual('WITH X AS (SELECT a, ts FROM T ORDER BY a) SELECT * FROM X ORDER BY ts FETCH FIRST 10 ROWS ONLY', _paged_sql('WITH X AS (SELECT a, ts FROM T ORDER BY a) SELECT * FROM X', 10, 'ts'))
+        self.assertEqual('WITH X AS (SELECT a FROM T) SELECT * FROM X ORDER BY a FETCH FIRST 10 ROWS ONLY', _paged_sql('WITH X AS (SELECT a FROM T) SELECT * FROM X ORDER BY a', 10, 'ts'))
+
+    def test_window_boundary(self):
+        from streamsx.eventstore._paging import _WindowBoundary
+        punctor = _WindowBoundary('ts', 2)
+        keys = [1, 2, 3, 3, 3, 4, 5]
+        self.assertEqual([False, False, True, False, False, True, False], [punctor({'ts': k}) for k in keys])
+        punctor = _WindowBoundary('ts', 2, ['id', 'ts'])
+        self.assertEqual([False, False, True, False, False, True, False], [punctor((0, k)) for k in keys])
+
+    def test_statement_paging(self):
+        topo = Topology()
+        schema = StreamSchema('tuple<int64 id, int64 ts>')
+        query = topo.source(['SELECT id, ts FROM T']).as_string()
+        res = query.map(es.SQLStatement(credentials='eventstore', order_by='ts', window_size=100, max_rows=1000), schema=schema)
+        self.assertEqual(schema, res.oport.schema)
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')][0]
+        self.assertTrue(jdbc.params['jdbcProperties'].startswith('etc/eventstore_jdbc_'))
+        res = es.run_statement(query, credentials='eventstore', truststore=self.driver, keystore=self.driver, schema=schema, sql='SELECT id, ts FROM T', fetch_size=500, max_rows=10)
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')][1]
+        self.assertEqual('SELECT id, ts FROM T FETCH FIRST 10 ROWS ONLY', jdbc.params['statement'])
+        self.assertEqual(2, len(topo._files['etc']))
+        self.assertRaises(ValueError, query.map, es.SQLStatement(credentials='eventstore', window_size=100), schema=schema)
+        statements = topo.source([(1, 'SELECT id, ts FROM T')]).map(schema=StreamSchema('tuple<int64 n, rstring q>').as_tuple())
+        res = es.run_statement(statements, credentials='eventstore', truststore=self.driver, keystore=self.driver, schema=schema.as_tuple(), sql_attribute='q', order_by='ts', window_size=10)
+        rewrite = [op for op in topo.graph.operators if op.name.startswith('_RewriteStatement')][-1]
+        self.assertEqual(1, rewrite.function.position)
+        boundary = [op for op in topo.graph.operators if op.name.startswith('_WindowBoundary')][-1]
+        self.assertEqual(1, boundary.function.position)
+
+    def test_statement_batches(self):
+        topo = Topology()
+        schema = StreamSchema('tuple<int64 id, rstring name>')
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'), schema=schema)
+        res = es.run_statement(s, credentials='eventstore', truststore=self.driver, keystore=self.driver, sql='UPDATE T SET name=? WHERE id=?', sql_params='name, id', batch_size=100, batch_timeout=0.5)
+        self.assertEqual(schema, res.oport.schema)
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')][0]
+        self.assertEqual(100, jdbc.params['batchSize'].spl_json()['value'])
+        self.assertIn('batchOnPunct', jdbc.params)
+        res = s.map(es.SQLStatement(credentials='eventstore', sql='UPDATE T SET name=? WHERE id=?', sql_params='name, id', batch_size=100, batch_timeout=0.5), schema=schema)
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')][1]
+        self.assertIn('batchOnPunct', jdbc.params)
+        self.assertRaises(ValueError, es.run_statement, s, credentials='eventstore', truststore=self.driver, keystore=self.driver, sql='UPDATE T SET name=?', sql_params='name', batch_size=0)
+
+    def test_statement_cache(self):
+        topo = Topology()
+        query = topo.source(['SELECT 1 FROM T']).as_string()
+        res = es.run_statement(query, credentials='eventstore', truststore=self.driver, keystore=self.driver, statement_cache_size=200, fetch_size=100)
+        res = query.map(es.SQLStatement(credentials='eventstore', statement_cache_size=200, fetch_size=100))
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')]
+        self.assertEqual(jdbc[0].params['jdbcProperties'], jdbc[1].params['jdbcProperties'])
+        self.assertEqual(1, len(topo._files['etc']))
+        with open(topo._files['etc'][0]) as fd:
+            self.assertEqual('fetchSize=100\nmaxStatements=200\n', fd.read())
+        # only the driver property is set, the statements are passed to the JDBC operator unchanged
+        self.assertEqual(1, len([op for op in topo.graph.operators if op.kind.endswith('::Map')]))
+
+    def test_scan(self):
+        from streamsx.eventstore._statement import _scan_statements
+        self.assertEqual(['SELECT id, ts FROM S.T WHERE ABS(MOD(id, 2)) = 0 AND (ts > 0)', 'SELECT id, ts FROM S.T WHERE ABS(MOD(id, 2)) = 1 AND (ts > 0)'], _scan_statements('S.T', ['id', 'ts'], 'id', 2, 'ts > 0'))
+        # the generated conditions are run against keys with both signs, MOD of SQLite is registered with the truncating semantics of Db2
+        statements = _scan_statements('T', ['id'], 'id', 3)
+        self.assertEqual(3, len(statements))
+        db = sqlite3.connect(':memory:')
+        self.addCleanup(db.close)
+        db.create_function('MOD', 2, lambda k, n: k - n * int(k / n))
+        db.execute('CREATE TABLE T (id INTEGER)')
+        db.executemany('INSERT INTO T VALUES (?)', [(k,) for k in range(-7, 8)])
+        shards = [sorted(row[0] for row in db.execute(statement)) for statement in statements]
+        self.assertEqual(list(range(-7, 8)), sorted(k for shard in shards for k in shard))
+        self.assertEqual([-6, -3, 0, 3, 6], shards[0])
+        self.assertEqual([-7, -4, -1, 1, 4, 7], shards[1])
+        self.assertEqual(['SELECT id FROM T WHERE (id < 10)', 'SELECT id FROM T WHERE (id >= 10)'], _scan_statements('T', ['id'], ranges=['id < 10', 'id >= 10']))
+        self.assertEqual(['SELECT id FROM T'], _scan_statements('T', ['id']))
+
+        topo = Topology()
+        schema = StreamSchema('tuple<int64 id, int64 ts>')
+        rows = es.scan(topo, 'T', schema, credentials='eventstore', schema_name='S', shard_key='id', parallel_width=4, predicate='ts > 0')
+        self.assertEqual(schema, rows.oport.schema)
+        jdbc = [op for op in topo.graph.operators if op.kind.endswith('JDBCRun')][0]
+        self.assertIn('jdbcProperties', jdbc.params)
+        source = [op for op in topo.graph.operators if op.kind.endswith('::Source')][0]
+        self.assertEqual(['ABS(MOD(id, 4)) = ' + str(i) for i in range(4)], [re.search(r'ABS\(MOD\(id, 4\)\) = \d', q).group(0) for q in source.function._callable])
+        self.assertRaises(ValueError, es.scan, topo, 'T', schema, credentials='eventstore', parallel_width=4)
+
+
+class TestAggregatingInsert(unittest.TestCase):
+
+    def test_tumbling_aggregate(self):
+        from streamsx.eventstore._aggregate import _TumblingAggregate
+        from streamsx.eventstore._batching import _TICK
+        aggregations = [('n', 'count', None), ('total', 'sum', 'v'), ('low', 'min', 'v'), ('high', 'max', 'v'), ('avg', 'mean', 'v')]
+        aggregate = _TumblingAggregate(['device', 'v'], ['device'], 0.2, aggregations, {'n': 'int64', 'total': 'int64', 'low': 'int32', 'high': 'int32'}, window_start='ts')
+        for device, v in [('a', 1), ('b', 10), ('a', 3), ('a', 2)]:
+            self.assertEqual([], aggregate((device, v)))
+        time.sleep(0.25)
+        rows = aggregate(_TICK)
+        self.assertEqual(2, len(rows))
+        a = rows[0]
+        self.assertEqual(('a', 3, 6, 1, 3, 2.0), (a['device'], a['n'], a['total'], a['low'], a['high'], a['avg']))
+        self.assertEqual(10, rows[1]['low'])
+        self.assertIn('ts', a)
+        self.assertEqual([], aggregate(_TICK))
+
+    def test_wide_integers(self):
+        from streamsx.eventstore._aggregate import _TumblingAggregate
+        from streamsx.eventstore._batching import _TICK
+        aggregations = [('total', 'sum', 'v'), ('low', 'min', 'v'), ('high', 'max', 'v'), ('signed', 'sum', 's')]
+        aggregate = _TumblingAggregate(['v', 's'], [], 0.2, aggregations, {'total': 'uint64', 'low': 'uint64', 'high': 'uint64', 'signed': 'int64'})
+        big = 2 ** 64 - 1
+        for v in [big, big - 1]:
+            aggregate((v, 2 ** 62))
+        time.sleep(0.25)
+        with self.assertLogs('streamsx.eventstore', level='WARNING'):
+            row = aggregate(_TICK)[0]
+        self.assertEqual((big, big - 1, big, 2 ** 63 - 1), (row['total'], row['low'], row['high'], row['signed']))
+        with self.assertLogs('streamsx.eventstore', level='WARNING'):
+            self.assertEqual(-2 ** 63, aggregate._clamp('signed', (), -2 ** 64))
+
+    def test_open_window(self):
+        import pickle
+        from streamsx.eventstore._aggregate import _TumblingAggregate
+        from streamsx.eventstore._batching import _TICK
+        aggregate = _TumblingAggregate(['device', 'v'], ['device'], 0.2, [('n', 'count', None)], {'n': 'int64'})
+        aggregate(('a', 1))
+        # the open window is kept in the checkpoint of a consistent region
+        restored = pickle.loads(pickle.dumps(aggregate))
+        time.sleep(0.25)
+        self.assertEqual([{'device': 'a', 'n': 1}], restored(_TICK))
+        with self.assertLogs('streamsx.eventstore', level='WARNING'):
+            aggregate.__exit__(None, None, None)
+
+    def test_aggregating_insert(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x, 'd', 0.5), schema=StreamSchema('tuple<int32 id, rstring device, float64 reading>').as_tuple())
+        s.for_each(es.AggregatingInsert(group_by='device', window=datetime.timedelta(seconds=1), aggregations={'events': ('count', None), 'total': ('sum', 'reading'), 'last_id': ('max', 'id')}, window_start='ts', config='eventstore', table='t'))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual('tuple<rstring device, int64 events, float64 total, int32 last_id, timestamp ts>', str(sink.inputPorts[0].schema))
+        self.assertRaises(ValueError, s.for_each, es.AggregatingInsert(group_by='device', window=1, aggregations={'x': ('median', 'reading')}, config='eventstore', table='t'))
+        self.assertRaises(ValueError, s.for_each, es.AggregatingInsert(group_by='device', window=1, aggregations={'x': ('sum', 'device')}, config='eventstore', table='t'))
+        self.assertRaises(ValueError, s.for_each, es.AggregatingInsert(group_by='device', window=1, aggregations={'x': ('count', None)}, config='eventstore'))
+        o = topo.source([1]).map(lambda x : {'id': x}, schema=StreamSchema('tuple<optional<int32> id, uint64 v>'))
+        self.assertRaises(ValueError, o.for_each, es.AggregatingInsert(group_by='id', window=1, aggregations={'x': ('count', None)}, config='eventstore', table='t'))
+        o.for_each(es.AggregatingInsert(group_by=[], window=1, aggregations={'total': ('sum', 'v')}, config='eventstore', table='u'))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][-1]
+        self.assertEqual('tuple<uint64 total>', str(sink.inputPorts[0].schema))
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_lru(self):
+        from streamsx.eventstore._dedup import _Dedup
+        dedup = _Dedup(['id', 'name'], ['id'], 'lru', capacity=2)
+        # the duplicate of 1 refreshes its key, 2 is evicted instead
+        self.assertEqual([True, True, False, True, False, True], [dedup(t) for t in [(1, 'a'), (2, 'b'), (1, 'c'), (3, 'd'), (1, 'e'), (2, 'f')]])
+        self.assertEqual(2, dedup.duplicates)
+        self.assertEqual(2, dedup.evicted)
+        self.assertEqual(0.0, dedup.error_rate())
+
+    def test_window(self):
+        from streamsx.eventstore._dedup import _Dedup
+        for mode in ['lru', 'bloom']:
+            dedup = _Dedup(['id', 'name'], ['id', 'name'], mode, window=0.1, capacity=100)
+            self.assertTrue(dedup({'id': 1, 'name': 'a'}))
+            self.assertFalse(dedup({'id': 1, 'name': 'a'}))
+            self.assertTrue(dedup({'id': 1, 'name': 'b'}))
+            time.sleep(0.25)
+            self.assertTrue(dedup({'id': 1, 'name': 'a'}), mode)
+        dedup = _Dedup(['id'], ['id'], 'lru', window=0.2)
+        dedup((1,))
+        time.sleep(0.15)
+        self.assertFalse(dedup((1,)))
+        time.sleep(0.15)
+        # the window of a key starts again with each occurrence
+        self.assertFalse(dedup((1,)))
+
+    def test_bloom(self):
+        from streamsx.eventstore._dedup import _Dedup
+        dedup = _Dedup(['id'], ['id'], 'bloom', capacity=1000)
+        unique = sum(dedup((i,)) for i in range(1000))
+        self.assertGreater(unique, 970)
+        self.assertEqual(0, sum(dedup((i,)) for i in range(1000)))
+        self.assertLess(dedup.error_rate(), 0.02)
+        size = len(dedup._keys.bits)
+        # a full generation is replaced, the memory stays fixed
+        for i in range(1000, 3500):
+            dedup((i,))
+        self.assertEqual(size, len(dedup._keys.bits))
+        self.assertGreater(dedup.evicted, 0)
+        self.assertTrue(dedup((0,)))
+
+    def test_insert_dedup(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'+str(x*2)), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(config='eventstore', table='t', primary_key='id', dedup='bloom', dedup_window=datetime.timedelta(minutes=5), parallel_width=2))
+        kinds = [op.kind for op in topo.graph.operators]
+        self.assertIn('com.ibm.streamsx.topology.functional.python::Filter', kinds)
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', dedup=True))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', primary_key='id', dedup='cuckoo'))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', primary_key='key', dedup=True))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', primary_key='id', dedup=True, dedup_capacity=0))
+
+
+class _Metric(object):
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def __iadd__(self, value):
+        self.value += value
+        return self
+
+class _Operator(object):
+    def __init__(self, metrics):
+        self.metrics = [_Metric(name, value) for name, value in metrics.items()]
+
+    def get_metrics(self):
+        return self.metrics
+
+class _Job(object):
+    def __init__(self, operators):
+        self.operators = [_Operator(metrics) for metrics in operators]
+
+    def get_operators(self):
+        return self.operators
+
+
+class TestInsertMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        from streamsx.eventstore._metrics import _Histogram
+        histogram = _Histogram()
+        self.assertEqual(0, histogram.percentile(0.5))
+        for value in range(1, 1001):
+            histogram.record(value * 1000)
+        self.assertAlmostEqual(500000, histogram.percentile(0.5), delta=500000 / 16)
+        self.assertAlmostEqual(990000, histogram.percentile(0.99), delta=990000 / 16)
+        histogram.record(10 ** 15)
+        self.assertEqual(1001, histogram.total)
+        histogram.reset()
+        self.assertEqual(0, histogram.total)
+
+    def test_batch_metrics(self):
+        from streamsx.eventstore._metrics import _Submitted, _BatchMetrics
+        from streamsx.eventstore._acks import _SUMMARY
+        submitted = _Submitted('metrics-test', batch_size=2)
+        metrics = _BatchMetrics('metrics-test', ['id', '_Inserted_'], ['id'], batch_size=2, max_num_active_batches=1)
+        for i in range(5):
+            submitted((i, True))
+        self.assertEqual([], metrics((0, True)))
+        self.assertEqual(2, metrics.in_flight())
+        out = metrics((1, True))
+        self.assertEqual(_SUMMARY, out[0][0])
+        self.assertEqual(1, metrics._latency.total)
+        self.assertEqual(1, metrics.in_flight())
+
+    def test_idle_gauges(self):
+        from streamsx.eventstore._metrics import _Submitted, _BatchMetrics, _INTERVAL
+        from streamsx.eventstore._batching import _TICK
+        submitted = _Submitted('idle-test', batch_size=2)
+        metrics = _BatchMetrics('idle-test', ['id', '_Inserted_'], ['id'], batch_size=2)
+        metrics.__enter__()
+        metrics._metrics = {name: _Metric(name, 0) for name in ['rows', 'batches', 'rate', 'p50', 'p99', 'fill', 'queue', 'inflight', 'limit']}
+        for i in range(40):
+            submitted((i, True))
+        metrics((0, True))
+        metrics((1, True))
+        metrics._start -= _INTERVAL
+        self.assertEqual([], metrics(_TICK))
+        self.assertEqual(4, metrics._metrics['rows'].value)
+        self.assertEqual((38, 19), (metrics._metrics['queue'].value, metrics._metrics['inflight'].value))
+        # without further rows the next interval publishes rates of 0
+        metrics._start -= _INTERVAL
+        metrics(_TICK)
+        self.assertEqual((0, 0, 0), (metrics._metrics['rows'].value, metrics._metrics['rate'].value, metrics._metrics['p99'].value))
+
+    def test_insert_metrics(self):
+        job = _Job([{'rowsPerSecond': 100, 'batchLatencyP99Ms': 20, 'insertQueueDepth': 5}, {'rowsPerSecond': 50, 'batchLatencyP99Ms': 30, 'queueDepth': 7}, {}])
+        summary = es.insert_metrics(job)
+        self.assertEqual(150, summary['rows_per_second'])
+        self.assertEqual(30, summary['batch_latency_p99_ms'])
+        self.assertEqual(5, summary['queue_depth'])
+        self.assertEqual(0, summary['batches'])
+
+    def test_insert(self):
+        from streamsx.eventstore._metrics import _BatchMetrics
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'+str(x*2)), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(config='eventstore', table='t', metrics=True))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertIn('boolean _Inserted_', str(sink.outputPorts[0].schema))
+        result = es.insert(s, config='eventstore', table='t', schema=StreamSchema('tuple<int32 id, boolean _Inserted_>'), metrics=True, parallel_width=2)
+        self.assertIsInstance(result, streamsx.topology.topology.Stream)
+        summaries, failed = es.insert(s, config='eventstore', table='t', schema=StreamSchema('tuple<int32 id, rstring name, boolean _Inserted_>'), acknowledgement='batch', metrics=True)
+        s.for_each(es.Insert(table='t', backend='local', metrics=True))
+        # batches completing out of order have no latency
+        s.for_each(es.Insert(config='eventstore', table='t', metrics=True, ordering='relaxed'))
+        s.for_each(es.Insert(table='t', backend=es.LocalEventStore(batch_size=10, max_num_active_batches=2), metrics=True))
+        latency = [op.function.latency for op in topo.graph.operators if isinstance(getattr(op, 'function', None), _BatchMetrics)]
+        self.assertEqual([True, True, True, True, False, False], latency)
+
+
+class TestAdaptiveBatching(unittest.TestCase):
+
+    def test_controller(self):
+        from streamsx.eventstore._adaptive import _Controller
+        controller = _Controller(100, 400, 0.5)
+        self.assertEqual(100, controller.setpoint)
+        self.assertEqual(150, controller.update(100, 0, 0.1))
+        # partial batches do not grow the setpoint
+        self.assertEqual(150, controller.update(20, 0, 0.1))
+        for _ in range(10):
+            controller.update(controller.setpoint, 0, 0.1)
+        self.assertEqual(400, controller.setpoint)
+        self.assertEqual(200, controller.update(400, 0, 0.8))
+        self.assertEqual(100, controller.update(200, 1, 0.1))
+        self.assertEqual(100, controller.update(100, 0, 0.8))
+        self.assertEqual(400, _Controller(100, 400, 0.5, initial=1000).setpoint)
+
+    def test_flush_and_feedback(self):
+        from streamsx.eventstore._adaptive import _Controller, _AdaptiveFlush
+        from streamsx.eventstore._acks import _Submitted, _BatchAcknowledgement, _SUMMARY
+        controller = _Controller(2, 4, 10.0)
+        flush = _AdaptiveFlush('adaptive-test', controller)
+        submitted = _Submitted('adaptive-test', 4)
+        feedback = _BatchAcknowledgement('adaptive-test', ['id', '_Inserted_'], ['id'], 4, adaptive=controller)
+        self.assertEqual([False, True], [flush((i, True)) for i in range(2)])
+        for i in range(2):
+            submitted((i, True))
+        submitted.on_punct()
+        self.assertEqual([], feedback((0, True)))
+        self.assertEqual(_SUMMARY, feedback((1, True))[0][0])
+        # the shared controller grows after the full batch, the prototype is not changed
+        self.assertEqual(3, flush._shared.setpoint)
+        self.assertEqual(2, controller.setpoint)
+        self.assertEqual([False, False, True], [flush((i, True)) for i in range(3)])
+
+    def test_timeout(self):
+        from streamsx.eventstore._adaptive import _Controller, _AdaptiveFlush
+        from streamsx.eventstore._batching import _TICK
+        flush = _AdaptiveFlush('adaptive-timeout-test', _Controller(3, 10, 10.0), timeout=0.1)
+        self.assertEqual([False, False], [flush((i, True)) for i in range(2)])
+        self.assertFalse(flush(_TICK))
+        time.sleep(0.15)
+        self.assertTrue(flush(_TICK))
+        self.assertFalse(flush(_TICK))
+        # the batch cut on the deadline restarts the count to the setpoint
+        self.assertEqual([False, False, True], [flush((i, True)) for i in range(3)])
+
+    def test_insert(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'+str(x*2)), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        s.for_each(es.Insert(config='eventstore', table='t', adaptive_batching=True, min_batch=50, max_batch=5000, target_latency_ms=200, parallel_width=2))
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual(5000, sink.params['batchSize'].spl_json()['value'])
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', adaptive_batching=True, min_batch=500, max_batch=100))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', adaptive_batching=True, target_latency_ms=0))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', adaptive_batching=True, max_num_active_batches=2))
+        s.for_each(es.Insert(config='eventstore', table='t', adaptive_batching=True, batch_timeout=1.0))
+        # a single stage cuts the batches on the setpoint and on the deadline
+        punctors = [op.name for op in topo.graph.operators if op.kind.endswith('::Punctor')]
+        self.assertTrue(punctors[-1].startswith('_AdaptiveFlush'))
+        self.assertFalse([name for name in punctors if name.startswith('_DeadlineFlush')])
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', adaptive_batching=True, batch_timeout=0))
+
+
+class TestTableSchema(unittest.TestCase):
+
+    def test_converter(self):
+        import decimal
+        import pickle
+        from streamsx.eventstore._convert import _Converter
+        from streamsx.topology.schema import StreamSchema
+        types = StreamSchema('tuple<int32 id, rstring name, boolean active, optional<float64> reading, list<int64> counts, decimal64 price, timestamp ts>')._types
+        convert = _Converter(types, ['deviceId', 'name', 'active', 'reading', 'counts', 'price', 'ts'])
+        row = convert({'deviceId': '7', 'name': 3, 'active': 'false', 'reading': None, 'counts': ['1', 2], 'price': 1.1, 'ts': 1.5, 'other': 1})
+        self.assertEqual((7, '3', False, None, [1, 2], decimal.Decimal('1.1')), row[:6])
+        self.assertEqual((1, 500000000), (row[6].seconds, row[6].nanoseconds))
+        with self.assertRaisesRegex(ValueError, 'attribute id'):
+            convert({'deviceId': 'x', 'name': 'a', 'active': True, 'reading': 1.0, 'counts': [], 'price': 1, 'ts': 0})
+        with self.assertRaisesRegex(ValueError, 'attribute active'):
+            convert({'deviceId': 1, 'name': 'a', 'active': 'maybe', 'reading': 1.0, 'counts': [], 'price': 1, 'ts': 0})
+        with self.assertRaisesRegex(ValueError, 'attribute id'):
+            convert({'deviceId': 3.7, 'name': 'a', 'active': True, 'reading': 1.0, 'counts': [], 'price': 1, 'ts': 0})
+        self.assertEqual(3, convert({'deviceId': 3.0, 'name': 'a', 'active': True, 'reading': 1.0, 'counts': [], 'price': 1, 'ts': 0})[0])
+        with self.assertRaisesRegex(ValueError, 'attribute id'):
+            convert({'deviceId': 2 ** 31, 'name': 'a', 'active': True, 'reading': 1.0, 'counts': [], 'price': 1, 'ts': 0})
+        narrow = _Converter(StreamSchema('tuple<uint8 a, int8 b, uint64 c>')._types, [0, 1, 2])
+        self.assertEqual((255, -128, 2 ** 64 - 1), narrow([255, -128, 2 ** 64 - 1]))
+        self.assertRaises(ValueError, narrow, [-1, 0, 0])
+        self.assertRaises(ValueError, narrow, [0, 128, 0])
+        self.assertRaises(ValueError, narrow, [0, 0, decimal.Decimal('1.5')])
+        # the generated function is compiled again after unpickling
+        restored = pickle.loads(pickle.dumps(_Converter(types[:2], [0, 1])))
+        self.assertEqual((1, 'a'), restored(['1', 'a']))
+
+    def test_to_table_schema(self):
+        topo = Topology()
+        s = topo.source([{'deviceId': 1, 'name': 'a'}])
+        rows = es.to_table_schema(s, 'tuple<int32 id, rstring name>', mapping={'id': 'deviceId'})
+        self.assertEqual('tuple<int32 id, rstring name>', str(rows.oport.schema))
+        self.assertRaises(ValueError, es.to_table_schema, s, 'tuple<int32 id>', mapping={'key': 'deviceId'})
+        self.assertRaises(ValueError, es.to_table_schema, s, 'tuple<int32 id>', mapping={'id': 1.5})
+        self.assertRaises(ValueError, es.to_table_schema, s, 'tuple<map<rstring, int32> m>')
+        structured = rows.map(schema=StreamSchema('tuple<int32 id, rstring name>'))
+        es.to_table_schema(structured, 'tuple<int64 key, rstring name>', mapping={'key': 'id'})
+        self.assertRaises(ValueError, es.to_table_schema, structured, 'tuple<int64 key>', mapping={'key': 'deviceId'})
+        self.assertRaises(ValueError, es.to_table_schema, structured, 'tuple<int64 key>', mapping={'key': 0})
+
+
+class TestPlacement(unittest.TestCase):
+
+    def test_placement(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'+str(x*2)), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        other = s.map(lambda t: t)
+        s.for_each(es.Insert(config='eventstore', table='t', isolate=True, colocate_with=other, resource_tags='ingest', queue_size=5000, congestion_policy='drop_first'))
+        kinds = [op.kind for op in topo.graph.operators]
+        self.assertIn('$Isolate$', kinds)
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual({'ingest'}, sink._placement['resourceTags'])
+        self.assertEqual(1, len(sink._placement['colocateTags']))
+        self.assertEqual({'inputPortName': 'Rows', 'congestionPolicy': 'Sys.DropFirst', 'queueSize': '5000'}, sink.config['queue'])
+        self.assertEqual('Rows', sink.inputPorts[0]._alias)
+        # the SPL generator declares threadedPort: queue(<inputPortName>, <congestionPolicy>, <queueSize>) from the operator config
+        graph = [op for op in topo.graph.generateSPLGraph()['operators'] if op['kind'].endswith('EventStoreSink')][0]
+        self.assertEqual({'inputPortName': 'Rows', 'congestionPolicy': 'Sys.DropFirst', 'queueSize': '5000'}, graph['config']['queue'])
+        self.assertEqual('Rows', graph['inputs'][0]['alias'])
+
+    def test_queue_defaults(self):
+        topo = Topology()
+        s = topo.source([1,2,3]).map(lambda x : (x,'X'+str(x*2)), schema=StreamSchema('tuple<int32 id, rstring name>').as_tuple())
+        es.insert(s, config='eventstore', table='t', congestion_policy='wait', resource_tags=['ingest', 'db'])
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual({'inputPortName': 'Rows', 'congestionPolicy': 'Sys.Wait', 'queueSize': '1000'}, sink.config['queue'])
+        self.assertEqual({'ingest', 'db'}, sink._placement['resourceTags'])
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', congestion_policy='block'))
+        self.assertRaises(ValueError, s.for_each, es.Insert(config='eventstore', table='t', queue_size=0))
+        s.for_each(es.Insert(table='t', backend='local', resource_tags='ingest', queue_size=10))
+
+
+class _Series(list):
+    def tolist(self):
+        return list(self)
+
+class _Rows(object):
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, rows):
+        return _Frame({column: values[rows] for column, values in self.frame.data.items()}, self.frame.dtypes)
+
+class _Frame(object):
+    # the parts of a pandas data frame used by insert_dataframe
+    def __init__(self, data, dtypes):
+        self.data = data
+        self.columns = list(data)
+        self.dtypes = dtypes
+        self.iloc = _Rows(self)
+
+    def __len__(self):
+        return len(next(iter(self.data.values())))
+
+    def __getitem__(self, column):
+        return _Series(self.data[column])
+
+
+class TestInsertDataFrame(unittest.TestCase):
+
+    def test_types(self):
+        from streamsx.eventstore._frames import _spl_type
+        self.assertEqual('int64', _spl_type('int64', 'a'))
+        self.assertEqual('float64', _spl_type('double', 'a'))
+        self.assertEqual('boolean', _spl_type('bool', 'a'))
+        self.assertEqual('rstring', _spl_type('object', 'a'))
+        self.assertEqual('optional<int32>', _spl_type('Int32', 'a'))
+        self.assertEqual('timestamp', _spl_type('datetime64[ns, UTC]', 'a'))
+        self.assertEqual('timestamp', _spl_type('timestamp[us, tz=UTC]', 'a'))
+        self.assertRaises(ValueError, _spl_type, 'complex128', 'a')
+
+    def test_source(self):
+        from streamsx.eventstore._frames import _FrameSource
+        frame = _Frame({'id': [1, 2, 3], 'name': ['a', 'b', 'c']}, ['int64', 'object'])
+        source = _FrameSource(lambda: [frame, frame], [('name', 'rstring'), ('id', 'int64')], 2)
+        rows = list(source())
+        self.assertEqual(6, len(rows))
+        self.assertEqual([('a', 1), ('b', 2), ('c', 3)], rows[:3])
+
+    def test_insert_dataframe(self):
+        topo = Topology()
+        frame = _Frame({'id': [1, 2, 3], 'name': ['a', 'b', 'c']}, ['int32', 'object'])
+        es.insert_dataframe(topo, frame, 't', config='eventstore', chunk_rows=1000)
+        sink = [op for op in topo.graph.operators if op.kind.endswith('EventStoreSink')][0]
+        self.assertEqual('tuple<int32 id, rstring name>', str(sink.inputPorts[0].schema))
+        es.insert_dataframe(topo, lambda: [frame], 't', schema='tuple<rstring name>', config='eventstore')
+        self.assertRaises(ValueError, es.insert_dataframe, topo, (f for f in [frame]), 't', config='eventstore')
+        self.assertRaises(ValueError, es.insert_dataframe, topo, _Frame({'event id': [1]}, ['int32']), 't', config='eventstore')
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas'), 'pandas required')
+    def test_pandas(self):
+        import pandas as pd
+        from streamsx.eventstore._frames import _FrameSource, _frame_schema
+        frame = pd.DataFrame({'id': pd.array([1, None], dtype='Int64'), 'ts': pd.to_datetime([0, 1500000000], unit='ms', utc=True), 'ok': [True, False]})
+        self.assertEqual('tuple<optional<int64> id, timestamp ts, boolean ok>', str(_frame_schema(frame)))
+        rows = list(_FrameSource(frame, [('id', 'optional'), ('ts', 'timestamp'), ('ok', 'boolean')], 1)())
+        self.assertEqual((1, True), (rows[0][0], rows[0][2]))
+        self.assertIsNone(rows[1][0])
+        self.assertEqual((1500000, 0), (rows[1][1].seconds, rows[1][1].nanoseconds))
+        missing = pd.DataFrame({'ts': pd.to_datetime([1500000000, None], unit='ms')})
+        rows = list(_FrameSource(missing, [('ts', 'optional<timestamp>')], 10)())
+        self.assertEqual(1500000, rows[0][0].seconds)
+        self.assertIsNone(rows[1][0])
+        self.assertRaises(ValueError, list, _FrameSource(missing, [('ts', 'timestamp')], 10)())
+
+    def test_missing_timestamps(self):
+        from streamsx.eventstore._frames import _timestamps, _FrameSource
+        self.assertEqual([None], _timestamps([None], 'ts', 'optional<timestamp>'))
+        self.assertEqual(1, _timestamps([1500000000], 'ts', 'timestamp')[0].seconds)
+        self.assertRaises(ValueError, _timestamps, [None], 'ts', 'timestamp')
+        topo = Topology()
+        es.insert_dataframe(topo, [], 't', schema='tuple<optional<timestamp> ts, optional<int64> id, list<int32> l>', config='eventstore')
+        source = [op for op in topo.graph.operators if op.name.startswith('_FrameSource')][0]
+        self.assertEqual([('ts', 'optional<timestamp>'), ('id', 'optional'), ('l', 'list')], source.function.columns)